@@ -0,0 +1,78 @@
+"""
+Wall-clock satu turn FoodAgent per pipeline mode (sequential / merged / concurrent).
+
+LLM & nutrition API diganti stub dengan latency tetap (tanpa network), jadi
+yang diukur murni struktur pipeline-nya. Latency default kira-kira seperti
+Gemini flash + API nutrisi di production.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_agent_stages --memory 0.8 --decision 1.2 --nutrition 0.5 --reasoning 1.0
+"""
+import argparse
+import logging
+import time
+from unittest.mock import MagicMock, patch
+
+from src.bot.agent import FoodAgent
+
+MENUS = [{"menu_name": "Nasi Goreng"}, {"menu_name": "Soto Ayam"}, {"menu_name": "Ayam Geprek"}]
+
+
+def make_agent(mode: str, latency: dict) -> FoodAgent:
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        memory = MagicMock()
+        memory.get_context.return_value = {"ltm": {}}
+        memory.stm.get_messages.return_value = []
+        MockMemory.return_value = memory
+        agent = FoodAgent(pipeline_mode=mode)
+
+    def call_llm(prompt):
+        if "deteksi preferensi" in prompt:
+            time.sleep(latency["memory"])
+            return {"allergies": [], "disliked_foods": []}
+        # mode merged: satu call berisi memory + decision
+        time.sleep(latency["decision"])
+        return {"search_method": "database", "recommendation": "Soto Ayam", "call_nutrition": True,
+                "allergies": [], "disliked_foods": []}
+
+    def get_nutrition(name):
+        time.sleep(latency["nutrition"])
+        return {"protein_g": 10, "carbohydrates_total_g": 30, "fat_total_g": 5}
+
+    def call_reasoning(prompt):
+        time.sleep(latency["reasoning"])
+        return "Mamang saranin Soto Ayam."
+
+    agent.call_llm = call_llm
+    agent.call_llm_reasoning = call_reasoning
+    agent.nutrition_tool = MagicMock()
+    agent.nutrition_tool.get_nutrition.side_effect = get_nutrition
+    agent.food_db = MagicMock()
+    agent.food_db.get_all_menus.return_value = MENUS
+    return agent
+
+
+def run(latency: dict, turns: int):
+    stages = ["memory_update", "decision", "nutrition", "reasoning", "total"]
+    print(f"{'mode':>11} | " + " | ".join(f"{s:>13}" for s in stages))
+    print("-" * (14 + 16 * len(stages)))
+    for mode in ["sequential", "merged", "concurrent"]:
+        agent = make_agent(mode, latency)
+        rows = [agent.process("u1", "s1", "mau soto ayam")["timings"] for _ in range(turns)]
+        avg = {s: sum(r.get(s, 0.0) for r in rows) / turns for s in stages}
+        print(f"{mode:>11} | " + " | ".join(
+            f"{avg[s]:>12.2f}s" if any(s in r for r in rows) else f"{'-':>13}" for s in stages
+        ))
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--memory", type=float, default=0.8)
+    parser.add_argument("--decision", type=float, default=1.2)
+    parser.add_argument("--nutrition", type=float, default=0.5)
+    parser.add_argument("--reasoning", type=float, default=1.0)
+    parser.add_argument("--turns", type=int, default=2)
+    args = parser.parse_args()
+    latency = {"memory": args.memory, "decision": args.decision, "nutrition": args.nutrition, "reasoning": args.reasoning}
+    run(latency, args.turns)
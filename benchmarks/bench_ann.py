@@ -0,0 +1,81 @@
+"""
+Recall vs latency ANN index (IVF-Flat & IVF-PQ) dibanding exact search.
+
+Data sintetis ber-cluster (mirip embedding menu: banyak variasi per jenis
+makanan). Recall@k = irisan top-k ANN dengan top-k exact.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_ann --rows 100000 --queries 50
+"""
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from src.rag.retrieval_engine import RetrievalEngine
+from src.rag.vector_store import build_binary_store
+
+
+def make_clustered(n: int, dim: int, n_clusters: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim))
+    labels = rng.integers(0, n_clusters, n)
+    data = centers[labels] + 0.6 * rng.normal(size=(n, dim))
+    return data.astype(np.float32)
+
+
+def search_names(engine, queries, top_k):
+    names, elapsed = [], 0.0
+    for q in queries:
+        with patch("src.rag.retrieval_engine.get_embedding", return_value=q):
+            start = time.perf_counter()
+            res = engine.search("q", top_k=top_k, min_score=-1.0)
+            elapsed += time.perf_counter() - start
+        names.append({r["name"] for r in res})
+    return names, elapsed / len(queries) * 1000
+
+
+def run(rows: int, dim: int, n_queries: int, top_k: int, pq_m: int):
+    data = make_clustered(rows + n_queries, dim, n_clusters=max(8, rows // 500))
+    base, queries = data[:rows], data[rows:]
+    foods = [{"name": f"Menu {i}", "embedding": base[i].round(5).tolist()} for i in range(rows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "rag.json"
+        db_path.write_text(json.dumps(foods))
+        build_binary_store(db_path)
+
+        exact = RetrievalEngine(str(db_path))
+        truth, exact_ms = search_names(exact, queries, top_k)
+        print(f"Exact: {exact_ms:.3f} ms/query ({rows} baris, dim {dim})\n")
+
+        for label, m in [("IVF-Flat", 0), (f"IVF-PQ (m={pq_m})", pq_m)]:
+            start = time.perf_counter()
+            ann = RetrievalEngine(str(db_path), use_ann=True, ann_min_rows=0, ann_pq_m=m)
+            build_s = time.perf_counter() - start
+            print(f"{label}: nlist={ann._ann.nlist}, build+load {build_s:.1f}s")
+            print(f"{'nprobe':>6} | {'recall@' + str(top_k):>9} | {'ms/query':>8} | {'speedup':>7}")
+            print("-" * 40)
+            for nprobe in [1, 2, 4, 8, 16, 32, 64]:
+                ann.nprobe = nprobe
+                got, ms = search_names(ann, queries, top_k)
+                recall = np.mean([len(g & t) / max(1, len(t)) for g, t in zip(got, truth)])
+                print(f"{nprobe:>6} | {recall:>9.3f} | {ms:>8.3f} | {exact_ms / ms:>6.1f}x")
+            print()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=192)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--pq-m", type=int, default=24)
+    args = parser.parse_args()
+    run(args.rows, args.dim, args.queries, args.top_k, args.pq_m)
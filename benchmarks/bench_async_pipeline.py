@@ -0,0 +1,100 @@
+"""
+Throughput percakapan bersamaan: `handle_user_input` di thread pool (satu
+thread per percakapan yang sedang jalan, seperti worker Flask/gunicorn) vs
+`handle_user_input_async` di satu event loop.
+
+LLM = server lokal OpenAI-compatible (benchmarks.llm_standin) yang membalas
+memory update, decision & reasoning dengan latency tetap, dipanggil lewat
+client OpenAI / AsyncOpenAI asli. LTM di-mock, nutrisi tidak dipanggil.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_async_pipeline --conversations 200 --workers 16 --latency 0.5
+"""
+import argparse
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+
+from benchmarks.llm_standin import StandInLLM, agent_reply
+from src.bot.kencot_bot import KencotBot
+from src.bot.llm_client import ResilientLLMClient
+from src.bot.llm_router import LLMRouter, Provider
+
+QUERIES = ["mau soto murah", "makan siang pedes", "lapar banget nih", "yang anget-anget", "ayam geprek dong"]
+
+
+def make_bot(server: StandInLLM) -> KencotBot:
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        memory = MagicMock()
+        memory.get_context.return_value = {"ltm": {}}
+        memory.get_context_async = AsyncMock(return_value={"ltm": {}})
+        memory.add_liked_food_async = AsyncMock()
+        memory.stm.get_messages.return_value = []
+        MockMemory.return_value = memory
+        bot = KencotBot(max_interactions=10 ** 6)
+    llm = ResilientLLMClient(
+        OpenAI(api_key="x", base_url=server.base_url, max_retries=0), "model",
+        timeouts={"decision": 60.0, "reasoning": 60.0}, max_retries=0,
+        aclient=AsyncOpenAI(api_key="x", base_url=server.base_url, max_retries=0),
+    )
+    bot.agent.router = LLMRouter([Provider(server.name, llm)])
+    bot.agent.decision_cache = None
+    bot.agent.rag_engine.search("warmup")  # load model embedding di luar pengukuran
+    return bot
+
+
+def run_threads(bot: KencotBot, n: int, workers: int, tag: str):
+    def conversation(i):
+        start = time.perf_counter()
+        bot.handle_user_input(f"u{i}", f"{tag}-{i}", "halo")
+        bot.handle_user_input(f"u{i}", f"{tag}-{i}", QUERIES[i % len(QUERIES)])
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(conversation, range(n)))
+
+
+async def run_async(bot: KencotBot, n: int, tag: str):
+    async def conversation(i):
+        start = time.perf_counter()
+        await bot.handle_user_input_async(f"u{i}", f"{tag}-{i}", "halo")
+        await bot.handle_user_input_async(f"u{i}", f"{tag}-{i}", QUERIES[i % len(QUERIES)])
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(conversation(i) for i in range(n)))
+
+
+def report(name: str, latencies, elapsed: float):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{name:>22} | {len(latencies) / elapsed:>7.1f}/s | {p50:>6.2f}s | {p99:>6.2f}s | {elapsed:>6.2f}s")
+
+
+def run(args):
+    with StandInLLM("gemini", latency=args.latency, content=agent_reply) as server:
+        bot = make_bot(server)
+        print(f"{args.conversations} percakapan, latency LLM {args.latency}s x 3 call per percakapan\n")
+        print(f"{'setup':>22} | {'throughput':>9} | {'p50':>7} | {'p99':>7} | {'wall':>7}")
+        print("-" * 70)
+        for workers in args.workers:
+            start = time.perf_counter()
+            latencies = run_threads(bot, args.conversations, workers, f"t{workers}")
+            report(f"thread pool ({workers})", latencies, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        latencies = asyncio.run(run_async(bot, args.conversations, "async"))
+        report("asyncio (1 thread)", latencies, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--latency", type=float, default=0.5, help="latency tiap call LLM")
+    args = parser.parse_args()
+    run(args)
@@ -0,0 +1,50 @@
+"""
+Benchmark waktu import package RAG (harus tetap murah: model embedding baru
+di-load saat encode pertama / warmup).
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_import
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = ["src.rag", "src.rag.similarity", "src.rag.retrieval_engine"]
+
+
+def import_ms(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def top_imports(module: str, n: int = 8):
+    """Modul dengan waktu import kumulatif terbesar (python -X importtime)"""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum_us, name = [part.strip() for part in line.replace("import time:", "").split("|")]
+        rows.append((int(cum_us), name))
+    return sorted(rows, reverse=True)[:n]
+
+
+def run(repeat: int):
+    print(f"{'module':<28} | {'median (ms)':>11} | {'min (ms)':>8}")
+    print("-" * 54)
+    for module in MODULES:
+        times = [import_ms(module) for _ in range(repeat)]
+        print(f"{module:<28} | {statistics.median(times):>11.1f} | {min(times):>8.1f}")
+
+    print("\nImport kumulatif terbesar untuk src.rag:")
+    for cum_us, name in top_imports("src.rag"):
+        print(f"  {cum_us / 1000:>8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    run(parser.parse_args().repeat)
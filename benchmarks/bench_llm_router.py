@@ -0,0 +1,82 @@
+"""
+Latency call reasoning: satu provider vs router (provider tercepat + failover)
+vs router + hedging p90. Provider = server lokal OpenAI-compatible
+(benchmarks.llm_standin) dengan latency ekor & error rate yang bisa diatur,
+dipanggil lewat client OpenAI asli + ResilientLLMClient.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_llm_router --requests 100
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+from openai import OpenAI
+
+from benchmarks.llm_standin import StandInLLM
+from src.bot.llm_client import CircuitBreaker, ResilientLLMClient
+from src.bot.llm_router import LLMRouter, Provider
+
+MESSAGES = [{"role": "user", "content": "Kenapa Soto Ayam cocok buat makan siang?"}]
+
+
+def make_provider(server: StandInLLM, retries: int) -> Provider:
+    client = OpenAI(api_key="x", base_url=server.base_url, max_retries=0)
+    llm = ResilientLLMClient(
+        client, "model", timeouts={"reasoning": 10.0}, max_retries=retries, backoff=0.05,
+        breaker=CircuitBreaker(failure_threshold=5, reset_timeout=5, name=server.name),
+    )
+    return Provider(server.name, llm)
+
+
+def measure(router: LLMRouter, n: int):
+    latencies, errors = [], 0
+    for _ in range(n):
+        start = time.perf_counter()
+        try:
+            router.complete("reasoning", MESSAGES, hedge=True)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return np.asarray(latencies), errors
+
+
+def run(args):
+    slow = StandInLLM("gemini", latency=args.gemini, tail=args.tail, tail_latency=args.tail_latency,
+                      error_rate=args.error_rate, seed=1)
+    fast = StandInLLM("groq", latency=args.groq, tail=args.tail, tail_latency=args.tail_latency,
+                      error_rate=args.error_rate, seed=2)
+    with slow, fast:
+        setups = {
+            "gemini saja": LLMRouter([make_provider(slow, args.retries)]),
+            "router": LLMRouter([make_provider(slow, args.retries), make_provider(fast, args.retries)]),
+            "router+hedge": LLMRouter(
+                [make_provider(slow, args.retries), make_provider(fast, args.retries)], hedge=True, hedge_min_samples=10
+            ),
+        }
+        print(f"gemini {args.gemini}s, groq {args.groq}s, ekor {args.tail:.0%} -> {args.tail_latency}s, "
+              f"error {args.error_rate:.0%}, {args.requests} request\n")
+        print(f"{'setup':>13} | {'p50':>6} | {'p90':>6} | {'p99':>6} | {'error':>5} | calls per provider")
+        print("-" * 72)
+        for name, router in setups.items():
+            before = {s.name: s.calls for s in (slow, fast)}
+            measure(router, 10)  # isi statistik latency dulu
+            lat, errors = measure(router, args.requests)
+            calls = ", ".join(f"{s.name}={s.calls - before[s.name]}" for s in (slow, fast))
+            p50, p90, p99 = np.percentile(lat, [50, 90, 99])
+            print(f"{name:>13} | {p50:>5.2f}s | {p90:>5.2f}s | {p99:>5.2f}s | {errors:>5} | {calls}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--gemini", type=float, default=0.15)
+    parser.add_argument("--groq", type=float, default=0.10)
+    parser.add_argument("--tail", type=float, default=0.1, help="peluang request kena latency ekor")
+    parser.add_argument("--tail-latency", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--retries", type=int, default=1)
+    args = parser.parse_args()
+    run(args)
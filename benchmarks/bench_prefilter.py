@@ -0,0 +1,67 @@
+"""
+Benchmark pre-filter index: biaya search mengikuti jumlah kandidat yang lolos
+filter (selectivity), bukan ukuran katalog.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_prefilter
+"""
+import argparse
+import json
+import logging
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from benchmarks.bench_retrieval import make_foods, timeit
+from src.rag.retrieval_engine import RetrievalEngine
+
+
+def build_engine(n: int) -> RetrievalEngine:
+    foods = make_foods(n)
+    # harga unik & merata supaya budget = kuantil selectivity
+    for i, food in enumerate(foods):
+        food["price"] = i
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "rag.json"
+        db_path.write_text(json.dumps(foods))
+        return RetrievalEngine(str(db_path))
+
+
+def search_ms(engine: RetrievalEngine, query, context) -> float:
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=query):
+        return timeit(lambda: engine.search("q", min_score=0.0, context=context), repeat=20) * 1000
+
+
+def run(catalog: int, survivors: int):
+    rng = np.random.default_rng(0)
+    engine = build_engine(catalog)
+    query = rng.random(engine._matrix.shape[1]).tolist()
+
+    print(f"Katalog {catalog} baris, filter budget dengan selectivity berbeda")
+    print(f"{'selectivity':>11} | {'kandidat':>8} | {'search (ms)':>11}")
+    print("-" * 38)
+    for sel in [0.001, 0.01, 0.1, 0.5, 1.0]:
+        budget = max(1, int(catalog * sel) - 1)
+        ms = search_ms(engine, query, {"budget": budget})
+        print(f"{sel:>11} | {budget + 1:>8} | {ms:>11.3f}")
+    print(f"{'(no filter)':>11} | {catalog:>8} | {search_ms(engine, query, None):>11.3f}")
+
+    print(f"\nJumlah kandidat tetap {survivors}, ukuran katalog berbeda")
+    print(f"{'katalog':>8} | {'filtered (ms)':>13} | {'full scan (ms)':>14}")
+    print("-" * 42)
+    for n in [catalog // 100, catalog // 10, catalog]:
+        eng = build_engine(n)
+        filtered = search_ms(eng, query, {"budget": survivors - 1})
+        full = search_ms(eng, query, None)
+        print(f"{n:>8} | {filtered:>13.3f} | {full:>14.3f}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", type=int, default=100000)
+    parser.add_argument("--survivors", type=int, default=500)
+    args = parser.parse_args()
+    run(args.catalog, args.survivors)
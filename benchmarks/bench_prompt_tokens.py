@@ -0,0 +1,134 @@
+"""
+Token context di prompt: serializer lama (`json.dumps(combined_context)`,
+termasuk riwayat STM, slot None & list LTM penuh) vs `encode_context`.
+
+Percakapan diambil dari input di test (test_stm_one_session, test_pipeline_modes,
+test_llm_reasoning, dst.) dan dijalankan sebagai satu sesi FoodAgent dengan
+SessionManager asli; LTM disimulasikan (liked_foods bertambah tiap rekomendasi).
+LLM diganti stub. Token dihitung pakai tiktoken kalau terpasang, kalau tidak
+pakai pendekatan kata + tanda baca.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_prompt_tokens
+"""
+import argparse
+import json
+import logging
+import re
+from unittest.mock import MagicMock, patch
+
+from src.bot.agent import FoodAgent
+from src.memory.session_manager import SessionManager
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _ENCODING = None
+
+CONVERSATIONS = {
+    "stm_one_session": ["aku suka pedas", "aku juga suka ayam"],
+    "pipeline_modes": ["aku alergi udang, ga suka nasi goreng", "nasi goreng dong", "mau soto ayam",
+                       "aku ga suka nasi goreng"],
+    "single_turn": ["aku suka makanan pedas", "aku mau sesuatu yang bakar", "Rekomendasi makanan apa?",
+                    "mau soto ayam 15rb", "nasi goyeng"],
+}
+REPLY = "Mamang saranin {name} nih bestie 😋 harganya pas, porsinya mantap, cocok buat kamu yang lagi laper. " * 3
+
+
+def count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+def make_agent(ltm: dict) -> FoodAgent:
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        memory = MagicMock()
+        memory.get_context.side_effect = lambda user_id, session_id: {"ltm": json.loads(json.dumps(ltm))}
+        memory.add_liked_food.side_effect = lambda user_id, food: ltm["liked_foods"].append(food)
+        memory.stm = SessionManager()
+        MockMemory.return_value = memory
+        agent = FoodAgent(pipeline_mode="sequential")
+    agent.decision_cache = None
+    agent.nutrition_tool = MagicMock()
+    agent.nutrition_tool.get_nutrition.return_value = {}
+    return agent
+
+
+def run(args):
+    ltm = {"allergies": ["udang", "Kacang"], "disliked_foods": ["nasi goreng", "Nasi Goreng", "pare"],
+           "liked_foods": ["Soto Ayam", "Bakso", "Mie Ayam", "Ayam Geprek", "Gado-gado"]}
+    agent = make_agent(ltm)
+    rows, totals = [], {"before": 0, "after": 0, "prompt": 0}
+
+    def call_llm(prompt):
+        totals["prompt"] += count_tokens(prompt)
+        if "deteksi preferensi" in prompt:
+            return {"allergies": [], "disliked_foods": []}
+        menu = prompt.split("Daftar menu dari database:\n- ")[1].splitlines()[0]
+        return {"search_method": "database", "recommendation": menu, "call_nutrition": False}
+
+    def call_reasoning(prompt):
+        totals["prompt"] += count_tokens(prompt)
+        return REPLY.format(name=agent.last_menu)
+
+    original_context, original_reasoning = agent.prompt_context, agent.build_reasoning_prompt
+    usage = {"before": 0, "after": 0, "reasoning": False}
+
+    def prompt_context(context):
+        if usage["reasoning"]:
+            # prompt reasoning lama menulis tiga list LTM mentah
+            ltm_now = context.get("ltm", {})
+            legacy = "\n".join(f"{label}: {ltm_now.get(key, [])}" for key, label in (
+                ("liked_foods", "Liked foods user"), ("allergies", "Allergies user"), ("disliked_foods", "Disliked foods user")))
+        else:
+            # prompt memory update & decision lama: json.dumps(combined_context)
+            legacy = json.dumps(context, ensure_ascii=False, default=str)
+        usage["before"] += count_tokens(legacy)
+        encoded = original_context(context)
+        usage["after"] += count_tokens(encoded)
+        return encoded
+
+    def build_reasoning_prompt(*a, **kw):
+        usage["reasoning"] = True
+        try:
+            return original_reasoning(*a, **kw)
+        finally:
+            usage["reasoning"] = False
+
+    agent.call_llm = call_llm
+    agent.call_llm_reasoning = call_reasoning
+    agent.prompt_context = prompt_context
+    agent.build_reasoning_prompt = build_reasoning_prompt
+    agent.last_menu = "menu ini"
+
+    turn = 0
+    for name, inputs in CONVERSATIONS.items():
+        for text in inputs:
+            usage.update(before=0, after=0)
+            prompt_tokens = totals["prompt"]
+            result = agent.process("bench", "s1", text)
+            agent.last_menu = (result["recommendation"] or {}).get("menu_name", "menu ini")
+            turn += 1
+            totals["before"] += usage["before"]
+            totals["after"] += usage["after"]
+            rows.append((turn, name, text, usage["before"], usage["after"], totals["prompt"] - prompt_tokens))
+
+    tokenizer = "tiktoken cl100k_base" if _ENCODING is not None else "aproksimasi kata+tanda baca"
+    print(f"token: {tokenizer}; context = blok context di 3 prompt per turn\n")
+    print(f"{'turn':>4} | {'percakapan':<16} | {'context lama':>12} | {'encoder':>7} | {'prompt total':>12} | input")
+    print("-" * 96)
+    for turn, name, text, before, after, prompt in rows:
+        print(f"{turn:>4} | {name:<16} | {before:>12} | {after:>7} | {prompt:>12} | {text}")
+    print("-" * 96)
+    saved = 1 - totals["after"] / totals["before"]
+    print(f"{'':>4} | {'total':<16} | {totals['before']:>12} | {totals['after']:>7} | {totals['prompt']:>12} | "
+          f"context -{saved:.0%}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    args = parser.parse_args()
+    run(args)
@@ -0,0 +1,107 @@
+"""
+Memori & kualitas ranking embedding float32 / float16 / int8 dibanding float64.
+
+1. Dataset asli (data/rag_database.json): query = embedding tiap menu + campuran
+   acak 2-3 menu. Agreement@k = irisan top-k dtype vs top-k float64;
+   "tie-aware" menghitung hasil yang skornya (float64) seri dengan skor ke-k
+   sebagai benar, karena embedding fallback TF-IDF banyak yang skornya sama persis.
+2. Katalog sintetis besar: ukuran matrix dan latency search per dtype.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_quantization --rows 100000
+"""
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from benchmarks.bench_ann import make_clustered
+from src.rag.retrieval_engine import RetrievalEngine, top_k_indices
+from src.rag.vector_store import normalize_rows, stack_embeddings
+
+DTYPES = ["float32", "float16", "int8"]
+
+
+def make_queries(base: np.ndarray, n_mix: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    mixes = []
+    for _ in range(n_mix):
+        picks = rng.choice(base.shape[0], int(rng.integers(2, 4)), replace=False)
+        mixes.append(base[picks].sum(axis=0))
+    return np.vstack([base, np.asarray(mixes)])
+
+
+def agreement(db_path: str, top_k: int, n_mix: int):
+    foods = json.loads(Path(db_path).read_text(encoding="utf-8"))
+    reference, _ = stack_embeddings(foods)
+    reference = normalize_rows(reference.astype(np.float64))
+    queries = normalize_rows(make_queries(reference, n_mix))
+    ref_scores = queries @ reference.T
+
+    print(f"Dataset: {db_path} ({reference.shape[0]} baris, dim {reference.shape[1]}, {len(queries)} query)")
+    print(f"{'dtype':>8} | {'matrix bytes':>12} | {'vs float64':>10} | {'agree@k':>8} | {'tie-aware':>9} | max |err|")
+    print("-" * 76)
+    print(f"{'float64':>8} | {reference.nbytes:>12,} | {'1.00x':>10} | {'-':>8} | {'-':>9} | -")
+    for dtype in DTYPES:
+        snap = RetrievalEngine(db_path, dtype=dtype, hybrid=False)._snapshot
+        scores = snap.score(queries)
+        exact_hits = tie_hits = 0
+        for ref, got in zip(ref_scores, scores):
+            truth = set(top_k_indices(ref, top_k)[:top_k].tolist())
+            pred = top_k_indices(got, top_k)[:top_k]
+            exact_hits += len(truth & set(pred.tolist()))
+            kth = np.sort(ref)[-top_k]
+            tie_hits += int((ref[pred] >= kth - 1e-6).sum())
+        total = top_k * len(queries)
+        err = float(np.abs(scores - ref_scores).max())
+        ratio = reference.nbytes / snap.matrix.nbytes
+        print(f"{dtype:>8} | {snap.matrix.nbytes:>12,} | {ratio:>9.2f}x | {exact_hits / total:>8.3f} | "
+              f"{tie_hits / total:>9.3f} | {err:.2e}")
+
+
+def scale(rows: int, dim: int, n_queries: int, top_k: int):
+    data = make_clustered(rows + n_queries, dim, n_clusters=max(8, rows // 500))
+    base, queries = data[:rows], data[rows:]
+    foods = [{"name": f"Menu {i}", "embedding": base[i].round(5).tolist()} for i in range(rows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "rag.json"
+        db_path.write_text(json.dumps(foods))
+        engines = {dtype: RetrievalEngine(str(db_path), dtype=dtype, hybrid=False) for dtype in DTYPES}
+
+    print(f"\nSintetis: {rows} baris, dim {dim}")
+    print(f"{'dtype':>8} | {'matrix MB':>9} | {'ms/query':>8} | recall@{top_k} vs float32")
+    print("-" * 52)
+    truth = None
+    for dtype, engine in engines.items():
+        names, elapsed = [], 0.0
+        for q in queries:
+            with patch("src.rag.retrieval_engine.get_embedding", return_value=q):
+                start = time.perf_counter()
+                res = engine.search("q", top_k=top_k, min_score=-1.0)
+                elapsed += time.perf_counter() - start
+            names.append({r["name"] for r in res})
+        truth = truth or names
+        recall = np.mean([len(a & b) / top_k for a, b in zip(truth, names)])
+        mb = engine._matrix.nbytes / 1e6
+        print(f"{dtype:>8} | {mb:>9.1f} | {elapsed / len(queries) * 1000:>8.3f} | {recall:.3f}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="data/rag_database.json")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--mix", type=int, default=200, help="jumlah query campuran di dataset asli")
+    args = parser.parse_args()
+    agreement(args.db, args.top_k, args.mix)
+    if args.rows:
+        scale(args.rows, args.dim, args.queries, args.top_k)
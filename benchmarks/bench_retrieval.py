@@ -0,0 +1,141 @@
+"""
+Benchmark RetrievalEngine.search: loop per-baris (implementasi lama) vs matrix search.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_retrieval --sizes 1000 10000 100000
+    python -m benchmarks.bench_retrieval --batch 32   # search vs search_many
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from src.rag.retrieval_engine import RetrievalEngine
+
+DIM = 192
+FACULTIES = ["Teknik", "MIPA", "FEB", "Hukum", "Fisipol", "Pertanian"]
+
+
+def make_foods(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    # embedding sparse-ish mirip TF-IDF fallback
+    emb = rng.random((n, DIM)) * (rng.random((n, DIM)) < 0.05)
+    return [
+        {
+            "id": f"food_{i}",
+            "name": f"Menu {i}",
+            "price": int(rng.integers(8, 40)) * 1000,
+            "faculty_proximity": [FACULTIES[i % len(FACULTIES)]],
+            "tags": [],
+            "embedding": emb[i].round(4).tolist(),
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_search(foods, query_emb, top_k=5, min_score=0.3, context=None):
+    """Salinan implementasi lama (per-baris sklearn cosine_similarity)"""
+    results = []
+    for food in foods:
+        emb = np.array(food.get("embedding", []), dtype=float)
+        if emb.size == 0:
+            continue
+        query_vec = np.array(query_emb, dtype=float)
+        score = cosine_similarity(query_vec.reshape(1, -1), emb.reshape(1, -1))[0][0]
+        if context:
+            budget = context.get("budget")
+            faculty = context.get("faculty")
+            if budget and food.get("price", 0) > budget:
+                continue
+            if faculty and faculty not in food.get("faculty_proximity", []):
+                continue
+        if score >= min_score:
+            results.append({"name": food.get("name"), "similarity_score": float(score)})
+    results.sort(key=lambda x: x["similarity_score"], reverse=True)
+    return results[:top_k]
+
+
+def timeit(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, queries: int, legacy_max: int):
+    rng = np.random.default_rng(42)
+    print(f"{'rows':>8} | {'legacy (ms)':>12} | {'matrix (ms)':>12} | {'speedup':>8} | same order")
+    print("-" * 64)
+    for n in sizes:
+        foods = make_foods(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "rag.json"
+            db_path.write_text(json.dumps(foods))
+            engine = RetrievalEngine(str(db_path))
+
+        query_vecs = [foods[int(i)]["embedding"] for i in rng.integers(0, n, queries)]
+        same = True
+        matrix_t = 0.0
+        legacy_t = None
+
+        for q in query_vecs:
+            with patch("src.rag.retrieval_engine.get_embedding", return_value=q):
+                matrix_t += timeit(lambda: engine.search("q", top_k=5, min_score=0.1), repeat=3)
+                new = [r["name"] for r in engine.search("q", top_k=5, min_score=0.1)]
+            if n <= legacy_max:
+                old = [r["name"] for r in legacy_search(foods, q, top_k=5, min_score=0.1)]
+                same &= old == new
+
+        if n <= legacy_max:
+            q = query_vecs[0]
+            legacy_t = timeit(lambda: legacy_search(foods, q, top_k=5, min_score=0.1), repeat=1)
+
+        matrix_ms = matrix_t / len(query_vecs) * 1000
+        if legacy_t is None:
+            print(f"{n:>8} | {'(skip)':>12} | {matrix_ms:>12.3f} | {'-':>8} | -")
+        else:
+            legacy_ms = legacy_t * 1000
+            print(f"{n:>8} | {legacy_ms:>12.1f} | {matrix_ms:>12.3f} | {legacy_ms / matrix_ms:>7.0f}x | {same}")
+
+
+def run_batch(sizes, batch: int):
+    """Bandingkan `batch` kali search() vs satu search_many()"""
+    rng = np.random.default_rng(7)
+    print(f"{'rows':>8} | {'queries':>7} | {'loop search (ms)':>16} | {'search_many (ms)':>16}")
+    print("-" * 58)
+    for n in sizes:
+        foods = make_foods(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "rag.json"
+            db_path.write_text(json.dumps(foods))
+            engine = RetrievalEngine(str(db_path))
+
+        vecs = [foods[int(i)]["embedding"] for i in rng.integers(0, n, batch)]
+        it = iter(vecs * 100)
+        with patch("src.rag.retrieval_engine.get_embedding", side_effect=lambda _: next(it)), \
+             patch("src.rag.retrieval_engine.get_embeddings", return_value=vecs):
+            loop_t = timeit(lambda: [engine.search("q", min_score=0.1) for _ in range(batch)], repeat=3)
+            many_t = timeit(lambda: engine.search_many(["q"] * batch, min_score=0.1), repeat=3)
+        print(f"{n:>8} | {batch:>7} | {loop_t * 1000:>16.2f} | {many_t * 1000:>16.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=5)
+    parser.add_argument("--legacy-max", type=int, default=100000,
+                        help="lewati loop lama untuk katalog lebih besar dari ini")
+    parser.add_argument("--batch", type=int, default=0,
+                        help="kalau > 0, bandingkan search() berulang vs search_many()")
+    args = parser.parse_args()
+    if args.batch:
+        run_batch(args.sizes, args.batch)
+    else:
+        run(args.sizes, args.queries, args.legacy_max)
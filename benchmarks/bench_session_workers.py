@@ -0,0 +1,94 @@
+"""
+Throughput & konsistensi sesi vs jumlah worker (proses), backend sesi
+"memory" (dict per proses) vs "sqlite" (file WAL bersama).
+
+Tiap worker = proses dengan KencotBot sendiri, seperti worker gunicorn.
+FoodAgent diganti stub (sleep `--llm` detik lalu simpan pesan turn ke store
+sesi), jadi yang diukur routing bot + store sesi. Pesan tiap user dikirim
+per ronde ke worker mana saja yang kosong (seperti load balancer);
+"konsisten" = interaction_count yang dilihat worker sama dengan jumlah
+turn yang sudah dikirim user itu; "sampai agent" = pesan yang benar-benar
+diproses agent (dengan backend memory, worker yang belum kenal sesinya
+membalas greeting lagi, jadi throughput-nya semu).
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_session_workers --users 200 --rounds 3 --workers 1 2 4 8
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+from src.bot.kencot_bot import KencotBot
+from src.memory.session_manager import SessionManager
+from src.memory.session_store import create_session_store
+
+BOT = None
+
+
+def init_worker(backend: str, path: str, llm: float, rounds: int):
+    global BOT
+    logging.disable(logging.WARNING)
+    with patch("src.bot.kencot_bot.FoodAgent"):
+        BOT = KencotBot(max_interactions=rounds + 1)
+    BOT.session = SessionManager(store=create_session_store(backend, path))
+
+    def process(user_id, session_id, text):
+        time.sleep(llm)
+        BOT.session.add_message(session_id, "user", text)
+        BOT.session.add_message(session_id, "bot", "Mamang saranin Soto Ayam.")
+        return {"reasoning": "Mamang saranin Soto Ayam.", "recommendation": {"menu_name": "Soto Ayam"}}
+
+    BOT.agent = MagicMock()
+    BOT.agent.process.side_effect = process
+
+
+def handle(task):
+    user, turn = task
+    text = "halo" if turn == 0 else "mau makan siang murah"
+    response = BOT.handle_user_input(user, f"s-{user}", text)
+    if turn == 0:
+        return None
+    consistent = BOT.session.get_stm(f"s-{user}")["interaction_count"] == turn
+    return consistent, response["phase"] == "recommendation"
+
+
+def run_setup(backend: str, workers: int, args) -> tuple:
+    path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(workers, initializer=init_worker, initargs=(backend, path, args.llm, args.rounds)) as pool:
+        pool.map(time.sleep, [0.01] * workers)  # tunggu semua worker siap
+        start = time.perf_counter()
+        results = []
+        for turn in range(args.rounds + 1):  # ronde 0 = greeting
+            results += pool.map(handle, [(f"u{i}", turn) for i in range(args.users)], chunksize=1)
+        elapsed = time.perf_counter() - start
+    turns = [r for r in results if r is not None]  # ronde greeting tidak dihitung
+    consistent = sum(c for c, _ in turns) / len(turns)
+    reached = sum(r for _, r in turns) / len(turns)
+    return len(results) / elapsed, consistent, reached
+
+
+def run(args):
+    print(f"{args.users} user x {args.rounds + 1} pesan, latency agent {args.llm}s\n")
+    print(f"{'backend':>7} | {'workers':>7} | {'throughput':>11} | {'konsisten':>9} | {'sampai agent':>12}")
+    print("-" * 61)
+    for backend in args.backends:
+        for workers in args.workers:
+            throughput, consistent, reached = run_setup(backend, workers, args)
+            print(f"{backend:>7} | {workers:>7} | {throughput:>7.0f} msg/s | {consistent:>8.0%} | {reached:>11.0%}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"])
+    parser.add_argument("--llm", type=float, default=0.02, help="latency stub FoodAgent.process")
+    args = parser.parse_args()
+    run(args)
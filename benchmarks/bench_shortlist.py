@@ -0,0 +1,87 @@
+"""
+Trade-off ukuran shortlist (DECISION_SHORTLIST_SIZE) vs kualitas kandidat & ukuran prompt.
+
+Query dibangkitkan dari katalog data/database.json:
+- "partial": satu kata khas dari nama menu ("geprek", "soto") -> gold = semua
+  menu yang namanya mengandung kata itu
+- "attribute": tag + budget ("yang pedas 15rb") -> gold = menu dengan tag itu
+  dan harga <= budget
+Recall = |gold ∩ shortlist| / min(|gold|, N). Ukuran prompt = panjang
+build_decision_prompt (token ~ karakter / 4). N = 0 berarti seluruh katalog.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_shortlist --sizes 5 10 15 20 30 0
+"""
+import argparse
+import logging
+import re
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.bot.agent import FoodAgent
+from src.rag.ingest import make_tags
+from src.utils.config import Config
+from src.utils.query_parser import parse_user_query
+
+ATTRIBUTE_TAGS = ["pedas", "berkuah", "sehat", "sayur", "goreng", "ayam", "nasi", "mie"]
+BUDGETS = [12000, 15000, 20000]
+
+
+def make_agent() -> FoodAgent:
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        MockMemory.return_value = MagicMock()
+        return FoodAgent()
+
+
+def build_queries(agent: FoodAgent):
+    menus = agent.food_db.get_all_menus()
+    canteens = {c["canteen_name"]: c for c in agent.food_db.canteens}
+    tags = [set(make_tags(canteens[m["canteen_name"]], {"name": m["menu_name"], **m})) for m in menus]
+
+    queries = []
+    words = {w for m in menus for w in re.findall(r"[a-z]{4,}", m["menu_name"].lower())}
+    for word in sorted(words):
+        gold = {i for i, m in enumerate(menus) if word in m["menu_name"].lower()}
+        if len(gold) < len(menus) // 2:
+            queries.append(("partial", f"pengen {word}", gold))
+    for tag in ATTRIBUTE_TAGS:
+        for budget in BUDGETS:
+            gold = {i for i, m in enumerate(menus) if tag in tags[i] and (m["price"] or 0) <= budget}
+            if gold:
+                queries.append(("attribute", f"yang {tag} {budget // 1000}rb", gold))
+    return menus, queries
+
+
+def run(sizes):
+    agent = make_agent()
+    menus, queries = build_queries(agent)
+    index = {id(m): i for i, m in enumerate(menus)}
+    agent.rag_engine.search("warmup")  # load model embedding di luar pengukuran
+    print(f"Katalog {len(menus)} menu, {len(queries)} query\n")
+    print(f"{'N':>4} | {'recall partial':>14} | {'recall attr':>11} | {'prompt chars':>12} | {'~tokens':>7} | {'ms/query':>8}")
+    print("-" * 74)
+    for size in sizes:
+        recalls = {"partial": [], "attribute": []}
+        chars, elapsed = [], 0.0
+        with patch.object(Config, "DECISION_SHORTLIST_SIZE", size):
+            for kind, text, gold in queries:
+                context = {"stm": [], "ltm": {}, "parsed": parse_user_query(text), "raw_input": text}
+                start = time.perf_counter()
+                shortlist = agent.build_shortlist(text, menus, context)
+                elapsed += time.perf_counter() - start
+                picked = {index[id(m)] for m in shortlist}
+                recalls[kind].append(len(gold & picked) / min(len(gold), len(shortlist)))
+                chars.append(len(agent.build_decision_prompt(text, shortlist, context)))
+        avg_chars = np.mean(chars)
+        print(f"{size or len(menus):>4} | {np.mean(recalls['partial']):>14.3f} | {np.mean(recalls['attribute']):>11.3f} | "
+              f"{avg_chars:>12.0f} | {avg_chars / 4:>7.0f} | {elapsed / len(queries) * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 15, 20, 30, 0])
+    args = parser.parse_args()
+    run(args.sizes)
@@ -0,0 +1,48 @@
+"""
+Benchmark waktu load RetrievalEngine: JSON float-list vs binary store (memmap).
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_store_load --sizes 50 10000 100000
+"""
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_retrieval import make_foods
+from src.rag.retrieval_engine import RetrievalEngine
+from src.rag.vector_store import build_binary_store
+
+
+def load_time(db_path: Path, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        RetrievalEngine(str(db_path))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes):
+    print(f"{'rows':>8} | {'json MB':>8} | {'npy MB':>7} | {'json load (ms)':>14} | {'memmap load (ms)':>16}")
+    print("-" * 68)
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "rag.json"
+            db_path.write_text(json.dumps(make_foods(n), indent=2))
+            json_t = load_time(db_path)
+
+            npy_path, meta_path = build_binary_store(db_path)
+            mmap_t = load_time(db_path)
+            npy_mb = (npy_path.stat().st_size + meta_path.stat().st_size) / 1e6
+            print(f"{n:>8} | {db_path.stat().st_size / 1e6:>8.1f} | {npy_mb:>7.1f} | "
+                  f"{json_t * 1000:>14.1f} | {mmap_t * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 10000, 100000])
+    run(parser.parse_args().sizes)
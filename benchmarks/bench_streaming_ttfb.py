@@ -0,0 +1,117 @@
+"""
+Time-to-first-byte `/handle` vs `/handle/stream` (SSE) di wa_server.
+
+LLM diganti stub lokal: decision & memory update pakai latency tetap, reasoning
+di-stream token demi token (latency token pertama + jeda per token), mirip
+Gemini flash. Request dikirim lewat Flask test client tanpa buffering, jadi
+yang diukur adalah kapan byte pertama body keluar dari server.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_streaming_ttfb --first-token 0.6 --per-token 0.03 --tokens 80
+"""
+import argparse
+import logging
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import wa_server
+from src.bot.kencot_bot import KencotBot
+
+REPLY = (
+    "Halo bestie! Mamang saranin *Soto Ayam* di Kantin Teknik nih 🍜 "
+    "Harganya cuma Rp12.000, pas buat makan siang yang anget-anget. "
+    "Kalorinya sekitar 350 kkal, aman buat yang lagi jaga makan 🔥 "
+    "Kuahnya seger, ayamnya banyak, dan ga ada kacang jadi aman dari alergimu. "
+    "Selamat makan ya, jangan lupa minum air putih! 😋"
+)
+
+
+class StubCompletions:
+    def __init__(self, first_token: float, per_token: float, tokens: int):
+        self.first_token = first_token
+        self.per_token = per_token
+        words = REPLY.split(" ")
+        self.pieces = [(w + " ") for w in (words * (tokens // len(words) + 1))[:tokens]]
+
+    def _delta(self, text):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    def _stream(self):
+        time.sleep(self.first_token)
+        for i, piece in enumerate(self.pieces):
+            if i:
+                time.sleep(self.per_token)
+            yield self._delta(piece)
+
+    def create(self, stream=False, **kwargs):
+        if stream:
+            return self._stream()
+        # tanpa streaming: tunggu semua token selesai di-generate
+        time.sleep(self.first_token + self.per_token * (len(self.pieces) - 1))
+        message = SimpleNamespace(content="".join(self.pieces))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_bot(args) -> KencotBot:
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        memory = MagicMock()
+        memory.get_context.return_value = {"ltm": {}}
+        memory.stm.get_messages.return_value = []
+        MockMemory.return_value = memory
+        bot = KencotBot(max_interactions=10 ** 6)
+    bot.agent.rag_engine.search("warmup")  # load model embedding di luar pengukuran
+
+    def call_llm(prompt):
+        time.sleep(args.decision)
+        if "deteksi preferensi" in prompt:
+            return {"allergies": [], "disliked_foods": []}
+        return {"search_method": "database", "recommendation": "Soto Ayam", "call_nutrition": False}
+
+    bot.agent.call_llm = call_llm
+    bot.agent.decision_cache = None
+    bot.agent.client_gemini = SimpleNamespace(
+        chat=SimpleNamespace(completions=StubCompletions(args.first_token, args.per_token, args.tokens))
+    )
+    return bot
+
+
+def measure(client, path: str, session_id: str):
+    payload = {"user_id": "bench", "session_id": session_id, "text": "mau soto ayam"}
+    start = time.perf_counter()
+    response = client.post(path, json=payload, buffered=False)
+    ttfb = None
+    for chunk in response.response:
+        if chunk and ttfb is None:
+            ttfb = time.perf_counter() - start
+    total = time.perf_counter() - start
+    response.close()
+    return ttfb, total
+
+
+def run(args):
+    wa_server.bot = make_bot(args)
+    client = wa_server.app.test_client()
+    print(f"{'endpoint':>15} | {'TTFB':>7} | {'total':>7}")
+    print("-" * 36)
+    for path in ["/handle", "/handle/stream"]:
+        ttfbs, totals = [], []
+        for turn in range(args.turns):
+            session_id = f"{path}-{turn}"
+            client.post("/handle", json={"user_id": "bench", "session_id": session_id, "text": "halo"})  # greeting
+            ttfb, total = measure(client, path, session_id)
+            ttfbs.append(ttfb)
+            totals.append(total)
+        print(f"{path:>15} | {sum(ttfbs) / len(ttfbs):>6.2f}s | {sum(totals) / len(totals):>6.2f}s")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--decision", type=float, default=0.8, help="latency stub memory update / decision")
+    parser.add_argument("--first-token", type=float, default=0.6)
+    parser.add_argument("--per-token", type=float, default=0.03)
+    parser.add_argument("--tokens", type=int, default=80)
+    parser.add_argument("--turns", type=int, default=3)
+    args = parser.parse_args()
+    run(args)
@@ -0,0 +1,127 @@
+"""
+Server lokal OpenAI-compatible (`POST /v1/chat/completions`) untuk benchmark & test
+router LLM tanpa network. Latency per request: `latency` detik, dengan peluang
+`tail` kena lonjakan `tail_latency` detik; peluang `error_rate` balas HTTP 503.
+`content` boleh berupa callable(body request) -> str, hasilnya dikirim apa adanya
+(tanpa prefix nama provider), misal untuk membalas JSON ke prompt decision.
+
+    with StandInLLM("groq", latency=0.2, tail=0.1, tail_latency=2.0) as server:
+        client = OpenAI(api_key="x", base_url=server.base_url, max_retries=0)
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Union
+
+
+def agent_reply(body: dict) -> str:
+    """
+    `content` untuk pipeline FoodAgent: prompt memory update -> JSON kosong,
+    prompt decision -> menu pertama di daftar menu, selain itu teks reasoning.
+    """
+    prompt = body["messages"][-1]["content"]
+    if "Daftar menu dari database:" in prompt:
+        menus = [line[2:] for line in prompt.split("Daftar menu dari database:")[1].splitlines() if line.startswith("- ")]
+        return json.dumps({"search_method": "database", "recommendation": menus[0] if menus else "Tidak ada rekomendasi",
+                           "call_nutrition": False})
+    if "deteksi preferensi" in prompt:
+        return json.dumps({"disliked_foods": [], "allergies": []})
+    return "Mamang saranin menu ini, enak dan pas di kantong 😋"
+
+
+class StandInLLM:
+    def __init__(
+        self,
+        name: str,
+        latency: float = 0.2,
+        tail: float = 0.0,
+        tail_latency: float = 2.0,
+        error_rate: float = 0.0,
+        content: Union[str, Callable[[dict], str]] = "Mamang saranin Soto Ayam.",
+        seed: int = 0,
+    ):
+        self.name = name
+        self.latency = latency
+        self.tail = tail
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.content = content
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def _next(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.tail_latency if self._rng.random() < self.tail else self.latency
+            failed = self._rng.random() < self.error_rate
+        return delay, failed
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                delay, failed = standin._next()
+                time.sleep(delay)
+                if failed:
+                    payload, status = {"error": {"message": "overloaded", "type": "server_error"}}, 503
+                else:
+                    status = 200
+                    if callable(standin.content):
+                        text = standin.content(body)
+                    else:
+                        text = f"[{standin.name}] {standin.content}"
+                    payload = {
+                        "id": f"{standin.name}-{standin.calls}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", standin.name),
+                        "choices": [{
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": text},
+                        }],
+                    }
+                data = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client sudah pergi (request yang kalah hedge / timeout)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StandInLLM":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler(), bind_and_activate=False)
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 1024  # banyak koneksi bersamaan (benchmark async)
+        self._server.server_bind()
+        self._server.server_activate()
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "StandInLLM":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
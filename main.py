@@ -2,7 +2,7 @@ import logging
 from src.database.connection import db_instance
 from src.utils.config import Config
 from src.bot.kencot_bot import KencotBot
-from src.memory.session_manager import SessionManager
+from src.rag.embeddings import initialize_embedding_cache
 
 logger = logging.getLogger(__name__)
 
@@ -21,16 +21,16 @@ def main():
         # --- Validasi config & inisialisasi DB ---
         Config.validate()
         initialize_database()
-
-        # --- Setup session ---
-        user_id = "user_test"
-        session_id = "sess_1"
-        session_mgr = SessionManager()
-        session_mgr.create_session(session_id, user_id)
+        initialize_embedding_cache()
 
         # --- Inisialisasi Bot ---
         bot = KencotBot()
 
+        # --- Setup session (store STM milik bot, dipakai bersama agent) ---
+        user_id = "user_test"
+        session_id = "sess_1"
+        bot.session.create_session(session_id, user_id)
+
         # --- CLI Loop ---
         print("🤖 KENCOT BOT - CLI Mode (ketik 'exit' untuk keluar)")
         while True:
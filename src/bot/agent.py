@@ -1,10 +1,20 @@
 import logging
+import asyncio
 import json
-from typing import Dict, List
-from openai import OpenAI
-
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Generator, Iterable, Iterator, List, Optional, Tuple
+from openai import AsyncOpenAI, OpenAI
+
+from src.bot.context_encoder import encode_context
+from src.bot.decision_cache import DecisionCache
+from src.bot.llm_client import CircuitBreaker, CircuitOpenError, ResilientLLMClient
+from src.bot.llm_router import LLMRouter, Provider
 from src.utils.query_parser import parse_user_query
 from src.memory.memory_manager import MemoryManager
+from src.memory.session_manager import SessionManager
 from src.utils.nutrition_api import NutritionTool
 from src.utils.config import Config
 from src.database.models.food_db import FoodDB
@@ -14,57 +24,277 @@ from src.utils.nutrition_estimator import NutritionEstimator
 
 logger = logging.getLogger(__name__)
 
+PIPELINE_MODES = ("sequential", "merged", "concurrent")
+DECISION_KEYS = ("search_method", "recommendation", "call_nutrition")
+REASONING_ERROR = "Maaf, reasoning gagal dihasilkan."
+# panjang maksimum satu pesan riwayat yang ditulis ke prompt
+HISTORY_MESSAGE_CHARS = 300
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str):
+    """Catat durasi satu stage (detik) ke dict `timings`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - start, 4)
+
+
+def _timed_call(timings: Dict[str, float], stage: str, fn, *args):
+    with _timed(timings, stage):
+        return fn(*args)
+
+
+# provider -> (atribut Config: api key, base url, model)
+LLM_PROVIDER_SETTINGS = {
+    "gemini": ("GEMINI_API_KEY", "GEMINI_OPENAI_BASE_URL", "GEMINI_MODEL_NAME"),
+    "groq": ("GROQ_API_KEY", "GROQ_BASE_URL", "GROQ_MODEL_NAME"),
+    "openai": ("OPENAI_API_KEY", "OPENAI_BASE_URL", "OPENAI_MODEL_NAME"),
+}
+
+
+def build_llm_providers() -> List[Provider]:
+    """Satu Provider per entri Config.LLM_PROVIDERS yang API key-nya terisi"""
+    providers = []
+    timeouts = {"decision": Config.LLM_TIMEOUT_SECONDS, "reasoning": Config.LLM_REASONING_TIMEOUT_SECONDS}
+    for name in [n.strip().lower() for n in Config.LLM_PROVIDERS.split(",") if n.strip()]:
+        if name not in LLM_PROVIDER_SETTINGS:
+            logger.warning(f"⚠️ Provider LLM '{name}' tidak dikenal, dilewati.")
+            continue
+        key_attr, url_attr, model_attr = LLM_PROVIDER_SETTINGS[name]
+        api_key = getattr(Config, key_attr)
+        if not api_key:
+            continue
+        # retry SDK dimatikan, retry + deadline + circuit breaker diurus ResilientLLMClient
+        base_url = getattr(Config, url_attr)
+        llm = ResilientLLMClient(
+            OpenAI(api_key=api_key, base_url=base_url, max_retries=0),
+            getattr(Config, model_attr),
+            timeouts=timeouts,
+            max_retries=Config.LLM_MAX_RETRIES,
+            backoff=Config.LLM_RETRY_BACKOFF_SECONDS,
+            breaker=CircuitBreaker(Config.LLM_BREAKER_FAILURES, Config.LLM_BREAKER_RESET_SECONDS, name=name),
+            aclient=AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0),
+        )
+        providers.append(Provider(name, llm, window=Config.LLM_ROUTER_WINDOW))
+    return providers
+
+
+# akhir kalimat: tanda baca + spasi ("1. " di list bernomor tidak dihitung), atau newline
+_SENTENCE_END = re.compile(r"(?<=[^\d\s][.!?…])\s+|\n+")
+
+
+def iter_sentences(pieces: Iterable[str], max_chars: int = 240) -> Iterator[str]:
+    """
+    Gabung potongan token streaming jadi potongan seukuran kalimat.
+    Spasi / newline pemisah ikut di akhir potongan, jadi "".join(hasil) = teks asli.
+    Kalimat yang terlalu panjang dipotong di spasi terakhir sebelum `max_chars`.
+    """
+    buffer = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        buffer += piece
+        while True:
+            match = _SENTENCE_END.search(buffer)
+            # pemisah di ujung buffer belum tentu selesai (newline berikutnya bisa masih di jalan)
+            if match and match.end() < len(buffer):
+                cut = match.end()
+            elif len(buffer) > max_chars and " " in buffer[:max_chars]:
+                cut = buffer.rindex(" ", 0, max_chars) + 1
+            else:
+                break
+            sentence, buffer = buffer[:cut], buffer[cut:]
+            if sentence.strip():
+                yield sentence
+    if buffer.strip():
+        yield buffer
+
+
 class FoodAgent:
-    def __init__(self):
-        self.memory = MemoryManager()
+    def __init__(self, pipeline_mode: Optional[str] = None, session: Optional[SessionManager] = None):
+        self.pipeline_mode = pipeline_mode or Config.AGENT_PIPELINE_MODE
+        if self.pipeline_mode not in PIPELINE_MODES:
+            logger.warning(f"⚠️ Pipeline mode '{self.pipeline_mode}' tidak dikenal, pakai 'sequential'.")
+            self.pipeline_mode = "sequential"
+        self.memory = MemoryManager(stm=session)
         self.nutrition_tool = NutritionTool()
         self.food_db = FoodDB()
         self.food_db.load_from_json(Config.DATABASE_PATH)
 
-        self.rag_engine = RetrievalEngine()
-        self.client_gemini = OpenAI(
-            api_key=Config.GEMINI_API_KEY,
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
+        self.rag_engine = RetrievalEngine(
+            use_ann=Config.RAG_USE_ANN,
+            nprobe=Config.RAG_ANN_NPROBE,
+            ann_min_rows=Config.RAG_ANN_MIN_ROWS,
+            ann_pq_m=Config.RAG_ANN_PQ_M,
+            dtype=Config.RAG_EMBEDDING_DTYPE,
+            hybrid=Config.RAG_HYBRID_SEARCH,
+        )
+        self.router = LLMRouter(
+            build_llm_providers(),
+            hedge=Config.LLM_HEDGE_REASONING,
+            hedge_min_samples=Config.LLM_HEDGE_MIN_SAMPLES,
+            hedge_max_workers=Config.LLM_HEDGE_MAX_WORKERS,
+            max_error_rate=Config.LLM_ROUTER_MAX_ERROR_RATE,
         )
-        self.model = "gemini-2.5-flash"
+        self.model = self.llm.model
+        self.decision_cache = DecisionCache(
+            max_entries=Config.DECISION_CACHE_SIZE,
+            ttl_seconds=Config.DECISION_CACHE_TTL_SECONDS,
+            min_similarity=Config.DECISION_CACHE_MIN_SIMILARITY,
+        ) if Config.DECISION_CACHE_ENABLED else None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def llm(self) -> ResilientLLMClient:
+        """Client provider utama (urutan pertama di Config.LLM_PROVIDERS)"""
+        return self.router.primary.llm
+
+    @property
+    def client_gemini(self):
+        """Client OpenAI-compatible mentah provider utama (bisa diganti, mis. di test)"""
+        return self.llm.client
+
+    @client_gemini.setter
+    def client_gemini(self, client):
+        self.llm.client = client
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool untuk stage yang independen (dibuat saat pertama dipakai)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=Config.AGENT_MAX_WORKERS, thread_name_prefix="agent-stage"
+            )
+        return self._executor
 
     # ========================== MAIN ==========================
     def process(self, user_id: str, session_id: str, user_input: str) -> dict:
         logger.info(f"[PROCESS] User {user_id} | Session {session_id} | Input: {user_input}")
+        started = time.perf_counter()
+        turn = self.prepare_turn(user_id, session_id, user_input)
+
+        # --- 6️⃣ Reasoning ke user ---
+        reasoning = _timed_call(turn["timings"], "reasoning", self.call_llm_reasoning, turn["reasoning_prompt"])
+        if reasoning == REASONING_ERROR:
+            reasoning = self.rule_based_reasoning(turn)
+        return self.finish_turn(user_id, session_id, user_input, turn, reasoning, started)
 
-        # --- Parsing query ---
-        parsed = parse_user_query(user_input)
+    def process_stream(self, user_id: str, session_id: str, user_input: str) -> Generator[str, None, dict]:
+        """
+        Sama dengan `process`, tapi reasoning di-yield per kalimat begitu datang dari LLM.
+        Return value generator (StopIteration.value / `yield from`) = dict hasil `process`.
+        Kalau generator ditutup di tengah jalan (client putus), turn tetap dicatat ke
+        STM dengan teks yang sempat terkirim.
+        """
+        logger.info(f"[PROCESS-STREAM] User {user_id} | Session {session_id} | Input: {user_input}")
+        started = time.perf_counter()
+        turn = self.prepare_turn(user_id, session_id, user_input)
+        timings = turn["timings"]
+
+        parts: List[str] = []
+        fallback = self.rule_based_reasoning(turn)
+        try:
+            with _timed(timings, "reasoning"):
+                for chunk in self.call_llm_reasoning_stream(turn["reasoning_prompt"], fallback=fallback):
+                    if not parts:
+                        # waktu sejak turn mulai sampai kalimat pertama siap dikirim
+                        timings["first_chunk"] = round(time.perf_counter() - started, 4)
+                    parts.append(chunk)
+                    yield chunk
+        except GeneratorExit:
+            logger.info(f"[PROCESS-STREAM] Stream session {session_id} ditutup sebelum selesai")
+            self.finish_turn(user_id, session_id, user_input, turn, "".join(parts).strip() or fallback, started)
+            raise
+        reasoning = "".join(parts).strip()
+        return self.finish_turn(user_id, session_id, user_input, turn, reasoning, started)
+
+    def prepare_turn(self, user_id: str, session_id: str, user_input: str) -> dict:
+        """Semua stage sebelum reasoning: parsing, memory update, decision, rekomendasi & nutrisi"""
+        timings: Dict[str, float] = {}
+
+        # --- Parsing query + konteks STM/LTM ---
         context = self.memory.get_context(user_id, session_id)
+        combined_context = self.build_combined_context(session_id, user_input, context)
+
+        menus = self.food_db.get_all_menus()
+        # kandidat untuk prompt; pencocokan rekomendasi tetap ke seluruh katalog
+        with _timed(timings, "shortlist"):
+            shortlist = self.build_shortlist(user_input, menus, combined_context)
+        prefetched: Dict[str, Future] = {}
+        if self.pipeline_mode == "merged":
+            # --- 1️⃣+2️⃣ Memory update & decision dalam satu call terstruktur ---
+            with _timed(timings, "decision"):
+                turn = self.call_llm(self.build_turn_prompt(user_input, shortlist, combined_context))
+            memory_update, llm_decision = self.split_turn(turn)
+            self.apply_memory_update(user_id, memory_update)
+        elif self.pipeline_mode == "concurrent":
+            # --- 1️⃣ & 2️⃣ jalan paralel + prefetch nutrisi kandidat ---
+            llm_decision, prefetched = self.run_concurrent_stages(
+                user_id, user_input, shortlist, combined_context, timings
+            )
+        else:
+            # --- Update memory (deteksi alergi/dislike) ---
+            memory_update_prompt = self.build_memory_update_prompt(user_input, combined_context)
+            memory_update = _timed_call(timings, "memory_update", self.call_llm, memory_update_prompt)
+            self.apply_memory_update(user_id, memory_update)
+
+            # --- 2️⃣ Decision phase ---
+            llm_decision = _timed_call(timings, "decision", self.decide, user_input, shortlist, combined_context)
+
+        # --- 3️⃣ Get final recommendation ---
+        llm_decision, final_recommendation, rag_used = self.settle_decision(
+            user_input, llm_decision, shortlist, menus, combined_context
+        )
 
+        # --- 4️⃣ Tambahkan ke LTM liked_foods otomatis ---
+        food_name = final_recommendation.get("menu_name")
+        if food_name and food_name != "Tidak ada rekomendasi":
+            self.memory.add_liked_food(user_id, food_name)
+            logger.info(f"[LTM] Added to liked_foods: {food_name}")
+
+        # --- 5️⃣ Nutrisi ---
+        nutrition = {}
+        if llm_decision.get("call_nutrition", False) and food_name != "Tidak ada rekomendasi":
+            with _timed(timings, "nutrition"):
+                future = prefetched.get(food_name)
+                nutrition = future.result() if future else self.nutrition_tool.get_nutrition(food_name)
+        for future in prefetched.values():
+            future.cancel()  # prefetch kandidat lain yang belum sempat jalan
+
+        return self.make_turn(
+            user_input, context, combined_context, llm_decision, final_recommendation, nutrition, rag_used, timings
+        )
+
+    def build_combined_context(self, session_id: str, user_input: str, context: Dict) -> Dict:
         # --- Tambahkan konteks STM (riwayat percakapan aktif) ---
         stm_history = self.memory.stm.get_messages(session_id) if hasattr(self.memory, "stm") else []
-        combined_context = {
+        return {
             "stm": stm_history,
             "ltm": context.get("ltm", {}),
-            "parsed": parsed,
+            "parsed": parse_user_query(user_input),
             "raw_input": user_input
         }
 
-        # --- Update memory (deteksi alergi/dislike) ---
-        memory_update_prompt = self.build_memory_update_prompt(user_input, combined_context)
-        memory_update = self.call_llm(memory_update_prompt)
-        self.apply_memory_update(user_id, memory_update)
-
-        # --- 2️⃣ Decision phase ---
-        menus = self.food_db.get_all_menus()
-        decision_prompt = self.build_decision_prompt(user_input, menus, combined_context)
-        llm_decision = self.call_llm(decision_prompt)
-
+    def settle_decision(
+        self, user_input: str, llm_decision, shortlist: List[Dict], menus: List[Dict], combined_context: Dict
+    ) -> Tuple[Dict, Dict, bool]:
+        """Decision final (fallback rule-based kalau LLM gagal) + rekomendasinya. Return (decision, rekomendasi, rag_used)"""
+        if not llm_decision or not isinstance(llm_decision, dict):
+            # LLM gagal / circuit breaker terbuka -> rekomendasi rule-based lokal
+            llm_decision = self.rule_based_decision(user_input, shortlist, combined_context)
+        final_recommendation, rag_used = self.resolve_recommendation(llm_decision, menus)
+        return llm_decision, final_recommendation, rag_used
+
+    def resolve_recommendation(self, llm_decision: Dict, menus: List[Dict]) -> Tuple[Dict, bool]:
+        """Decision LLM -> item menu (database) atau hasil RAG teratas. Return (rekomendasi, rag_used)"""
         decision_type = llm_decision.get("search_method", "")
         recommended_food_name = llm_decision.get("recommendation", "Tidak ada rekomendasi")
-        call_nutrition = llm_decision.get("call_nutrition", False)
-
         logger.debug(f"[DECISION] Type: {decision_type}, Food: {recommended_food_name}")
 
-        # --- 3️⃣ Get final recommendation ---
         final_recommendation = None
         rag_used = False
-
         if decision_type == "database":
             for item in menus:
                 if item["menu_name"].lower() == recommended_food_name.lower():
@@ -76,47 +306,385 @@ class FoodAgent:
             rag_results = self.rag_engine.search(recommended_food_name, top_k=3)
             final_recommendation = rag_results[0] if rag_results else {"name": "Tidak ada rekomendasi"}
 
-        if not final_recommendation:
-            final_recommendation = {"name": "Tidak ada rekomendasi"}
-
-        # --- 4️⃣ Tambahkan ke LTM liked_foods otomatis ---
-        if final_recommendation.get("menu_name") not in ["Tidak ada rekomendasi", None]:
-            food_name = final_recommendation.get("menu_name") 
-            if food_name:
-                self.memory.add_liked_food(user_id, food_name)
-                logger.info(f"[LTM] Added to liked_foods: {food_name}")
-
-        # --- 5️⃣ Nutrisi ---
-        nutrition = {}
-        if call_nutrition and final_recommendation.get("menu_name") != "Tidak ada rekomendasi":
-            nutrition = self.nutrition_tool.get_nutrition(final_recommendation.get("menu_name"))
+        return final_recommendation or {"name": "Tidak ada rekomendasi"}, rag_used
 
+    def make_turn(
+        self, user_input: str, context: Dict, combined_context: Dict, llm_decision: Dict,
+        final_recommendation: Dict, nutrition: Dict, rag_used: bool, timings: Dict[str, float]
+    ) -> dict:
         # hitung kalori fallback
         nutrition["calories"] = self.compute_calories(nutrition)
 
-
-        # --- 6️⃣ Reasoning ke user ---
         reasoning_prompt = self.build_reasoning_prompt(
             user_input, llm_decision, final_recommendation, nutrition, rag_used, combined_context
         )
-        reasoning = self.call_llm_reasoning(reasoning_prompt)
+        return {
+            "context": context,
+            "combined_context": combined_context,
+            "recommendation": final_recommendation,
+            "nutrition": nutrition,
+            "decision_type": llm_decision.get("search_method", ""),
+            "rag_used": rag_used,
+            "reasoning_prompt": reasoning_prompt,
+            "timings": timings,
+        }
 
-        # --- 7️⃣ Update STM (conversation context) ---
+    def finish_turn(self, user_id: str, session_id: str, user_input: str, turn: dict, reasoning: str, started: float) -> dict:
+        # --- 7️⃣ Update STM (conversation context), satu-satunya tempat pesan turn disimpan ---
         self.memory.stm.add_message(session_id, "user", user_input)
         self.memory.stm.add_message(session_id, "bot", reasoning)
 
-        # --- Simpan konteks ke memory ---
-        self.memory.save_context(user_id, session_id, combined_context)
+        food = turn["recommendation"] or {}
+        food_name = food.get("menu_name") or food.get("name")
+        parsed = turn["combined_context"].get("parsed") or {}
+        self.memory.stm.remember(
+            session_id,
+            recommended=food_name if food_name != "Tidak ada rekomendasi" else None,
+            constraints={k: parsed.get(k) for k in ("faculty", "budget", "hunger")},
+        )
 
         # --- Return hasil ---
         return {
-            "recommendation": final_recommendation,
-            "nutrition": nutrition,
+            "recommendation": turn["recommendation"],
+            "nutrition": turn["nutrition"],
             "reasoning": reasoning,
-            "decision_type": decision_type,
-            "tool_used": "FoodDB" if not rag_used else "RAG",
-            "ltm_used": bool(context.get("ltm")),
+            "decision_type": turn["decision_type"],
+            "tool_used": "FoodDB" if not turn["rag_used"] else "RAG",
+            "ltm_used": bool(turn["context"].get("ltm")),
+            "timings": {**turn["timings"], "total": round(time.perf_counter() - started, 4)},
         }
+
+    # ========================== ASYNC ==========================
+    # Pipeline yang sama dengan `process`, tapi semua I/O (LLM, nutrisi, LTM) di-await,
+    # jadi satu event loop bisa melayani banyak percakapan yang sedang menunggu LLM.
+    async def process_async(self, user_id: str, session_id: str, user_input: str) -> dict:
+        logger.info(f"[PROCESS-ASYNC] User {user_id} | Session {session_id} | Input: {user_input}")
+        started = time.perf_counter()
+        turn = await self.prepare_turn_async(user_id, session_id, user_input)
+
+        with _timed(turn["timings"], "reasoning"):
+            reasoning = await self.call_llm_reasoning_async(turn["reasoning_prompt"])
+        if reasoning == REASONING_ERROR:
+            reasoning = self.rule_based_reasoning(turn)
+        # penulisan STM blocking (backend SQLite) -> thread
+        return await asyncio.to_thread(self.finish_turn, user_id, session_id, user_input, turn, reasoning, started)
+
+    async def prepare_turn_async(self, user_id: str, session_id: str, user_input: str) -> dict:
+        timings: Dict[str, float] = {}
+        context = await self.memory.get_context_async(user_id, session_id)
+        # STM (SQLite) & shortlist (embedding/RAG) blocking -> thread, event loop tetap bebas
+        combined_context = await asyncio.to_thread(self.build_combined_context, session_id, user_input, context)
+
+        menus = self.food_db.get_all_menus()
+        with _timed(timings, "shortlist"):
+            shortlist = await asyncio.to_thread(self.build_shortlist, user_input, menus, combined_context)
+        prefetched: Dict[str, asyncio.Task] = {}
+        if self.pipeline_mode == "merged":
+            with _timed(timings, "decision"):
+                turn = await self.call_llm_async(self.build_turn_prompt(user_input, shortlist, combined_context))
+            memory_update, llm_decision = self.split_turn(turn)
+            await self.apply_memory_update_async(user_id, memory_update)
+        elif self.pipeline_mode == "concurrent":
+            prefetched = {
+                name: asyncio.ensure_future(self.nutrition_tool.get_nutrition_async(name))
+                for name in self.likely_candidates(user_input, shortlist)
+            }
+            memory_update, llm_decision = await asyncio.gather(
+                self._timed_async(timings, "memory_update", self.call_llm_async(
+                    self.build_memory_update_prompt(user_input, combined_context)
+                )),
+                self._timed_async(timings, "decision", self.decide_async(user_input, shortlist, combined_context)),
+            )
+            await self.apply_memory_update_async(user_id, memory_update)
+            retry_prompt = self.reconcile_prompt(user_input, shortlist, combined_context, llm_decision, memory_update)
+            if retry_prompt:
+                llm_decision = await self._timed_async(timings, "decision_retry", self.call_llm_async(retry_prompt))
+        else:
+            memory_update = await self._timed_async(timings, "memory_update", self.call_llm_async(
+                self.build_memory_update_prompt(user_input, combined_context)
+            ))
+            await self.apply_memory_update_async(user_id, memory_update)
+            llm_decision = await self._timed_async(
+                timings, "decision", self.decide_async(user_input, shortlist, combined_context)
+            )
+
+        llm_decision, final_recommendation, rag_used = await asyncio.to_thread(
+            self.settle_decision, user_input, llm_decision, shortlist, menus, combined_context
+        )
+        food_name = final_recommendation.get("menu_name")
+        if food_name and food_name != "Tidak ada rekomendasi":
+            await self.memory.add_liked_food_async(user_id, food_name)
+            logger.info(f"[LTM] Added to liked_foods: {food_name}")
+
+        nutrition = {}
+        if llm_decision.get("call_nutrition", False) and food_name != "Tidak ada rekomendasi":
+            with _timed(timings, "nutrition"):
+                task = prefetched.get(food_name)
+                nutrition = await (task if task else self.nutrition_tool.get_nutrition_async(food_name))
+        for task in prefetched.values():
+            task.cancel()
+
+        return self.make_turn(
+            user_input, context, combined_context, llm_decision, final_recommendation, nutrition, rag_used, timings
+        )
+
+    @staticmethod
+    async def _timed_async(timings: Dict[str, float], stage: str, awaitable):
+        with _timed(timings, stage):
+            return await awaitable
+
+    async def apply_memory_update_async(self, user_id: str, update: dict):
+        allergies, disliked = self.memory_update_items(user_id, update)
+        writes = [self.memory.add_allergy_async(user_id, item) for item in allergies]
+        writes += [self.memory.add_disliked_food_async(user_id, food) for food in disliked]
+        if writes:
+            await asyncio.gather(*writes)
+
+    async def decide_async(self, user_input: str, menus: List[Dict], context: Dict) -> dict:
+        # lookup/put cache meng-embed query (blocking) -> thread
+        cached = await asyncio.to_thread(self.cached_decision, user_input, context)
+        if cached is not None:
+            return cached
+        decision = await self.call_llm_async(self.build_decision_prompt(user_input, menus, context))
+        await asyncio.to_thread(self.store_decision, user_input, context, decision)
+        return decision
+
+    async def call_llm_async(self, prompt: str) -> dict:
+        try:
+            response = await self.router.acomplete("decision", [{"role": "user", "content": prompt}], temperature=0.7)
+            return self.parse_json_content(response.choices[0].message.content)
+        except CircuitOpenError as e:
+            logger.warning(f"[LLM] {e}, call dilewati")
+            return {}
+        except Exception as e:
+            logger.error(f"[LLM] Async call error: {e}", exc_info=True)
+            return {}
+
+    async def call_llm_reasoning_async(self, prompt: str) -> str:
+        try:
+            response = await self.router.acomplete(
+                "reasoning", [{"role": "user", "content": prompt}], temperature=0.7, hedge=True
+            )
+            return response.choices[0].message.content.strip()
+        except CircuitOpenError as e:
+            logger.warning(f"[LLM Reasoning] {e}, call dilewati")
+            return REASONING_ERROR
+        except Exception as e:
+            logger.error(f"[LLM Reasoning] Async error: {e}", exc_info=True)
+            return REASONING_ERROR
+
+    # ========================== SHORTLIST ==========================
+    def build_shortlist(self, user_input: str, menus: List[Dict], context: Dict) -> List[Dict]:
+        """
+        Top-N kandidat menu untuk decision prompt (Config.DECISION_SHORTLIST_SIZE, 0 = semua):
+        1. menu yang disebut langsung di input / pesan terakhir
+        2. hasil RAG dengan filter parse_user_query (budget, fakultas, waktu),
+           filter dilonggarkan bertahap kalau hasilnya kurang
+        3. sisa slot diisi menu yang lolos filter
+        Menu yang mengandung alergi / disliked_foods di LTM tidak dimasukkan.
+        """
+        size = Config.DECISION_SHORTLIST_SIZE
+        if size <= 0 or len(menus) <= size:
+            return menus
+
+        excluded = self.excluded_terms(context)
+        by_key = {(m["menu_name"].lower(), str(m.get("canteen_name") or "").lower()): m for m in menus}
+        by_name: Dict[str, Dict] = {}
+        for m in menus:
+            by_name.setdefault(m["menu_name"].lower(), m)
+
+        picked: List[Dict] = []
+        seen = set()
+
+        def add(menu: Optional[Dict]):
+            if menu is None or id(menu) in seen:
+                return
+            name = menu["menu_name"].lower()
+            if any(term in name for term in excluded):
+                return
+            seen.add(id(menu))
+            picked.append(menu)
+
+        # 1️⃣ disebut langsung (termasuk follow-up dari percakapan terakhir)
+        recent = [m.get("content", m.get("message", "")) for m in (context.get("stm") or [])[-2:] if isinstance(m, dict)]
+        mention_text = " ".join([user_input] + [str(r) for r in recent]).lower()
+        for menu in sorted(menus, key=lambda m: len(m["menu_name"]), reverse=True):
+            if menu["menu_name"].lower() in mention_text:
+                add(menu)
+
+        # 2️⃣ similarity + filter, dilonggarkan bertahap
+        parsed = context.get("parsed") or {}
+        filters = {k: parsed.get(k) for k in ("budget", "faculty", "time_period") if parsed.get(k)}
+        relaxed = self.relaxed_filters(filters)
+        for ctx in relaxed:
+            if len(picked) >= size:
+                break
+            results = self.rag_engine.search(
+                user_input, top_k=size * 2, min_score=Config.DECISION_SHORTLIST_MIN_SCORE, context=ctx or None
+            )
+            for r in results:
+                name = str(r.get("name") or "").lower()
+                add(by_key.get((name, str(r.get("canteen") or "").lower())) or by_name.get(name))
+                if len(picked) >= size:
+                    break
+
+        # 3️⃣ padding dengan menu yang lolos filter
+        for ctx in relaxed:
+            for menu in menus:
+                if len(picked) >= size:
+                    break
+                if self.menu_matches(menu, ctx):
+                    add(menu)
+        return picked[:size]
+
+    @staticmethod
+    def excluded_terms(context: Dict) -> List[str]:
+        """Alergi + disliked_foods dari LTM (lowercase)"""
+        ltm = context.get("ltm") or {}
+        return [
+            str(x).lower() for x in list(ltm.get("allergies") or []) + list(ltm.get("disliked_foods") or []) if x
+        ]
+
+    @staticmethod
+    def relaxed_filters(filters: Dict) -> List[Dict]:
+        """Filter lengkap dulu, lalu buang time_period, faculty, terakhir budget"""
+        steps = [dict(filters)]
+        current = dict(filters)
+        for key in ("time_period", "faculty", "budget"):
+            if key in current:
+                current = {k: v for k, v in current.items() if k != key}
+                steps.append(current)
+        if steps[-1]:
+            steps.append({})
+        return steps
+
+    @staticmethod
+    def menu_matches(menu: Dict, filters: Dict) -> bool:
+        budget = filters.get("budget")
+        if budget and (menu.get("price") or 0) > budget:
+            return False
+        faculty = filters.get("faculty")
+        if faculty and faculty not in (menu.get("faculty_proximity") or []):
+            return False
+        period = filters.get("time_period")
+        if period and menu.get("suitability") and period not in menu["suitability"]:
+            return False
+        return True
+
+    # ========================== RULE-BASED FALLBACK ==========================
+    def rule_based_decision(self, user_input: str, menus: List[Dict], context: Dict) -> dict:
+        """
+        Decision tanpa LLM: menu yang disebut user dulu, kalau tidak ada menu pertama
+        yang lolos filter parse_user_query (dilonggarkan bertahap). Alergi & dislike
+        tetap dihindari. Nutrisi tidak dipanggil supaya latency tetap terjaga.
+        """
+        menus = menus or self.food_db.get_all_menus()
+        excluded = self.excluded_terms(context)
+        allowed = [m for m in menus if not any(term in m["menu_name"].lower() for term in excluded)]
+        text = user_input.lower()
+        mentioned = sorted(
+            (m for m in allowed if m["menu_name"].lower() in text), key=lambda m: len(m["menu_name"]), reverse=True
+        )
+
+        choice = mentioned[0] if mentioned else None
+        if choice is None:
+            parsed = context.get("parsed") or parse_user_query(user_input)
+            filters = {k: parsed.get(k) for k in ("budget", "faculty", "time_period") if parsed.get(k)}
+            for ctx in self.relaxed_filters(filters):
+                choice = next((m for m in allowed if self.menu_matches(m, ctx)), None)
+                if choice is not None:
+                    break
+
+        logger.warning(f"[FALLBACK] Decision rule-based: {choice['menu_name'] if choice else '-'}")
+        return {
+            "search_method": "database",
+            "recommendation": choice["menu_name"] if choice else "Tidak ada rekomendasi",
+            "call_nutrition": False,
+        }
+
+    @staticmethod
+    def rule_based_reasoning(turn: dict) -> str:
+        """Balasan template kalau reasoning LLM gagal"""
+        food = turn.get("recommendation") or {}
+        name = food.get("menu_name") or food.get("name")
+        if not name or name == "Tidak ada rekomendasi":
+            return "Waduh, Mamang lagi gangguan nih 😅 Coba tanya lagi sebentar ya!"
+        parts = [f"Mamang lagi agak lemot mikirnya 😅, tapi coba *{name}*"]
+        canteen = food.get("canteen") or food.get("canteen_name")
+        if canteen:
+            parts.append(f" di {canteen} 📍")
+        if food.get("price"):
+            parts.append(f", harganya Rp{food['price']} 💸")
+        calories = (turn.get("nutrition") or {}).get("calories")
+        if calories:
+            parts.append(f", sekitar {round(calories)} kkal 🔥")
+        return "".join(parts) + ". Selamat makan!"
+
+    # ========================== CONCURRENT STAGES ==========================
+    def run_concurrent_stages(
+        self, user_id: str, user_input: str, menus: List[Dict], context: Dict, timings: Dict[str, float]
+    ) -> Tuple[dict, Dict[str, Future]]:
+        """
+        Memory update & decision tidak saling tunggu, jadi dijalankan paralel:
+        decision di thread pemanggil (thread turn ini), memory update & prefetch
+        nutrisi kandidat yang kemungkinan dipilih di executor. Dengan begitu satu
+        turn hanya memakai slot executor untuk stage yang memang independen.
+        Setelah itu direkonsiliasi: kalau rekomendasi bentrok dengan alergi/dislike
+        yang baru terdeteksi di pesan ini, decision diulang dengan LTM terbaru.
+        Return (decision, {nama menu: future nutrisi}).
+        """
+        executor = self.executor
+        memory_future = executor.submit(
+            _timed_call, timings, "memory_update", self.call_llm,
+            self.build_memory_update_prompt(user_input, context)
+        )
+        prefetched = {
+            name: executor.submit(self.nutrition_tool.get_nutrition, name)
+            for name in self.likely_candidates(user_input, menus)
+        }
+
+        decision = _timed_call(timings, "decision", self.decide, user_input, menus, context)
+        memory_update = memory_future.result()
+        self.apply_memory_update(user_id, memory_update)
+
+        retry_prompt = self.reconcile_prompt(user_input, menus, context, decision, memory_update)
+        if retry_prompt:
+            decision = _timed_call(timings, "decision_retry", self.call_llm, retry_prompt)
+        return decision, prefetched
+
+    def reconcile_prompt(
+        self, user_input: str, menus: List[Dict], context: Dict, decision: dict, memory_update: dict
+    ) -> Optional[str]:
+        """Prompt decision ulang (dengan LTM terbaru) kalau decision bentrok dengan memory update; None kalau aman"""
+        if not self.conflicts_with_update(decision, memory_update):
+            return None
+        logger.info(f"[RECONCILE] '{decision.get('recommendation')}' bentrok dengan alergi/dislike baru, decision diulang")
+        ltm = dict(context.get("ltm") or {})
+        for key in ("allergies", "disliked_foods"):
+            ltm[key] = list(ltm.get(key) or []) + list(memory_update.get(key) or [])
+        return self.build_decision_prompt(user_input, menus, {**context, "ltm": ltm})
+
+    def likely_candidates(self, user_input: str, menus: List[Dict]) -> List[str]:
+        """Menu yang namanya disebut langsung di input user (calon kuat rekomendasi)"""
+        text = user_input.lower()
+        names = [m["menu_name"] for m in menus if m.get("menu_name") and m["menu_name"].lower() in text]
+        # nama terpanjang dulu ("nasi goreng seafood" sebelum "nasi goreng")
+        names.sort(key=len, reverse=True)
+        return names[:Config.NUTRITION_PREFETCH_LIMIT]
+
+    @staticmethod
+    def conflicts_with_update(decision: dict, memory_update: dict) -> bool:
+        """True kalau rekomendasi mengandung alergen / makanan yang baru saja di-dislike"""
+        if not isinstance(decision, dict) or not isinstance(memory_update, dict):
+            return False
+        recommendation = str(decision.get("recommendation") or "").lower()
+        if not recommendation:
+            return False
+        terms = list(memory_update.get("allergies") or []) + list(memory_update.get("disliked_foods") or [])
+        return any(
+            term and (str(term).lower() in recommendation or recommendation in str(term).lower())
+            for term in terms
+        )
     
     def compute_calories(self, nutrition: dict) -> float:
         """
@@ -152,12 +720,34 @@ class FoodAgent:
 
 
     # ========================== MEMORY UPDATE ==========================
+    @staticmethod
+    def format_history(context: Dict) -> str:
+        """
+        Riwayat STM untuk prompt: ringkasan sesi + jendela pesan terakhir
+        (sudah dibatasi SessionManager), tiap pesan dipotong `HISTORY_MESSAGE_CHARS`.
+        """
+        lines = []
+        for m in context.get("stm") or []:
+            text = str(m.get("content", m.get("message", "")))
+            if len(text) > HISTORY_MESSAGE_CHARS:
+                text = text[:HISTORY_MESSAGE_CHARS].rstrip() + "…"
+            lines.append(f"{m['role']}: {text}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def prompt_context(context: Dict) -> str:
+        """LTM & parsed query versi ringkas (lihat context_encoder); riwayat STM ditulis terpisah"""
+        return encode_context(context) or "(tidak ada)"
+
     def build_memory_update_prompt(self, user_input: str, context: Dict) -> str:
         return f"""
 Kamu adalah sistem deteksi preferensi makanan user.
 
 User input: "{user_input}"
-Context: {json.dumps(context, ensure_ascii=False, default=str)}
+Percakapan sebelumnya:
+{self.format_history(context) or "(belum ada percakapan sebelumnya)"}
+Context:
+{self.prompt_context(context)}
 
 Tugasmu:
 1. Jika user menyebut makanan yang tidak disukai → masukkan ke "disliked_foods".
@@ -170,28 +760,32 @@ Tugasmu:
 }}
         """
 
-    def apply_memory_update(self, user_id: str, update: dict):
-        """Tambahkan hasil deteksi LLM ke LTM dengan log debugging."""
+    @staticmethod
+    def memory_update_items(user_id: str, update: dict) -> Tuple[List[str], List[str]]:
+        """(alergi, makanan tidak disuka) dari hasil deteksi LLM; kosong kalau formatnya tidak valid"""
         if not isinstance(update, dict):
             logger.warning(f"[MEMORY] Invalid memory update: {update}")
-            return
-
-        allergies = update.get("allergies", [])
-        disliked = update.get("disliked_foods", [])
+            return [], []
 
+        allergies = list(update.get("allergies") or [])
+        disliked = list(update.get("disliked_foods") or [])
         if allergies:
             logger.info(f"[LTM] Adding allergies for {user_id}: {allergies}")
-            for item in allergies:
-                self.memory.add_allergy(user_id, item)
-
         if disliked:
             logger.info(f"[LTM] Adding disliked foods for {user_id}: {disliked}")
-            for food in disliked:
-                self.memory.add_disliked_food(user_id, food)
+        return allergies, disliked
+
+    def apply_memory_update(self, user_id: str, update: dict):
+        """Tambahkan hasil deteksi LLM ke LTM dengan log debugging."""
+        allergies, disliked = self.memory_update_items(user_id, update)
+        for item in allergies:
+            self.memory.add_allergy(user_id, item)
+        for food in disliked:
+            self.memory.add_disliked_food(user_id, food)
 
     # ========================== DECISION & REASONING ==========================
     def build_decision_prompt(self, user_input: str, menus: List[Dict], context: Dict) -> str:
-        stm_text = "\n".join([f"{m['role']}: {m.get('content', m.get('message', ''))}" for m in context.get("stm", [])])
+        stm_text = self.format_history(context)
         menus_text = "\n".join([f"- {m['menu_name']}" for m in menus])
         return f"""
 Kamu adalah asisten makanan cerdas di UGM.
@@ -200,7 +794,8 @@ Percakapan sebelumnya:
 {stm_text if stm_text else "(belum ada percakapan sebelumnya)"}
 
 User query: "{user_input}"
-Context (LTM & parsed query): {json.dumps(context, ensure_ascii=False, default=str)}
+Context (LTM & parsed query):
+{self.prompt_context(context)}
 
 Daftar menu dari database:
 {menus_text}
@@ -221,6 +816,91 @@ Tugasmu:
 }}
         """
 
+    def decide(self, user_input: str, menus: List[Dict], context: Dict) -> dict:
+        """
+        Decision phase lewat semantic cache. Hanya turn pertama user di sesi yang
+        di-cache, karena follow-up ("yang lain dong") bergantung ke percakapan.
+        """
+        cached = self.cached_decision(user_input, context)
+        if cached is not None:
+            return cached
+        decision = self.call_llm(self.build_decision_prompt(user_input, menus, context))
+        self.store_decision(user_input, context, decision)
+        return decision
+
+    @staticmethod
+    def has_prior_user_turns(context: Dict) -> bool:
+        """Ada pesan user sebelumnya di STM? (greeting bot & ringkasan sesi tidak dihitung)"""
+        return any(isinstance(m, dict) and m.get("role") == "user" for m in context.get("stm") or [])
+
+    def decision_cacheable(self, context: Dict) -> bool:
+        return self.decision_cache is not None and not self.has_prior_user_turns(context)
+
+    def cached_decision(self, user_input: str, context: Dict) -> Optional[dict]:
+        if not self.decision_cacheable(context):
+            return None
+        cached = self.decision_cache.get(user_input, context.get("parsed"), context.get("ltm"))
+        if cached is not None:
+            logger.info(f"[DECISION] Cache hit: {cached.get('recommendation')}")
+        return cached
+
+    def store_decision(self, user_input: str, context: Dict, decision: dict):
+        if not self.decision_cacheable(context) or not isinstance(decision, dict):
+            return
+        if decision.get("recommendation") not in (None, "", "Tidak ada rekomendasi"):
+            self.decision_cache.put(user_input, context.get("parsed"), context.get("ltm"), decision)
+
+    def build_turn_prompt(self, user_input: str, menus: List[Dict], context: Dict) -> str:
+        """Prompt mode "merged": deteksi alergi/dislike + keputusan rekomendasi sekaligus"""
+        stm_text = self.format_history(context)
+        menus_text = "\n".join([f"- {m['menu_name']}" for m in menus])
+        return f"""
+Kamu adalah asisten makanan cerdas di UGM.
+
+Percakapan sebelumnya:
+{stm_text if stm_text else "(belum ada percakapan sebelumnya)"}
+
+User query: "{user_input}"
+Context (LTM & parsed query):
+{self.prompt_context(context)}
+
+Daftar menu dari database:
+{menus_text}
+
+Tugasmu:
+1. Jika user menyebut makanan yang tidak disukai → masukkan ke "disliked_foods".
+2. Jika user menyebut alergi terhadap makanan/bahan tertentu → masukkan ke "allergies".
+   Jika tidak ada, kosongkan array-nya.
+3. Gunakan konteks percakapan sebelumnya (STM) dan preferensi user (LTM).
+4. Jika makanan yang diminta user ada di daftar menu, gunakan:
+   "search_method": "database"
+5. Jika tidak ada → gunakan:
+   "search_method": "rag" dan berikan nama makanan yang paling mirip.
+6. Jangan rekomendasikan makanan yang mengandung alergi / disliked_foods user,
+   termasuk yang baru kamu deteksi dari pesan ini.
+7. Jika kamu memilih menu valid (bukan "Tidak ada rekomendasi"), tuliskan **selalu** "call_nutrition": true.
+8. Output dalam JSON valid:
+{{
+  "disliked_foods": ["<nama makanan>"],
+  "allergies": ["<alergen>"],
+  "search_method": "database" atau "rag",
+  "recommendation": "<nama makanan>",
+  "call_nutrition": true
+}}
+        """
+
+    @staticmethod
+    def split_turn(turn: dict) -> Tuple[dict, dict]:
+        """Pisah output mode "merged" jadi (memory_update, decision) dengan format yang sama seperti mode sequential"""
+        if not isinstance(turn, dict):
+            return {}, {}
+        memory_update = {
+            "disliked_foods": turn.get("disliked_foods") or [],
+            "allergies": turn.get("allergies") or [],
+        }
+        decision = {k: turn[k] for k in DECISION_KEYS if k in turn}
+        return memory_update, decision
+
     def build_reasoning_prompt(self, user_input: str, decision: Dict, food: Dict, nutrition: Dict, rag_used: bool, context: Dict) -> str:
         food_name = food.get("name") or food.get("menu_name") or "Tidak ada rekomendasi"
         canteen = food.get("canteen") or food.get("canteen_name", "Tidak diketahui")
@@ -229,10 +909,7 @@ Tugasmu:
         maps_link = food.get("gmaps_link") or "Tidak tersedia"
         method = "RAG retrieval" if rag_used else "database.json"
 
-        stm_text = "\n".join([f"{m['role']}: {m.get('content', m.get('message', ''))}" for m in context.get("stm", [])])
-        liked_foods = context.get("ltm", {}).get("liked_foods", [])
-        allergies = context.get("ltm", {}).get("allergies", [])
-        disliked_foods = context.get("ltm", {}).get("disliked_foods", [])
+        stm_text = self.format_history(context)
 
         return f"""
 User query: "{user_input}"
@@ -251,15 +928,14 @@ Nutrition info: {nutrition if nutrition else 'Tidak ada data nutrisi'}
 Dari percakapan sebelumnya:
 {stm_text if stm_text else "(belum ada percakapan sebelumnya)"}
 
-Liked foods user: {liked_foods}
-Allergies user: {allergies}
-Disliked foods user: {disliked_foods}
+Preferensi user & query:
+{self.prompt_context(context)}
 
 Tugas:
 1. Jelaskan kenapa makanan itu cocok direkomendasikan berdasarkan konteks dan preferensi user misal ada di makanan kesukaannya.
 2. Jika hasil dari RAG, beri tahu user bahwa itu hasil pencarian mirip.
 3. Jika user bertanya "ingat ga tadi aku dapet rekomendasi makanan apa aja", sebutkan semua makanan yang sudah direkomendasikan sebelumnya dari STM.
-4. Sertakan alasan kenapa makanan itu cocok berdasarkan liked_foods, allergies, dan disliked_foods.
+4. Sertakan alasan kenapa makanan itu cocok berdasarkan preferensi user (suka, alergi, tidak suka).
 5. Gunakan gaya ramah dan natural tanpa format JSON.
 6. Jika ada kata-kata yang ingin dibold (ditebalkan), return hanya dengan bintang satu * * bukan ** **
 7. Sebut dirimu sebagai Mamang, kasih emoji untuk memberikan detail makanan dan kalori supaya menarik, untuk protein tidak perlu disebutkan  
@@ -268,37 +944,63 @@ Tugas:
     # ========================== LLM CALLS ==========================
     def call_llm(self, prompt: str) -> dict:
         try:
-            response = self.client_gemini.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7
-            )
-
-            raw = response.choices[0].message.content
-            if not raw:
-                return {}
+            response = self.router.complete("decision", [{"role": "user", "content": prompt}], temperature=0.7)
 
-            raw = raw.strip()
-            if raw.startswith("```json"):
-                raw = raw[7:-3].strip()
-            elif raw.startswith("```"):
-                raw = raw[3:-3].strip()
-
-            return json.loads(raw)
+            return self.parse_json_content(response.choices[0].message.content)
+        except CircuitOpenError as e:
+            logger.warning(f"[LLM] {e}, call dilewati")
+            return {}
         except Exception as e:
             logger.error(f"[LLM] Call error: {e}", exc_info=True)
             return {}
 
+    @staticmethod
+    def parse_json_content(raw: Optional[str]) -> dict:
+        """Isi jawaban LLM -> dict (blok ```json dibuang). Raise kalau bukan JSON"""
+        if not raw:
+            return {}
+
+        raw = raw.strip()
+        if raw.startswith("```json"):
+            raw = raw[7:-3].strip()
+        elif raw.startswith("```"):
+            raw = raw[3:-3].strip()
+
+        return json.loads(raw)
+
     def call_llm_reasoning(self, prompt: str) -> str:
         try:
-            response = self.client_gemini.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7
+            response = self.router.complete(
+                "reasoning", [{"role": "user", "content": prompt}], temperature=0.7, hedge=True
             )
             return response.choices[0].message.content.strip()
+        except CircuitOpenError as e:
+            logger.warning(f"[LLM Reasoning] {e}, call dilewati")
+            return REASONING_ERROR
         except Exception as e:
             logger.error(f"[LLM Reasoning] Error: {e}", exc_info=True)
-            return "Maaf, reasoning gagal dihasilkan."
+            return REASONING_ERROR
+
+    def call_llm_reasoning_stream(self, prompt: str, fallback: Optional[str] = None) -> Iterator[str]:
+        """Reasoning dengan `stream=True`, di-yield per kalimat. `fallback` dikirim kalau gagal sebelum ada output"""
+        sent_any = False
+        try:
+            stream = self.router.complete(
+                "reasoning", [{"role": "user", "content": prompt}], temperature=0.7, stream=True
+            )
+            deltas = (
+                chunk.choices[0].delta.content or ""
+                for chunk in stream
+                if chunk.choices
+            )
+            for sentence in iter_sentences(deltas):
+                sent_any = True
+                yield sentence
+        except CircuitOpenError as e:
+            logger.warning(f"[LLM Reasoning Stream] {e}, call dilewati")
+        except Exception as e:
+            logger.error(f"[LLM Reasoning Stream] Error: {e}", exc_info=True)
+        if not sent_any:
+            yield fallback or REASONING_ERROR
         
 
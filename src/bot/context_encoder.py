@@ -0,0 +1,78 @@
+"""
+Encoder context untuk prompt LLM.
+
+Dulu tiap prompt builder menulis `json.dumps(combined_context)`: riwayat STM
+ikut ter-serialize (padahal sudah ditulis sebagai teks), slot parsed yang
+`None`, datetime, dan list LTM yang terus tumbuh. Encoder ini menulis versi
+ringkas satu baris per slot, hanya slot yang terisi:
+
+    alergi: kacang, udang
+    tidak suka: pare
+    suka: ayam geprek, soto ayam
+    budget: 15000 | fakultas: teknik | waktu: siang
+
+Riwayat percakapan TIDAK ikut di sini (ditulis sekali oleh `format_history`).
+Hasil encode di-memoize per isi context, jadi tiga prompt dalam satu turn
+(memory update, decision, reasoning) hanya meng-encode sekali.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+
+# (key LTM, label, batas jumlah item). Alergi/dislike dibatasi longgar karena
+# dipakai untuk eksklusi; liked_foods cukup yang terbaru.
+LTM_SLOTS = (
+    ("allergies", "alergi", 30),
+    ("disliked_foods", "tidak suka", 30),
+    ("liked_foods", "suka", 10),
+)
+PARSED_SLOTS = (
+    ("budget", "budget"),
+    ("faculty", "fakultas"),
+    ("hunger", "lapar"),
+    ("time_period", "waktu"),
+)
+
+
+def _dedup(items: Iterable, limit: int) -> Tuple[str, ...]:
+    """Unik (case-insensitive), ambil `limit` item terbaru, lalu urutkan"""
+    seen: Dict[str, str] = {}
+    for item in items or []:
+        text = str(item).strip()
+        if text:
+            seen.pop(text.lower(), None)  # kemunculan terakhir = paling baru
+            seen[text.lower()] = text
+    latest = list(seen.values())[-limit:]
+    return tuple(sorted(latest, key=str.lower))
+
+
+def context_key(context: Dict) -> Tuple:
+    """Bentuk hashable dari bagian context yang di-encode (kunci memoize)"""
+    ltm = context.get("ltm") or {}
+    parsed = context.get("parsed") or {}
+    return (
+        tuple(_dedup(ltm.get(key), limit) for key, _, limit in LTM_SLOTS),
+        tuple(parsed.get(key) for key, _ in PARSED_SLOTS),
+    )
+
+
+@lru_cache(maxsize=256)
+def _encode(key: Tuple) -> str:
+    ltm_values, parsed_values = key
+    lines = [
+        f"{label}: {', '.join(values)}"
+        for (_, label, _), values in zip(LTM_SLOTS, ltm_values)
+        if values
+    ]
+    query = [
+        f"{label}: {value}"
+        for (_, label), value in zip(PARSED_SLOTS, parsed_values)
+        if value not in (None, "", [])
+    ]
+    if query:
+        lines.append(" | ".join(query))
+    return "\n".join(lines)
+
+
+def encode_context(context: Dict) -> str:
+    """Context (LTM + parsed query) -> teks ringkas untuk prompt; string kosong kalau tidak ada isinya"""
+    return _encode(context_key(context))
@@ -0,0 +1,142 @@
+"""
+Semantic cache untuk hasil decision LLM (`FoodAgent.call_llm` di decision phase).
+
+Banyak mahasiswa nanya hal yang hampir sama dalam beberapa menit
+("makan murah deket teknik siang ini"). Decision-nya disimpan per bucket:
+- slot hasil parse_user_query (faculty, budget, hunger, time_period)
+- hash eksklusi LTM (allergies + disliked_foods), supaya user dengan
+  alergi berbeda tidak dapat jawaban yang sama
+Di dalam bucket, query dicocokkan lewat cosine similarity embedding-nya.
+Entri punya TTL dan total entri dibatasi (LRU).
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.rag.embeddings import get_embedding
+
+SLOT_KEYS = ("faculty", "budget", "hunger", "time_period")
+
+
+def exclusions_hash(ltm: Optional[Dict]) -> str:
+    """Hash alergi + disliked_foods (urutan & huruf besar diabaikan)"""
+    ltm = ltm or {}
+    terms = sorted({
+        str(x).strip().lower()
+        for x in list(ltm.get("allergies") or []) + list(ltm.get("disliked_foods") or [])
+        if x
+    })
+    return hashlib.sha1("\n".join(terms).encode("utf-8")).hexdigest()[:12]
+
+
+def bucket_key(parsed: Optional[Dict], ltm: Optional[Dict]) -> Tuple:
+    parsed = parsed or {}
+    return tuple(parsed.get(k) for k in SLOT_KEYS) + (exclusions_hash(ltm),)
+
+
+class DecisionCache:
+    """LRU + TTL cache decision, lookup per bucket dengan similarity embedding"""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 600,
+        min_similarity: float = 0.92,
+        embed: Optional[Callable[[str], List[float]]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self.embed = embed
+        # entry id -> (bucket, vektor ternormalisasi, decision, stored_at)
+        self._entries: "OrderedDict[int, Tuple[Tuple, np.ndarray, Dict, float]]" = OrderedDict()
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._ids = count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _vector(self, query: str) -> Optional[np.ndarray]:
+        emb = (self.embed or get_embedding)(query)
+        if emb is None:
+            return None
+        vec = np.asarray(emb, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else None
+
+    def _drop(self, entry_id: int):
+        bucket = self._entries.pop(entry_id)[0]
+        ids = self._buckets.get(bucket)
+        if ids is not None:
+            ids.remove(entry_id)
+            if not ids:
+                del self._buckets[bucket]
+
+    def get(self, query: str, parsed: Optional[Dict], ltm: Optional[Dict]) -> Optional[Dict]:
+        """Decision tersimpan untuk query yang mirip di bucket yang sama, atau None"""
+        bucket = bucket_key(parsed, ltm)
+        with self._lock:
+            has_bucket = bool(self._buckets.get(bucket))
+        vec = self._vector(query) if has_bucket else None
+
+        now = time.time()
+        with self._lock:
+            best_id, best_sim = None, self.min_similarity
+            for entry_id in list(self._buckets.get(bucket, [])):
+                _, entry_vec, _, stored_at = self._entries[entry_id]
+                if now - stored_at > self.ttl_seconds:
+                    self._drop(entry_id)
+                    self.expirations += 1
+                    continue
+                if vec is not None and entry_vec.shape == vec.shape:
+                    sim = float(entry_vec @ vec)
+                    if sim >= best_sim:
+                        best_id, best_sim = entry_id, sim
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return dict(self._entries[best_id][2])
+
+    def put(self, query: str, parsed: Optional[Dict], ltm: Optional[Dict], decision: Dict):
+        vec = self._vector(query)
+        if vec is None:
+            return
+        bucket = bucket_key(parsed, ltm)
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (bucket, vec, dict(decision), time.time())
+            self._buckets.setdefault(bucket, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "buckets": len(self._buckets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -1,8 +1,9 @@
+import asyncio
 import logging
 import json
 import random
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any
+from typing import Any, Dict, Generator, Optional
 
 from src.bot.agent import FoodAgent
 from src.memory.session_manager import SessionManager
@@ -12,8 +13,9 @@ logging.basicConfig(level=logging.INFO)
 
 class KencotBot:
     def __init__(self, max_interactions: int = 3, cooldown_minutes: int = 10):
-        self.agent = FoodAgent()
+        # satu store STM dipakai bersama bot (phase, cooldown) & agent (riwayat percakapan)
         self.session = SessionManager()
+        self.agent = FoodAgent(session=self.session)
         self.max_interactions = max_interactions
         self.cooldown_delta = timedelta(minutes=cooldown_minutes)
         self.greetings = [
@@ -27,6 +29,48 @@ class KencotBot:
 
 
     def handle_user_input(self, user_id: str, session_id: str, text: str) -> Dict[str, Any]:
+        response = self._route(user_id, session_id, text)
+        if response is not None:
+            return response
+        return self._handle_recommendation(user_id, session_id, text)
+
+    def handle_user_input_stream(self, user_id: str, session_id: str, text: str) -> Generator[str, None, Dict[str, Any]]:
+        """
+        Versi streaming `handle_user_input`: yield potongan teks balasan.
+        Return value generator = dict response yang sama dengan `handle_user_input`.
+        """
+        response = self._route(user_id, session_id, text)
+        if response is not None:
+            yield response["response"]
+            return response
+
+        limited = self._check_limit(session_id)
+        if limited is not None:
+            yield limited["response"]
+            return limited
+        try:
+            result = yield from self.agent.process_stream(user_id, session_id, text)
+        except GeneratorExit:
+            # client putus: agent sudah mencatat turn-nya, kuota interaksi tetap dihitung
+            self._finish_recommendation(session_id, text, {})
+            raise
+        return self._finish_recommendation(session_id, text, result)
+
+    async def handle_user_input_async(self, user_id: str, session_id: str, text: str) -> Dict[str, Any]:
+        """Versi async `handle_user_input` (routing sama, pipeline agent di-await).
+        Routing & limit menyentuh SessionManager (SQLite) -> dijalankan di thread"""
+        response = await asyncio.to_thread(self._route, user_id, session_id, text)
+        if response is not None:
+            return response
+
+        limited = await asyncio.to_thread(self._check_limit, session_id)
+        if limited is not None:
+            return limited
+        result = await self.agent.process_async(user_id, session_id, text)
+        return await asyncio.to_thread(self._finish_recommendation, session_id, text, result)
+
+    def _route(self, user_id: str, session_id: str, text: str) -> Optional[Dict[str, Any]]:
+        """Session, cooldown, reset & fase greetings. None = lanjut ke fase recommendation"""
         stm = self.session.get_stm(session_id)
         if not stm:
             self.session.create_session(session_id, user_id)
@@ -61,7 +105,7 @@ class KencotBot:
         if phase == "greetings":
             return self._handle_greetings(user_id, session_id)
         elif phase == "recommendation":
-            return self._handle_recommendation(user_id, session_id, text)
+            return None
         else:
             stm["phase"] = "greetings"
             return self._handle_greetings(user_id, session_id)
@@ -76,25 +120,30 @@ class KencotBot:
 
     # === RECOMMENDATION PHASE ===
     def _handle_recommendation(self, user_id: str, session_id: str, text: str) -> Dict[str, Any]:
-        stm = self.session.get_stm(session_id)
-        count = stm.get("interaction_count", 0)
+        limited = self._check_limit(session_id)
+        if limited is not None:
+            return limited
+
+        # Proses ke FoodAgent
+        result = self.agent.process(user_id, session_id, text)
+        return self._finish_recommendation(session_id, text, result)
 
-        # Limit interaksi
-        if count >= self.max_interactions:
+    def _check_limit(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Limit interaksi: kalau habis, masuk cooldown"""
+        stm = self.session.get_stm(session_id)
+        if stm.get("interaction_count", 0) >= self.max_interactions:
             stm["phase"] = "cooldown"
             stm["cooldown_until"] = datetime.now(timezone.utc) + self.cooldown_delta
             msg = f"Token kamu habis. Coba lagi {int(self.cooldown_delta.total_seconds()//60)} menit lagi ya 🕒"
             return {"response": msg, "phase": "cooldown"}
+        return None
 
-        # Proses ke FoodAgent
-        result = self.agent.process(user_id, session_id, text)
-        stm["interaction_count"] = count + 1
-        stm["phase"] = "recommendation"  # tetap di recommendation
-
-        # Simpan context percakapan
-        self.session.add_message(session_id, "user", text)
-        self.session.add_message(session_id, "bot", result.get("reasoning", ""))
+    def _finish_recommendation(self, session_id: str, text: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        # counter lewat satu mutate atomik (worker lain bisa menulis sesi yang sama)
+        self.session.increment(session_id, "interaction_count")
+        self.session.get_stm(session_id)["phase"] = "recommendation"  # tetap di recommendation
 
+        # pesan user & bot sudah disimpan FoodAgent ke store STM yang sama
         return {
             "response": result.get("reasoning", ""),
             "metadata": {
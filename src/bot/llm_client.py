@@ -0,0 +1,197 @@
+"""
+Wrapper client LLM (OpenAI-compatible) dengan:
+- deadline per stage: total waktu satu call termasuk semua retry
+- retry terbatas + backoff eksponensial dengan jitter, hanya untuk error
+  sementara (timeout, koneksi, 429, 5xx)
+- circuit breaker: setelah N kegagalan beruntun, call langsung ditolak
+  (CircuitOpenError) selama `reset_timeout` detik, lalu satu call percobaan
+  (half-open) menentukan breaker tertutup lagi atau tetap terbuka
+
+Client OpenAI di bawahnya sebaiknya dibuat dengan `max_retries=0`, supaya
+retry bawaan SDK tidak menumpuk dengan retry di sini. `aclient` (AsyncOpenAI,
+opsional) dipakai oleh `acomplete` dengan aturan deadline/retry/breaker yang sama.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Breaker sedang terbuka, call ke provider tidak dicoba"""
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, name: str = "llm"):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if now - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """True kalau call boleh dicoba. Saat half-open hanya satu call percobaan yang lolos"""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"✅ Circuit breaker '{self.name}' tertutup lagi")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release(self):
+        """Call selesai tanpa info kesehatan provider (mis. 400), lepas slot percobaan half-open"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    logger.warning(f"⚠️ Circuit breaker '{self.name}' terbuka ({self._failures} gagal beruntun)")
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class ResilientLLMClient:
+    """Chat completion dengan deadline per stage, retry + jitter, dan circuit breaker"""
+
+    def __init__(
+        self,
+        client,
+        model: str,
+        timeouts: Optional[Dict[str, float]] = None,
+        max_retries: int = 2,
+        backoff: float = 0.25,
+        breaker: Optional[CircuitBreaker] = None,
+        aclient=None,
+    ):
+        self.client = client
+        self.aclient = aclient
+        self.model = model
+        self.timeouts = timeouts or {}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+    def complete(self, stage: str, messages: List[Dict], temperature: float = 0.7, stream: bool = False):
+        """
+        Satu chat completion untuk `stage` ("decision", "reasoning", ...).
+        Raise CircuitOpenError kalau breaker terbuka, TimeoutError kalau deadline
+        stage habis, atau error terakhir dari provider.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit breaker '{self.breaker.name}' terbuka")
+
+        budget = self.timeouts.get(stage, 30.0)
+        deadline = time.monotonic() + budget
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.breaker.record_failure()
+                raise TimeoutError(f"Deadline stage '{stage}' ({budget}s) habis")
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    stream=stream,
+                    timeout=remaining,
+                )
+            except RETRYABLE_ERRORS as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+                # full jitter: 0 .. backoff * 2^attempt, tidak melewati deadline
+                delay = min(random.uniform(0, self.backoff * 2 ** attempt), max(0.0, deadline - time.monotonic()))
+                logger.warning(f"🔄 [LLM] {stage} gagal ({type(e).__name__}), retry {attempt}/{self.max_retries} dalam {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            except Exception:
+                # 4xx / error lain: provider hidup, retry tidak akan membantu
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return response
+
+    async def acomplete(self, stage: str, messages: List[Dict], temperature: float = 0.7, stream: bool = False):
+        """Versi async `complete` lewat `aclient`; backoff pakai asyncio.sleep"""
+        if self.aclient is None:
+            raise RuntimeError("ResilientLLMClient tidak punya async client")
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit breaker '{self.breaker.name}' terbuka")
+
+        budget = self.timeouts.get(stage, 30.0)
+        deadline = time.monotonic() + budget
+        attempt = 0
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.breaker.record_failure()
+                    raise TimeoutError(f"Deadline stage '{stage}' ({budget}s) habis")
+                try:
+                    response = await self.aclient.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=temperature,
+                        stream=stream,
+                        timeout=remaining,
+                    )
+                except RETRYABLE_ERRORS as e:
+                    attempt += 1
+                    if attempt > self.max_retries:
+                        self.breaker.record_failure()
+                        raise
+                    delay = min(random.uniform(0, self.backoff * 2 ** attempt), max(0.0, deadline - time.monotonic()))
+                    logger.warning(f"🔄 [LLM] {stage} gagal ({type(e).__name__}), retry {attempt}/{self.max_retries} dalam {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                self.breaker.record_success()
+                return response
+        except BaseException:
+            # 4xx, atau CancelledError (mis. kalah hedge / client putus): tanpa info kesehatan
+            # provider, tapi slot percobaan half-open harus dilepas
+            self.breaker.release()
+            raise
@@ -0,0 +1,254 @@
+"""
+Router multi-provider LLM (Gemini / Groq / OpenAI, semua OpenAI-compatible).
+
+Tiap provider punya statistik bergulir (N call terakhir): latency p50/p90 dan
+error rate. Tiap call dikirim ke provider sehat yang paling cepat (provider
+yang belum punya data dicoba dulu supaya latency-nya terukur); kalau gagal,
+pindah ke provider berikutnya.
+
+Hedging (opsional, untuk call non-streaming yang ditunggu user): kalau
+provider utama belum menjawab sampai p90 latency-nya, provider kedua ikut
+dipanggil, dan jawaban pertama yang berhasil yang dipakai. Versi async memakai
+asyncio task (yang kalah di-cancel), versi sync memakai thread pool.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.bot.llm_client import CircuitBreaker, CircuitOpenError, ResilientLLMClient
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderStats:
+    """
+    Latency (call sukses) & error rate dari `window` call terakhir. Sampel lebih
+    tua dari `max_age` detik diabaikan, jadi provider yang sempat error (dan
+    karena itu tidak dapat traffic) pelan-pelan dianggap belum terukur lagi.
+    """
+
+    def __init__(self, window: int = 50, max_age: float = 300.0):
+        self.max_age = max_age
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+
+    def _recent(self) -> List[Tuple[float, bool]]:
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            return [(lat, ok) for at, lat, ok in self._samples if at >= cutoff]
+
+    def __len__(self) -> int:
+        return len(self._recent())
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """Persentil latency call sukses; None kalau sampelnya kurang dari `min_samples`"""
+        latencies = [lat for lat, ok in self._recent() if ok]
+        return float(np.percentile(latencies, q)) if len(latencies) >= max(1, min_samples) else None
+
+    @property
+    def error_rate(self) -> float:
+        samples = self._recent()
+        if not samples:
+            return 0.0
+        return sum(1 for _, ok in samples if not ok) / len(samples)
+
+    def snapshot(self) -> Dict:
+        return {
+            "calls": len(self),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "error_rate": self.error_rate,
+        }
+
+
+class Provider:
+    # error rate / latency baru dinilai setelah sekian call, supaya satu error atau
+    # satu latency ekor di awal tidak langsung mengucilkan provider
+    MIN_SAMPLES_FOR_ERROR_RATE = 5
+    MIN_SAMPLES_FOR_LATENCY = 3
+
+    def __init__(self, name: str, llm: ResilientLLMClient, window: int = 50):
+        self.name = name
+        self.llm = llm
+        self.stats = ProviderStats(window)
+
+    def healthy(self, max_error_rate: float) -> bool:
+        if self.llm.breaker.state == CircuitBreaker.OPEN:
+            return False
+        return len(self.stats) < self.MIN_SAMPLES_FOR_ERROR_RATE or self.stats.error_rate <= max_error_rate
+
+    def complete(self, stage: str, messages: List[Dict], temperature: float, stream: bool):
+        start = time.perf_counter()
+        try:
+            response = self.llm.complete(stage, messages, temperature=temperature, stream=stream)
+        except CircuitOpenError:
+            raise  # tidak ada request keluar, tidak dihitung
+        except Exception:
+            self.stats.record(time.perf_counter() - start, False)
+            raise
+        self.stats.record(time.perf_counter() - start, True)
+        return response
+
+    async def acomplete(self, stage: str, messages: List[Dict], temperature: float, stream: bool):
+        start = time.perf_counter()
+        try:
+            response = await self.llm.acomplete(stage, messages, temperature=temperature, stream=stream)
+        except CircuitOpenError:
+            raise
+        except Exception:
+            self.stats.record(time.perf_counter() - start, False)
+            raise
+        self.stats.record(time.perf_counter() - start, True)
+        return response
+
+
+class LLMRouter:
+    def __init__(
+        self,
+        providers: List[Provider],
+        hedge: bool = False,
+        hedge_min_samples: int = 10,
+        max_error_rate: float = 0.5,
+        hedge_max_workers: int = 8,
+    ):
+        if not providers:
+            raise ValueError("LLMRouter butuh minimal satu provider")
+        self.providers = providers
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.max_error_rate = max_error_rate
+        self.hedge_max_workers = hedge_max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def primary(self) -> Provider:
+        return self.providers[0]
+
+    def get(self, name: str) -> Optional[Provider]:
+        return next((p for p in self.providers if p.name == name), None)
+
+    def ranked(self) -> List[Provider]:
+        """Provider sehat dulu; di antaranya yang belum terukur, lalu p50 tercepat"""
+        def key(item):
+            order, provider = item
+            p50 = provider.stats.percentile(50, Provider.MIN_SAMPLES_FOR_LATENCY)
+            return (not provider.healthy(self.max_error_rate), p50 is not None, p50 or 0.0, order)
+        return [p for _, p in sorted(enumerate(self.providers), key=key)]
+
+    def complete(self, stage: str, messages: List[Dict], temperature: float = 0.7, stream: bool = False, hedge: bool = False):
+        """Call ke provider terbaik, fallback ke provider berikutnya kalau gagal"""
+        candidates = self.ranked()
+        if hedge and self.hedge and not stream and len(candidates) > 1:
+            return self._complete_hedged(stage, messages, temperature, candidates)
+
+        last_error: Optional[Exception] = None
+        for provider in candidates:
+            try:
+                return provider.complete(stage, messages, temperature, stream)
+            except Exception as e:
+                if not isinstance(e, CircuitOpenError):
+                    logger.warning(f"⚠️ [ROUTER] {provider.name} gagal untuk {stage}: {e}")
+                last_error = e
+        raise last_error
+
+    def _complete_hedged(self, stage: str, messages: List[Dict], temperature: float, candidates: List[Provider]):
+        """
+        Primary dikirim ke pool dan ditunggu sampai p90-nya; kalau belum selesai,
+        backup ikut dikirim dan jawaban sukses yang duluan selesai yang dipakai.
+        Call sync tidak bisa dibatalkan, jadi yang kalah tetap jalan di pool dan
+        hasilnya dibuang. Provider sisanya lewat jalur failover biasa.
+        """
+        first, backup = candidates[0], candidates[1]
+        delay = first.stats.percentile(90) if len(first.stats) >= self.hedge_min_samples else None
+        if delay is None:
+            return self.complete(stage, messages, temperature)
+
+        pool = self._hedge_executor()
+        pending: Dict[Future, Provider] = {pool.submit(first.complete, stage, messages, temperature, False): first}
+        done, _ = wait(pending, timeout=delay)
+        if not done:
+            logger.info(f"🔄 [ROUTER] {first.name} lewat p90 ({delay:.2f}s), hedge ke {backup.name}")
+            pending[pool.submit(backup.complete, stage, messages, temperature, False)] = backup
+
+        last_error: Optional[Exception] = None
+        for future in as_completed(pending):
+            try:
+                return future.result()
+            except Exception as e:
+                last_error = e
+        # sisanya lewat jalur failover biasa
+        for provider in [p for p in candidates if p not in pending.values()]:
+            try:
+                return provider.complete(stage, messages, temperature, False)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    async def acomplete(self, stage: str, messages: List[Dict], temperature: float = 0.7, stream: bool = False, hedge: bool = False):
+        """Versi async `complete` (AsyncOpenAI); hedging pakai asyncio task, bukan thread"""
+        candidates = self.ranked()
+        if hedge and self.hedge and not stream and len(candidates) > 1:
+            first = candidates[0]
+            delay = first.stats.percentile(90) if len(first.stats) >= self.hedge_min_samples else None
+            if delay is not None:
+                return await self._acomplete_hedged(stage, messages, temperature, candidates, delay)
+
+        last_error: Optional[Exception] = None
+        for provider in candidates:
+            try:
+                return await provider.acomplete(stage, messages, temperature, stream)
+            except Exception as e:
+                if not isinstance(e, CircuitOpenError):
+                    logger.warning(f"⚠️ [ROUTER] {provider.name} gagal untuk {stage}: {e}")
+                last_error = e
+        raise last_error
+
+    async def _acomplete_hedged(self, stage: str, messages: List[Dict], temperature: float, candidates: List[Provider], delay: float):
+        first, backup = candidates[0], candidates[1]
+        tasks: Dict[asyncio.Task, Provider] = {
+            asyncio.ensure_future(first.acomplete(stage, messages, temperature, False)): first
+        }
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            logger.info(f"🔄 [ROUTER] {first.name} lewat p90 ({delay:.2f}s), hedge ke {backup.name}")
+            tasks[asyncio.ensure_future(backup.acomplete(stage, messages, temperature, False))] = backup
+
+        pending = set(tasks)
+        last_error: Optional[Exception] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()  # request yang kalah tidak perlu ditunggu
+        for provider in [p for p in candidates if p not in tasks.values()]:
+            try:
+                return await provider.acomplete(stage, messages, temperature, False)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.hedge_max_workers, thread_name_prefix="llm-hedge")
+        return self._executor
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            p.name: {**p.stats.snapshot(), "breaker": p.llm.breaker.state}
+            for p in self.providers
+        }
@@ -1,4 +1,6 @@
+import asyncio
 import logging
+from typing import Optional
 from src.memory.session_manager import SessionManager
 from src.database.connection import db_instance
 from src.database.models.user import UserMemoryModel
@@ -8,8 +10,9 @@ logger = logging.getLogger(__name__)
 class MemoryManager:
     """Bridge STM (session memory) & LTM (MongoDB)"""
 
-    def __init__(self):
-        self.stm = SessionManager()  # Short-term memory per sesi
+    def __init__(self, stm: Optional[SessionManager] = None):
+        # Short-term memory per sesi; bisa dibagi dengan KencotBot supaya cuma ada satu store
+        self.stm = stm if stm is not None else SessionManager()
         self.ltm_model = UserMemoryModel(db_instance["user_memory"])  # Long-term memory dari DB
 
     # ========================== CONTEXT ==========================
@@ -26,6 +29,8 @@ class MemoryManager:
         """
         Kompatibilitas untuk agent lama yang kirim combined_context.
         Akan nyimpen history terbaru (kalau ada) ke STM.
+        FoodAgent sudah menyimpan pesan user & bot tiap turn, jadi jangan
+        dipanggil lagi setelah `FoodAgent.process` (pesannya jadi dobel).
         """
         try:
             last_user_msg = context.get("raw_input", "")
@@ -51,3 +56,19 @@ class MemoryManager:
         """Tambahkan alergi baru user ke LTM"""
         self.ltm_model.add_allergy(user_id, allergen)
         logger.info(f"[LTM] Added allergy: {allergen}")
+
+    # ========================== ASYNC ==========================
+    # pymongo blocking (belum pakai driver async), jadi call LTM dijalankan di
+    # thread pool default supaya event loop tetap bebas selama menunggu DB.
+    async def get_context_async(self, user_id: str, session_id: str):
+        # STM juga bisa blocking (backend SQLite), jadi ikut ke thread
+        return await asyncio.to_thread(self.get_context, user_id, session_id)
+
+    async def add_liked_food_async(self, user_id: str, food_name: str):
+        await asyncio.to_thread(self.add_liked_food, user_id, food_name)
+
+    async def add_disliked_food_async(self, user_id: str, food_name: str):
+        await asyncio.to_thread(self.add_disliked_food, user_id, food_name)
+
+    async def add_allergy_async(self, user_id: str, allergen: str):
+        await asyncio.to_thread(self.add_allergy, user_id, allergen)
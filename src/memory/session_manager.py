@@ -1,43 +1,232 @@
-from typing import Dict
+import logging
+import threading
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta, timezone
 
+from src.memory.session_store import InMemorySessionStore, create_session_store, is_expired
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# ringkasan sesi: berapa nama makanan terakhir yang diingat
+SUMMARY_MAX_FOODS = 10
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class SessionManager:
-    """Short-Term Memory per session"""
+    """
+    Short-Term Memory per session.
+
+    Riwayat percakapan dibatasi `max_history` pesan terakhir; pesan yang lebih
+    tua dibuang dan sesi hanya menyimpan ringkasan ringkas (makanan yang sudah
+    direkomendasikan + batasan yang pernah disebut user), jadi ukuran prompt
+    tidak ikut membesar sepanjang sesi.
+
+    Sesi kedaluwarsa setelah `ttl_minutes` tanpa aktivitas (akses memperpanjang
+    `expires_at`, sesi yang sedang cooldown tidak dihapus). Baca sesi tidak
+    menulis ke store; perpanjangan expiry saat baca paling sering sekali per
+    `touch_interval_seconds`.
+    Expiry dicek saat akses, dan `sweep()` (bisa jalan di thread background
+    lewat `start_sweeper`) membuang sesi kedaluwarsa. Kalau total perkiraan
+    ukuran sesi melewati `max_bytes`, sesi yang paling lama tidak diakses
+    (LRU) dibuang.
+
+    Penyimpanannya pluggable (`store`, lihat session_store): default dict di
+    proses ini, atau SQLite bersama supaya beberapa worker berbagi sesi.
+    """
 
-    def __init__(self):
-        self.short_term_memory = {}
+    def __init__(
+        self,
+        max_history: Optional[int] = None,
+        ttl_minutes: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        store=None,
+        touch_interval_seconds: Optional[float] = None,
+    ):
+        self.max_history = max_history or Config.MAX_CONVERSATION_HISTORY
+        self.ttl_minutes = ttl_minutes or Config.SESSION_TIMEOUT_MINUTES
+        self.touch_interval = timedelta(seconds=(
+            touch_interval_seconds if touch_interval_seconds is not None else Config.SESSION_TOUCH_INTERVAL_SECONDS
+        ))
+        if store is None:
+            max_bytes = max_bytes if max_bytes is not None else Config.SESSION_MAX_BYTES
+            store = create_session_store(Config.SESSION_BACKEND, Config.SESSION_DB_PATH, max_bytes)
+        self.store = store
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
 
-    def create_session(self, session_id: str, user_id: str, duration_minutes: int = 30):
-        now = datetime.now(timezone.utc)
-        self.short_term_memory[session_id] = {
+    @property
+    def max_bytes(self) -> int:
+        return self.store.max_bytes
+
+    @property
+    def short_term_memory(self) -> Dict[str, dict]:
+        """Semua sesi (dict asli untuk backend memory, salinan untuk backend lain)"""
+        if isinstance(self.store, InMemorySessionStore):
+            return self.store.sessions
+        return dict(self.store.items())
+
+    # ========================== LIFECYCLE ==========================
+    def create_session(self, session_id: str, user_id: str, duration_minutes: Optional[float] = None):
+        now = _utcnow()
+        ttl = duration_minutes or self.ttl_minutes
+        self.store.put(session_id, {
             "user_id": user_id,
             "phase": "greetings",
             "interaction_count": 0,
             "conversation_history": [],
             "created_at": now,
-            "expires_at": now + timedelta(minutes=duration_minutes),
+            "expires_at": now + timedelta(minutes=ttl),
+            "ttl_minutes": ttl,
             "cooldown_until": None
+        })
+
+    def _new_session(self) -> dict:
+        # sesi implisit (mis. pesan pertama langsung lewat add_message)
+        now = _utcnow()
+        return {
+            "conversation_history": [],
+            "created_at": now,
+            "expires_at": now + timedelta(minutes=self.ttl_minutes),
+            "ttl_minutes": self.ttl_minutes,
         }
 
+    def _mutate(self, session_id: str, fn, create: bool = False):
+        """Jalankan `fn(session)` pada sesi yang masih hidup; expiry dicek & diperpanjang"""
+        now = _utcnow()
+
+        def touch_and_apply(session: dict):
+            session["expires_at"] = now + timedelta(minutes=session.get("ttl_minutes", self.ttl_minutes))
+            return fn(session)
+
+        return self.store.mutate(
+            session_id, touch_and_apply, factory=self._new_session if create else None, now=now
+        )
+
+    def _load(self, session_id: str) -> Optional[dict]:
+        """
+        Baca sesi tanpa transaksi tulis. Lewat `_mutate` hanya kalau sesi sudah
+        kedaluwarsa (supaya dibuang) atau expiry terakhir diperpanjang lebih
+        dari `touch_interval` yang lalu.
+        """
+        session = self.store.load(session_id)
+        if session is None:
+            return None
+        now = _utcnow()
+        expires_at = session.get("expires_at")
+        ttl = timedelta(minutes=session.get("ttl_minutes", self.ttl_minutes))
+        if expires_at is None or is_expired(session, now) or expires_at - ttl + self.touch_interval <= now:
+            return self._mutate(session_id, lambda s: s)
+        return session
+
+    # ========================== SWEEPER ==========================
+    def sweep(self) -> int:
+        """Buang semua sesi yang sudah kedaluwarsa. Return jumlah sesi yang dibuang"""
+        removed = self.store.sweep(_utcnow())
+        if removed:
+            logger.info(f"🗑️ [STM] Sweeper membuang {removed} sesi kedaluwarsa")
+        return removed
+
+    def start_sweeper(self, interval: float = 60.0):
+        """Thread background yang menjalankan `sweep()` tiap `interval` detik"""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self._stop_sweeper.clear()
+
+        def _run():
+            while not self._stop_sweeper.wait(interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"❌ Sweeper STM gagal: {e}")
+
+        self._sweeper = threading.Thread(target=_run, name="stm-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop_sweeper.set()
+        if self._sweeper:
+            self._sweeper.join(timeout=1)
+            self._sweeper = None
+
+    def stats(self) -> Dict:
+        return self.store.stats()
+
+    # ========================== STM ==========================
     def get_stm(self, session_id: str) -> dict:
-        return self.short_term_memory.get(session_id)
+        session = self._load(session_id)
+        return None if session is None else self.store.view(session_id, session)
+
+    def increment(self, session_id: str, key: str, amount: int = 1) -> int:
+        """Tambah counter sesi secara atomik (satu `mutate`, aman antar worker). Return nilai baru"""
+        def bump(session: dict) -> int:
+            session[key] = session.get(key, 0) + amount
+            return session[key]
+
+        return self._mutate(session_id, bump, create=True)
 
     def add_message(self, session_id: str, role: str, message: str):
-        session = self.short_term_memory.setdefault(session_id, {})
-        session.setdefault("conversation_history", []).append({
-            "role": role,
-            "message": message,
-            "timestamp": datetime.now(timezone.utc)
-        })
-    
-    def get_messages(self, session_id: str):
-        """Ambil daftar percakapan (role + content)"""
-        session = self.short_term_memory.get(session_id, {})
-        history = session.get("conversation_history", [])
-        return [{"role": h["role"], "content": h["message"]} for h in history]
+        def append(session: dict):
+            history = session.setdefault("conversation_history", [])
+            history.append({
+                "role": role,
+                "message": message,
+                "timestamp": _utcnow()
+            })
+            if len(history) > self.max_history:
+                dropped = len(history) - self.max_history
+                del history[:dropped]
+                summary = session.setdefault("summary", {})
+                summary["compressed_messages"] = summary.get("compressed_messages", 0) + dropped
 
+        self._mutate(session_id, append, create=True)
 
-    def clear_stm(self, session_id: str):
-        self.short_term_memory.pop(session_id, None)
+    def remember(self, session_id: str, recommended: Optional[str] = None, constraints: Optional[Dict] = None):
+        """Catat fakta turn ke ringkasan sesi (menu yang direkomendasikan, batasan user)"""
+        def update(session: dict):
+            summary = session.setdefault("summary", {})
+            if recommended:
+                foods = [f for f in summary.get("recommended", []) if f.lower() != recommended.lower()]
+                summary["recommended"] = (foods + [recommended])[-SUMMARY_MAX_FOODS:]
+            for key, value in (constraints or {}).items():
+                if value not in (None, "", []):
+                    summary.setdefault("constraints", {})[key] = value
+
+        self._mutate(session_id, update, create=True)
+
+    @staticmethod
+    def _format_summary(summary: dict) -> str:
+        parts = []
+        if summary.get("recommended"):
+            parts.append("sudah direkomendasikan: " + ", ".join(summary["recommended"]))
+        if summary.get("constraints"):
+            parts.append("batasan user: " + ", ".join(f"{k}={v}" for k, v in summary["constraints"].items()))
+        if summary.get("compressed_messages"):
+            parts.append(f"{summary['compressed_messages']} pesan lama diringkas")
+        return "; ".join(parts)
 
-    
+    def get_summary(self, session_id: str) -> str:
+        """Ringkasan sesi dalam satu baris; string kosong kalau belum ada apa-apa"""
+        session = self._load(session_id) or {}
+        return self._format_summary(dict(session.get("summary") or {}))
+
+    def get_messages(self, session_id: str) -> List[Dict]:
+        """
+        Ambil daftar percakapan (role + content), maksimal `max_history` pesan
+        terakhir. Kalau sesi punya ringkasan, ringkasan masuk paling depan
+        sebagai pesan dengan role "summary".
+        """
+        session = self._load(session_id) or {}
+        history, summary = list(session.get("conversation_history", [])), dict(session.get("summary") or {})
+        messages = [{"role": h["role"], "content": h["message"]} for h in history[-self.max_history:]]
+        summary_text = self._format_summary(summary)
+        if summary_text:
+            messages.insert(0, {"role": "summary", "content": summary_text})
+        return messages
+
+
+    def clear_stm(self, session_id: str):
+        self.store.delete(session_id)
@@ -0,0 +1,395 @@
+"""
+Backend penyimpanan sesi (STM) untuk SessionManager.
+
+- `InMemorySessionStore`: dict di proses ini (default). Cepat, tapi tiap
+  worker gunicorn punya store sendiri.
+- `SQLiteSessionStore`: satu file SQLite (mode WAL) yang dipakai bersama
+  semua worker di satu mesin. Tiap perubahan sesi = satu transaksi
+  `BEGIN IMMEDIATE` (baca-ubah-tulis atomik antar proses).
+
+Semua backend punya primitive yang sama: `load(session_id)` membaca sesi
+tanpa menulis apa pun, `mutate(session_id, fn, factory)` memuat sesi
+(membuang yang kedaluwarsa), menjalankan `fn(session)`, lalu menyimpan
+hasilnya. `view()` mengembalikan dict yang dipegang caller:
+di memori dict aslinya, di SQLite dict write-back (tiap `stm[key] = value`
+langsung ditulis ke store), jadi semantik dict lama tetap sama.
+"""
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# perkiraan overhead per sesi / per pesan (dict, timestamp, key) untuk budget memori
+SESSION_OVERHEAD_BYTES = 512
+MESSAGE_OVERHEAD_BYTES = 160
+
+
+def is_expired(session: dict, now: datetime) -> bool:
+    expires_at = session.get("expires_at")
+    cooldown_until = session.get("cooldown_until")
+    if cooldown_until and cooldown_until > now:
+        return False  # jangan sampai cooldown "bocor" karena sesinya kedaluwarsa
+    return expires_at is not None and expires_at <= now
+
+
+def due_at(session: dict) -> float:
+    """Timestamp kapan sesi boleh dibuang sweeper (expiry, atau akhir cooldown kalau lebih lama)"""
+    due = session["expires_at"]
+    cooldown_until = session.get("cooldown_until")
+    if cooldown_until and cooldown_until > due:
+        due = cooldown_until
+    return due.timestamp()
+
+
+def estimate_bytes(session: dict) -> int:
+    size = SESSION_OVERHEAD_BYTES
+    for h in session.get("conversation_history", []):
+        size += MESSAGE_OVERHEAD_BYTES + len(str(h.get("message", "")).encode("utf-8"))
+    summary = session.get("summary") or {}
+    size += sum(len(str(f).encode("utf-8")) for f in summary.get("recommended", []))
+    size += sum(len(str(v)) for v in (summary.get("constraints") or {}).values())
+    return size
+
+
+class InMemorySessionStore:
+    """
+    Sesi di dict proses ini. Expiry dibersihkan lewat min-heap waktu expiry;
+    kalau total perkiraan ukuran melewati `max_bytes`, sesi yang paling lama
+    tidak diakses (LRU) dibuang.
+    """
+
+    def __init__(self, max_bytes: int = 0):
+        self.sessions: "OrderedDict[str, dict]" = OrderedDict()
+        self.max_bytes = max_bytes
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._bytes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._evicted = {"expired": 0, "lru": 0}
+        self._lock = threading.RLock()
+
+    def put(self, session_id: str, session: dict):
+        with self._lock:
+            self._drop(session_id)
+            self.sessions[session_id] = session
+            heapq.heappush(self._expiry_heap, (due_at(session), session_id))
+            self._resize(session_id)
+
+    def load(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                self.sessions.move_to_end(session_id)
+            return session
+
+    def mutate(self, session_id: str, fn: Callable[[dict], object], factory: Optional[Callable[[], dict]] = None,
+               now: Optional[datetime] = None):
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is not None and now is not None and is_expired(session, now):
+                self._drop(session_id)
+                self._evicted["expired"] += 1
+                logger.info(f"🗑️ [STM] Sesi {session_id} kedaluwarsa")
+                session = None
+            if session is None:
+                if factory is None:
+                    return None
+                session = factory()
+                self.put(session_id, session)
+            result = fn(session)
+            self.sessions.move_to_end(session_id)
+            self._resize(session_id)
+            return result
+
+    def view(self, session_id: str, session: dict) -> dict:
+        return session  # dict asli: perubahan caller langsung terlihat
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._drop(session_id)
+
+    def _drop(self, session_id: str) -> bool:
+        if self.sessions.pop(session_id, None) is None:
+            return False
+        self._total_bytes -= self._bytes.pop(session_id, 0)
+        return True
+
+    def _resize(self, session_id: str):
+        size = estimate_bytes(self.sessions[session_id])
+        self._total_bytes += size - self._bytes.get(session_id, 0)
+        self._bytes[session_id] = size
+        if not self.max_bytes:
+            return
+        while self._total_bytes > self.max_bytes and len(self.sessions) > 1:
+            oldest = next(iter(self.sessions))
+            if oldest == session_id:
+                self.sessions.move_to_end(oldest)
+                oldest = next(iter(self.sessions))
+            self._drop(oldest)
+            self._evicted["lru"] += 1
+            logger.info(f"🗑️ [STM] Sesi {oldest} dibuang (budget memori {self.max_bytes} byte)")
+
+    def sweep(self, now: datetime) -> int:
+        removed = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now.timestamp():
+                _, session_id = heapq.heappop(self._expiry_heap)
+                session = self.sessions.get(session_id)
+                if session is None:
+                    continue  # entry basi (sesi sudah dibuang / dibuat ulang)
+                if is_expired(session, now):
+                    self._drop(session_id)
+                    removed += 1
+                else:
+                    # expiry sempat diperpanjang (atau masih cooldown): jadwalkan ulang
+                    heapq.heappush(self._expiry_heap, (due_at(session), session_id))
+            # entry basi dari sesi yang dihapus / dibuat ulang ikut dibersihkan sesekali
+            if len(self._expiry_heap) > 2 * len(self.sessions) + 64:
+                self._expiry_heap = [(due_at(s), sid) for sid, s in self.sessions.items()]
+                heapq.heapify(self._expiry_heap)
+            self._evicted["expired"] += removed
+        return removed
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        with self._lock:
+            return iter(list(self.sessions.items()))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self.sessions),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "evicted_expired": self._evicted["expired"],
+                "evicted_lru": self._evicted["lru"],
+            }
+
+
+# ========================== SQLITE ==========================
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    raise TypeError(f"Tidak bisa serialize {type(value).__name__}")
+
+
+def _decode_value(obj: dict):
+    if len(obj) == 1 and "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    return obj
+
+
+class WriteBackSession(dict):
+    """Salinan sesi dari SQLite; tiap perubahan level atas langsung ditulis balik ke store"""
+
+    def __init__(self, store: "SQLiteSessionStore", session_id: str, data: dict):
+        super().__init__(data)
+        self._store = store
+        self._session_id = session_id
+
+    def _write(self, fn: Callable[[dict], object]):
+        self._store.mutate(self._session_id, fn)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._write(lambda s: s.__setitem__(key, value))
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._write(lambda s: s.pop(key, None))
+
+    def update(self, *args, **kwargs):
+        changes = dict(*args, **kwargs)
+        super().update(changes)
+        self._write(lambda s: s.update(changes))
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        self._write(lambda s: s.pop(key, None))
+        return value
+
+
+class SQLiteSessionStore:
+    """
+    Sesi di satu file SQLite (WAL) yang dibagi semua worker di mesin yang sama.
+    Expiry diindeks (`expires_at`, `due_at`) jadi sweep = satu DELETE lewat index;
+    budget `max_bytes` membuang sesi dengan `accessed_at` paling lama.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        due_at REAL NOT NULL,
+        accessed_at REAL NOT NULL,
+        size INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS sessions_due_at ON sessions(due_at);
+    CREATE INDEX IF NOT EXISTS sessions_accessed_at ON sessions(accessed_at);
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+    INSERT OR IGNORE INTO meta (key, value) VALUES ('bytes', 0), ('evicted_expired', 0), ('evicted_lru', 0);
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, timeout: float = 30.0):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # satu koneksi per thread per proses (koneksi tidak boleh ikut ter-fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _decode(data: str) -> dict:
+        return json.loads(data, object_hook=_decode_value)
+
+    def _write_row(self, conn: sqlite3.Connection, session_id: str, session: dict, old_size: int):
+        data = json.dumps(session, ensure_ascii=False, default=_encode_value)
+        size = estimate_bytes(session)
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (id, data, due_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+            (session_id, data, due_at(session), time.time(), size),
+        )
+        self._bump(conn, "bytes", size - old_size)
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, key: str, delta: int):
+        if delta:
+            conn.execute("UPDATE meta SET value = value + ? WHERE key = ?", (delta, key))
+
+    def _delete_row(self, conn: sqlite3.Connection, session_id: str) -> bool:
+        # tanpa DELETE ... RETURNING (baru ada di SQLite 3.35); aman karena dalam transaksi yang sama
+        row = conn.execute("SELECT size FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return False
+        conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        self._bump(conn, "bytes", -row[0])
+        return True
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], object]):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    def put(self, session_id: str, session: dict):
+        def run(conn):
+            self._delete_row(conn, session_id)
+            self._write_row(conn, session_id, session, 0)
+            self._enforce_budget(conn, session_id)
+        self._transaction(run)
+
+    def load(self, session_id: str) -> Optional[dict]:
+        # SELECT biasa (autocommit): tidak mengambil write lock
+        row = self._conn().execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def mutate(self, session_id: str, fn: Callable[[dict], object], factory: Optional[Callable[[], dict]] = None,
+               now: Optional[datetime] = None):
+        def run(conn):
+            row = conn.execute("SELECT data, size FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            session, old_size = (self._decode(row[0]), row[1]) if row else (None, 0)
+            if session is not None and now is not None and is_expired(session, now):
+                self._delete_row(conn, session_id)
+                self._bump(conn, "evicted_expired", 1)
+                logger.info(f"🗑️ [STM] Sesi {session_id} kedaluwarsa")
+                session, old_size = None, 0
+            if session is None:
+                if factory is None:
+                    return None
+                session = factory()
+            result = fn(session)
+            self._write_row(conn, session_id, session, old_size)
+            self._enforce_budget(conn, session_id)
+            return result
+        return self._transaction(run)
+
+    def view(self, session_id: str, session: dict) -> dict:
+        return WriteBackSession(self, session_id, session)
+
+    def delete(self, session_id: str) -> bool:
+        return self._transaction(lambda conn: self._delete_row(conn, session_id))
+
+    def _enforce_budget(self, conn: sqlite3.Connection, keep: str):
+        if not self.max_bytes:
+            return
+        total = conn.execute("SELECT value FROM meta WHERE key = 'bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = conn.execute(
+            "SELECT id, size FROM sessions WHERE id != ? ORDER BY accessed_at", (keep,)
+        )
+        dropped = []
+        for session_id, size in victims:
+            if total <= self.max_bytes:
+                break
+            dropped.append(session_id)
+            total -= size
+        for session_id in dropped:
+            self._delete_row(conn, session_id)
+            logger.info(f"🗑️ [STM] Sesi {session_id} dibuang (budget memori {self.max_bytes} byte)")
+        self._bump(conn, "evicted_lru", len(dropped))
+
+    def sweep(self, now: datetime) -> int:
+        def run(conn):
+            # `due_at` ditulis ulang tiap akses & sudah memperhitungkan cooldown
+            cutoff = now.timestamp()
+            count, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions WHERE due_at <= ?", (cutoff,)
+            ).fetchone()
+            conn.execute("DELETE FROM sessions WHERE due_at <= ?", (cutoff,))
+            self._bump(conn, "bytes", -size)
+            self._bump(conn, "evicted_expired", count)
+            return count
+        return self._transaction(run)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        rows = self._conn().execute("SELECT id, data FROM sessions ORDER BY accessed_at").fetchall()
+        return ((session_id, self._decode(data)) for session_id, data in rows)
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        return {
+            "backend": "sqlite",
+            "sessions": conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0],
+            "bytes": meta["bytes"],
+            "max_bytes": self.max_bytes,
+            "evicted_expired": meta["evicted_expired"],
+            "evicted_lru": meta["evicted_lru"],
+        }
+
+
+def create_session_store(backend: str = "memory", path: Optional[str] = None, max_bytes: int = 0):
+    """Store sesuai konfigurasi (`SESSION_BACKEND`); backend tidak dikenal -> memory"""
+    if backend == "sqlite":
+        return SQLiteSessionStore(path, max_bytes=max_bytes)
+    if backend != "memory":
+        logger.warning(f"⚠️ Session backend '{backend}' tidak dikenal, pakai 'memory'.")
+    return InMemorySessionStore(max_bytes=max_bytes)
@@ -0,0 +1,285 @@
+"""
+Approximate nearest-neighbour index (pure NumPy) untuk katalog besar.
+
+IVF: embedding dikelompokkan ke `nlist` centroid hasil k-means (spherical,
+karena embedding sudah L2-normalisasi). Saat search cuma `nprobe` cluster
+terdekat yang discan. Opsional PQ (IVFADC): residual tiap vektor terhadap
+centroid-nya dikompres jadi `pq_m` kode uint8; skor kasar dihitung dari
+lookup table lalu kandidat teratas di-rescore exact pakai matrix aslinya.
+"""
+import copy
+import logging
+import os
+import tempfile
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.rag.vector_store import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+_CHUNK = 16384
+
+
+def _assign_ip(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Centroid dengan inner product terbesar untuk tiap baris (per chunk, hemat memori)"""
+    out = np.empty(matrix.shape[0], dtype=np.int32)
+    for start in range(0, matrix.shape[0], _CHUNK):
+        block = np.asarray(matrix[start:start + _CHUNK], dtype=np.float32)
+        out[start:start + _CHUNK] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def _assign_l2(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Centroid dengan jarak euclid terdekat (untuk codebook PQ)"""
+    c_sq = (centroids ** 2).sum(axis=1)
+    out = np.empty(matrix.shape[0], dtype=np.int32)
+    for start in range(0, matrix.shape[0], _CHUNK):
+        block = np.asarray(matrix[start:start + _CHUNK], dtype=np.float32)
+        # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2  (||x||^2 konstan per baris)
+        out[start:start + _CHUNK] = np.argmin(c_sq - 2.0 * block @ centroids.T, axis=1)
+    return out
+
+
+def kmeans(
+    matrix: np.ndarray,
+    k: int,
+    n_iter: int = 20,
+    spherical: bool = True,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """K-means sederhana (Lloyd). spherical=True -> centroid dinormalisasi, assign pakai inner product"""
+    rng = rng or np.random.default_rng(0)
+    data = np.asarray(matrix, dtype=np.float32)
+    k = min(k, data.shape[0])
+    centroids = data[rng.choice(data.shape[0], k, replace=False)].copy()
+    assign = _assign_ip if spherical else _assign_l2
+
+    for _ in range(n_iter):
+        labels = assign(data, centroids)
+        counts = np.bincount(labels, minlength=k)
+        # jumlah per cluster: sort by label lalu reduceat (jauh lebih cepat dari np.add.at)
+        order = np.argsort(labels, kind="stable")
+        present = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)])[present]
+        sums = np.zeros_like(centroids)
+        sums[present] = np.add.reduceat(data[order], starts, axis=0)
+
+        empty = counts == 0
+        counts[empty] = 1
+        centroids = sums / counts[:, None]
+        if empty.any():
+            # cluster kosong di-seed ulang dari baris acak
+            centroids[empty] = data[rng.choice(data.shape[0], int(empty.sum()), replace=False)]
+        if spherical:
+            centroids = normalize_rows(centroids)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """Inverted-file index (IVF-Flat atau IVF-PQ) di atas matrix embedding ternormalisasi"""
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        pq_m: int = 0,
+        refine_factor: int = 10,
+        seed: int = 0,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.pq_m = pq_m
+        self.refine_factor = refine_factor
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self.list_rows: Optional[np.ndarray] = None     # row ids, dikelompokkan per list
+        self.list_offsets: Optional[np.ndarray] = None  # CSR offsets, panjang nlist + 1
+        self.codebooks: Optional[np.ndarray] = None     # (pq_m, 256, d / pq_m)
+        self.codes: Optional[np.ndarray] = None         # (n, pq_m) uint8, kode residual
+        self.row_list: Optional[np.ndarray] = None      # list id tiap baris
+        self.meta: dict = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def ntotal(self) -> int:
+        return 0 if self.list_rows is None else int(self.list_rows.size)
+
+    # ========================== BUILD ==========================
+    def train(self, matrix: np.ndarray, max_train_rows: int = 100000, n_iter: int = 10) -> "IVFIndex":
+        """Latih centroid (dan codebook PQ) lalu masukkan semua baris"""
+        n, dim = matrix.shape
+        rng = np.random.default_rng(self.seed)
+        if not self.nlist:
+            self.nlist = max(1, int(4 * np.sqrt(n)))
+
+        # ~40 sampel per centroid sudah cukup untuk k-means yang stabil
+        n_train = min(n, max_train_rows, max(40 * self.nlist, 256 * 40 if self.pq_m else 0))
+        sample_idx = np.sort(rng.choice(n, n_train, replace=False))
+        sample = np.asarray(matrix[sample_idx], dtype=np.float32)
+
+        logger.info(f"🔧 Training IVF index: {n} baris, nlist={self.nlist}, pq_m={self.pq_m}")
+        self.centroids = kmeans(sample, self.nlist, n_iter=n_iter, rng=rng)
+        self.nlist = self.centroids.shape[0]
+
+        if self.pq_m:
+            if dim % self.pq_m:
+                raise ValueError(f"Dimensi {dim} harus habis dibagi pq_m={self.pq_m}")
+            sub = dim // self.pq_m
+            ksub = min(256, sample.shape[0])
+            residual = sample - self.centroids[_assign_ip(sample, self.centroids)]
+            self.codebooks = np.stack([
+                kmeans(residual[:, j * sub:(j + 1) * sub], ksub, n_iter=n_iter, spherical=False, rng=rng)
+                for j in range(self.pq_m)
+            ])
+
+        self.add(matrix)
+        return self
+
+    def add(self, matrix: np.ndarray):
+        """(Re)assign semua baris ke centroid yang sudah dilatih, tanpa training ulang"""
+        labels = _assign_ip(matrix, self.centroids)
+        self._set_labels(labels)
+        if self.codebooks is not None:
+            self.codes = self._encode_pq(matrix, labels)
+
+    def _set_labels(self, labels: np.ndarray):
+        """Bangun inverted list (CSR) dari list id tiap baris; tidak menyentuh vektor"""
+        self.row_list = labels
+        self.list_rows = np.argsort(labels, kind="stable").astype(np.int64)
+        counts = np.bincount(labels, minlength=self.nlist)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def with_rows(self, rows: np.ndarray, vectors: np.ndarray) -> "IVFIndex":
+        """
+        Salinan index dengan `rows` di-assign (dan di-encode PQ) ulang dari `vectors`.
+        Row id = jumlah baris sekarang berarti baris baru di ujung. Baris lain tidak
+        di-assign ulang; index ini tidak berubah (snapshot lama tetap valid).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        n = max(self.ntotal, int(rows.max()) + 1 if rows.size else 0)
+        new = copy.copy(self)
+        grow = n - self.ntotal
+        labels = np.concatenate([self.row_list, np.zeros(grow, dtype=self.row_list.dtype)])
+        changed = _assign_ip(vectors, self.centroids)
+        labels[rows] = changed
+        new._set_labels(labels)
+        if self.codes is not None:
+            codes = np.concatenate([self.codes, np.zeros((grow, self.codes.shape[1]), dtype=self.codes.dtype)])
+            codes[rows] = self._encode_pq(vectors, changed)
+            new.codes = codes
+        return new
+
+    def without_rows(self, keep: np.ndarray) -> "IVFIndex":
+        """Salinan index tanpa baris yang `keep`-nya False (row id sesudahnya ikut bergeser)"""
+        new = copy.copy(self)
+        new._set_labels(self.row_list[keep])
+        if self.codes is not None:
+            new.codes = self.codes[keep]
+        return new
+
+    def _encode_pq(self, matrix: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        m, _, sub = self.codebooks.shape
+        codes = np.empty((matrix.shape[0], m), dtype=np.uint8)
+        for start in range(0, matrix.shape[0], _CHUNK):
+            block = np.asarray(matrix[start:start + _CHUNK], dtype=np.float32)
+            residual = block - self.centroids[labels[start:start + _CHUNK]]
+            for j in range(m):
+                codes[start:start + _CHUNK, j] = _assign_l2(residual[:, j * sub:(j + 1) * sub], self.codebooks[j])
+        return codes
+
+    # ========================== SEARCH ==========================
+    def probe(self, query_vec: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Row ids di `nprobe` list yang centroid-nya paling dekat ke query (terurut)"""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        sims = self.centroids @ query_vec
+        lists = np.argpartition(-sims, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+        parts = [self.list_rows[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        query_vec: np.ndarray,
+        top_k: int,
+        nprobe: Optional[int] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Kandidat approximate untuk query ternormalisasi.
+        Return (row ids terurut, skor cosine exact) — ranking akhir di RetrievalEngine.
+        `rows` opsional: hanya kandidat yang juga ada di subset ini (hasil pre-filter).
+        """
+        cand = self.probe(query_vec, nprobe)
+        if rows is not None:
+            cand = np.intersect1d(cand, rows, assume_unique=True)
+        if cand.size == 0:
+            return cand, np.empty(0, dtype=np.float32)
+
+        if self.codes is not None and cand.size > top_k * self.refine_factor:
+            # skor kasar = q.centroid + q.residual (dari PQ lookup table),
+            # lalu rescore exact hanya untuk shortlist
+            m, _, sub = self.codebooks.shape
+            lut = np.einsum("jkd,jd->jk", self.codebooks, query_vec.reshape(m, sub))
+            approx = (self.centroids @ query_vec)[self.row_list[cand]]
+            approx += lut[np.arange(m), self.codes[cand]].sum(axis=1)
+            keep = top_k * self.refine_factor
+            cand = np.sort(cand[np.argpartition(-approx, keep - 1)[:keep]])
+
+        return cand, np.asarray(matrix[cand] @ query_vec)
+
+    # ========================== PERSISTENCE ==========================
+    def save(self, path, **meta):
+        """Simpan index ke .npz (meta: info untuk cek basi, misal signature sumber)"""
+        arrays = {
+            "version": np.array(INDEX_VERSION),
+            "params": np.array([self.nlist, self.nprobe, self.pq_m, self.refine_factor]),
+            "centroids": self.centroids,
+            "list_rows": self.list_rows,
+            "list_offsets": self.list_offsets,
+            "row_list": self.row_list,
+            "meta_keys": np.array(list(meta.keys())),
+            "meta_values": np.array([str(v) for v in meta.values()]),
+        }
+        if self.codes is not None:
+            arrays["codebooks"] = self.codebooks
+            arrays["codes"] = self.codes
+        # file sementara unik di direktori yang sama (beberapa worker bisa save bersamaan), lalu rename atomik
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.info(f"💾 ANN index disimpan: {path}")
+
+    @classmethod
+    def load(cls, path) -> Optional["IVFIndex"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != INDEX_VERSION:
+                    return None
+                nlist, nprobe, pq_m, refine = (int(x) for x in data["params"])
+                index = cls(nlist=nlist, nprobe=nprobe, pq_m=pq_m, refine_factor=refine)
+                index.centroids = data["centroids"]
+                index.list_rows = data["list_rows"]
+                index.list_offsets = data["list_offsets"]
+                index.row_list = data["row_list"]
+                if "codes" in data:
+                    index.codebooks = data["codebooks"]
+                    index.codes = data["codes"]
+                index.meta = dict(zip(data["meta_keys"].tolist(), data["meta_values"].tolist()))
+            return index
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal load ANN index: {e}")
+            return None
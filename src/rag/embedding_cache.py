@@ -0,0 +1,148 @@
+"""
+LRU + TTL cache untuk embedding query.
+
+User sering kirim frasa yang sama ("ayam geprek", "yang pedes", "murah aja"),
+jadi embedding-nya disimpan per teks yang sudah dinormalisasi supaya query
+populer tidak perlu inference model lagi. Cache bisa disimpan ke disk (.npz)
+dan di-load lagi saat restart.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Key cache: lowercase + spasi dirapikan"""
+    return " ".join(str(text).lower().split())
+
+
+class EmbeddingCache:
+    """Bounded LRU cache (opsional TTL) dengan counter hit/miss"""
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[List[float], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - stored_at > self.ttl_seconds
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = normalize_text(text)
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or self._expired(entry[1], now):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+    def put(self, text: str, embedding, stored_at: Optional[float] = None):
+        key = normalize_text(text)
+        value = [float(x) for x in embedding]
+        with self._lock:
+            self._data[key] = (value, stored_at if stored_at is not None else time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, text: str, compute: Callable[[str], List[float]]) -> Optional[List[float]]:
+        """Ambil dari cache, kalau miss hitung pakai `compute(teks_normal)` lalu simpan"""
+        cached = self.get(text)
+        if cached is not None:
+            return cached
+        embedding = compute(normalize_text(text))
+        if embedding is None:
+            return None
+        self.put(text, embedding)
+        return [float(x) for x in embedding]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    # ========================== PERSISTENCE ==========================
+    def save(self, path, namespace: str = ""):
+        """
+        Simpan isi cache ke file .npz.
+        `namespace` = identitas model; embedding model lain tidak boleh ikut ke-load.
+        """
+        now = time.time()
+        with self._lock:
+            items = [(k, v, t) for k, (v, t) in self._data.items() if not self._expired(t, now)]
+        if not items:
+            return
+
+        dim = len(items[0][1])
+        items = [it for it in items if len(it[1]) == dim]
+        # file sementara unik di direktori yang sama (beberapa worker bisa save bersamaan), lalu rename atomik
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    namespace=np.array(namespace),
+                    keys=np.array([k for k, _, _ in items]),
+                    vectors=np.asarray([v for _, v, _ in items], dtype=np.float32),
+                    stored_at=np.asarray([t for _, _, t in items], dtype=np.float64),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.info(f"💾 Embedding cache disimpan: {len(items)} entri -> {path}")
+
+    def load(self, path, namespace: str = "") -> int:
+        """Load cache dari disk, return jumlah entri yang masuk"""
+        if not os.path.exists(path):
+            return 0
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["namespace"]) != namespace:
+                    logger.info("ℹ️ Embedding cache dari model lain, diabaikan.")
+                    return 0
+                keys, vectors, stamps = data["keys"], data["vectors"], data["stored_at"]
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal load embedding cache: {e}")
+            return 0
+
+        now = time.time()
+        loaded = 0
+        # urutan file = urutan LRU (paling lama dulu)
+        for key, vec, stored_at in zip(keys.tolist(), vectors, stamps.tolist()):
+            if self._expired(stored_at, now):
+                continue
+            self.put(key, vec, stored_at=stored_at)
+            loaded += 1
+        logger.info(f"✅ Embedding cache di-load: {loaded} entri")
+        return loaded
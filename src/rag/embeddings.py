@@ -1,16 +1,18 @@
 """
 Minimal Embedding Generator for JSON -> RAG database
+
+Model (SentenceTransformer / TF-IDF fallback) baru di-load saat `encode`
+pertama atau saat `warmup()` dipanggil, jadi `import src.rag` tetap murah.
 """
+import atexit
 import logging
 import hashlib
+import threading
 from typing import List, Union
 
-try:
-    from sentence_transformers import SentenceTransformer
-except ImportError:
-    SentenceTransformer = None  # fallback
+import numpy as np
 
-from sklearn.feature_extraction.text import TfidfVectorizer
+from src.rag.embedding_cache import EmbeddingCache, normalize_text
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -18,15 +20,41 @@ logging.basicConfig(level=logging.INFO)
 EMBEDDING_DIM = 192 
 
 class EmbeddingGenerator:
-    """Generate embeddings for text - with offline fallback"""
+    """Generate embeddings for text - with offline fallback (lazy loaded)"""
 
     def __init__(self, model_name: str = "all-MiniLM-L3-v2"):
+        self.model_name = model_name
         self._use_fallback = False
         self._model = None
         self._vectorizer = None
-        self._initialize_model(model_name)
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def _ensure_loaded(self):
+        """Load model sekali saja (thread-safe)"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._initialize_model(self.model_name)
+                self._loaded = True
+
+    def warmup(self):
+        """Load model + satu encode dummy, dipanggil saat startup server"""
+        self._ensure_loaded()
+        self.encode("nasi goreng")
 
     def _initialize_model(self, model_name: str):
+        try:
+            # import berat (torch) ditunda sampai model benar-benar dibutuhkan
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            SentenceTransformer = None  # fallback
+
         if SentenceTransformer:
             try:
                 logger.info(f"Loading embedding model: {model_name}")
@@ -43,8 +71,16 @@ class EmbeddingGenerator:
             logger.info("🔄 Using fallback TF-IDF based embeddings")
             self._init_fallback()
 
+    @property
+    def model_id(self) -> str:
+        """Identitas model aktif (dipakai sebagai namespace cache embedding)"""
+        self._ensure_loaded()
+        return "tfidf-fallback" if self._use_fallback else self.model_name
+
     def _init_fallback(self):
         """Initialize simple TF-IDF fallback"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
         vocab = [
             'nasi', 'ayam', 'goreng', 'mie', 'soto', 'bakso', 'geprek',
             'pedas', 'manis', 'asam', 'gurih', 'kenyang', 'berat', 'ringan',
@@ -60,27 +96,25 @@ class EmbeddingGenerator:
         )
         self._vectorizer.fit(vocab)
 
-    def encode(self, text: Union[str, List[str]]) -> List[float]:
-        """Generate embedding for single text"""
+    def encode(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        """Satu teks -> satu vektor; list teks -> list vektor (juga kalau isinya satu)"""
+        self._ensure_loaded()
         if self._use_fallback:
             return self._fallback_encode(text)
-        if isinstance(text, str):
-            return self._model.encode(text, show_progress_bar=False).tolist()
-        else:
-            return self._model.encode(text, show_progress_bar=False).tolist()
+        return self._model.encode(text, show_progress_bar=False).tolist()
 
-    def _fallback_encode(self, text: Union[str, List[str]]) -> List[float]:
+    def _fallback_encode(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
         """TF-IDF + hash fallback"""
-        if isinstance(text, str):
-            text = [text]
+        single = isinstance(text, str)
+        texts = [text] if single else text
         try:
-            vectors = self._vectorizer.transform(text).toarray()
+            vectors = self._vectorizer.transform(texts).toarray()
             if vectors.shape[1] < EMBEDDING_DIM:
-                padding = [[0.0] * (EMBEDDING_DIM - vectors.shape[1])]
-                vectors = [[*row, *padding[0]] for row in vectors]
-            return vectors[0] if len(text) == 1 else vectors.tolist()
+                vectors = np.pad(vectors, ((0, 0), (0, EMBEDDING_DIM - vectors.shape[1])))
+            vectors = vectors.tolist()
         except Exception:
-            return self._hash_encode(text[0] if len(text) == 1 else text)
+            vectors = [self._hash_encode(t) for t in texts]
+        return vectors[0] if single else vectors
 
     def _hash_encode(self, text: str) -> List[float]:
         embedding = []
@@ -91,8 +125,57 @@ class EmbeddingGenerator:
                 embedding.append(float(hash_bytes[j]) / 255.0)
         return embedding[:EMBEDDING_DIM]
 
-# Global instance
+# Global instance (model belum di-load sampai encode/warmup pertama)
 embedding_generator = EmbeddingGenerator()
+embedding_cache = EmbeddingCache()
 
 def get_embedding(text: str) -> List[float]:
-    return embedding_generator.encode(text)
+    """Embedding satu teks, lewat LRU cache (key = teks yang dinormalisasi)"""
+    return embedding_cache.get_or_compute(text, embedding_generator.encode)
+
+def as_rows(encoded) -> List[List[float]]:
+    """Hasil encode list teks -> list vektor, apa pun bentuknya (1-D untuk satu teks, array 2-D, ...)"""
+    return np.atleast_2d(np.asarray(encoded, dtype=float)).tolist()
+
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Embedding banyak teks sekaligus: yang ada di cache diambil langsung,
+    sisanya di-encode dalam SATU batch `EmbeddingGenerator.encode`.
+    """
+    results = [embedding_cache.get(t) for t in texts]
+    missing = [i for i, emb in enumerate(results) if emb is None]
+    if not missing:
+        return results
+
+    keys = [normalize_text(texts[i]) for i in missing]
+    for i, emb in zip(missing, as_rows(embedding_generator.encode(keys))):
+        embedding_cache.put(texts[i], emb)
+        results[i] = emb
+    return results
+
+def uses_fallback_embeddings() -> bool:
+    """True kalau model embedding aktif adalah TF-IDF fallback (model di-load kalau belum)"""
+    return embedding_generator.model_id == "tfidf-fallback"
+
+def warmup():
+    """Load model embedding sekarang (bukan saat request pertama)"""
+    embedding_generator.warmup()
+
+def load_embedding_cache(path) -> int:
+    """Load cache embedding dari disk (hanya kalau modelnya sama)"""
+    return embedding_cache.load(path, namespace=embedding_generator.model_id)
+
+def save_embedding_cache(path):
+    """Simpan cache embedding ke disk"""
+    embedding_cache.save(path, namespace=embedding_generator.model_id)
+
+def initialize_embedding_cache():
+    """Load model embedding + cache query dari disk, simpan lagi saat proses berhenti"""
+    # import di sini: Config.validate() butuh API key LLM, src.rag harus bisa diimport tanpa itu
+    from src.utils.config import Config
+
+    warmup()
+    embedding_cache.max_size = Config.EMBEDDING_CACHE_SIZE
+    embedding_cache.ttl_seconds = Config.EMBEDDING_CACHE_TTL_SECONDS
+    load_embedding_cache(Config.EMBEDDING_CACHE_PATH)
+    atexit.register(save_embedding_cache, Config.EMBEDDING_CACHE_PATH)
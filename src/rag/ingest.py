@@ -0,0 +1,228 @@
+"""
+Build `rag_database.json` dari `data/database.json`.
+
+- Record menu di-stream per kantin (generator), teks dokumennya sama dengan
+  yang dipakai RetrievalEngine.upsert (`food_document_text`).
+- Encode dalam batch besar lewat `EmbeddingGenerator`; untuk encoder fallback
+  (TF-IDF / hash) batch bisa disebar ke process pool.
+- Baris yang content hash-nya (teks dokumen + model) sama dengan output
+  sebelumnya tidak di-encode ulang, embedding lama dipakai lagi.
+- Output ditulis bertahap ke file sementara lalu di-rename (atomik).
+
+Jalankan dari root repo:
+    python -m src.rag.ingest --workers 4 --build-store
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.rag.embedding_cache import normalize_text
+from src.rag.embeddings import EmbeddingGenerator, as_rows, embedding_generator
+from src.rag.retrieval_engine import food_document_text
+from src.rag.vector_store import build_binary_store
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_MODEL_ID = "tfidf-fallback"
+
+# kata di nama menu -> tag tambahan (selain fakultas & waktu makan)
+KEYWORD_TAGS = {
+    "ayam": ["ayam"],
+    "nasi": ["nasi"],
+    "mie": ["mie"],
+    "geprek": ["sambal", "pedas"],
+    "penyet": ["sambal", "pedas"],
+    "soto": ["berkuah"],
+    "gado": ["sayur", "sehat"],
+    "pecel": ["sayur", "sehat"],
+    "goreng": ["goreng"],
+    "gorengan": ["goreng"],
+}
+
+
+def make_food_id(canteen_name: str, menu_name: str) -> str:
+    return f"{canteen_name}_{menu_name}".replace(" ", "_")
+
+
+def make_tags(canteen: Dict, menu: Dict) -> List[str]:
+    tags = set(canteen.get("faculty_proximity") or []) | set(menu.get("suitability") or [])
+    for word in re.findall(r"[a-z]+", menu.get("name", "").lower()):
+        tags.update(KEYWORD_TAGS.get(word, []))
+    return sorted(tags)
+
+
+def iter_menu_records(database_path) -> Iterator[Dict]:
+    """Satu record RAG (tanpa embedding) per menu, kantin demi kantin"""
+    with open(database_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for canteen in data.get("ugm_canteens", []):
+        for menu in canteen.get("menus", []):
+            yield {
+                "id": make_food_id(canteen["canteen_name"], menu["name"]),
+                "name": menu["name"],
+                "price": menu.get("price"),
+                "category": menu.get("category"),
+                "suitability": menu.get("suitability", []),
+                "canteen_name": canteen["canteen_name"],
+                "faculty_proximity": canteen.get("faculty_proximity", []),
+                "gmaps_link": canteen.get("gmaps_link"),
+                "tags": make_tags(canteen, menu),
+            }
+
+
+def content_hash(text: str, model_id: str) -> str:
+    return hashlib.sha1(f"{model_id}\n{text}".encode("utf-8")).hexdigest()[:16]
+
+
+def load_previous(output_path) -> Dict[str, Tuple[str, List[float]]]:
+    """id -> (content_hash, embedding) dari output sebelumnya (kalau ada)"""
+    if not os.path.exists(output_path):
+        return {}
+    try:
+        with open(output_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️ Output lama tidak bisa dibaca, encode ulang semua: {e}")
+        return {}
+    foods = data if isinstance(data, list) else data.get("foods", [])
+    return {
+        food["id"]: (food["content_hash"], food["embedding"])
+        for food in foods
+        if food.get("id") and food.get("content_hash") and food.get("embedding")
+    }
+
+
+# ===== process pool (hanya encoder fallback; model transformer tidak di-fork) =====
+_worker_generator: Optional[EmbeddingGenerator] = None
+
+
+def _init_worker(model_name: str):
+    global _worker_generator
+    _worker_generator = EmbeddingGenerator(model_name)
+
+
+def _encode_batch(texts: List[str]) -> List[List[float]]:
+    generator = _worker_generator or embedding_generator
+    return as_rows(generator.encode(texts))
+
+
+class _DoneFuture(Future):
+    def __init__(self, value):
+        super().__init__()
+        self.set_result(value)
+
+
+def ingest(
+    database_path="data/database.json",
+    output_path="data/rag_database.json",
+    batch_size: int = 256,
+    workers: int = 0,
+    force: bool = False,
+    build_store: bool = False,
+) -> Dict:
+    """
+    Bangun RAG database. Return statistik: rows, encoded, skipped, seconds, rows_per_sec.
+    `workers` > 1 -> process pool untuk encoder fallback; `force` -> abaikan hash lama.
+    """
+    model_id = embedding_generator.model_id  # load model di luar hitungan throughput
+    start = time.perf_counter()
+    previous = {} if force else load_previous(output_path)
+
+    pool = None
+    if workers > 1:
+        if model_id == FALLBACK_MODEL_ID:
+            pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(embedding_generator.model_name,))
+        else:
+            logger.info("ℹ️ Model transformer sudah batch sendiri, process pool tidak dipakai.")
+
+    stats = {"rows": 0, "encoded": 0, "skipped": 0}
+    out_path = Path(output_path)
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+
+    # window = record berurutan (sebagian menunggu embedding) + future batch-nya
+    inflight: "deque[Tuple[List[Dict], Future]]" = deque()
+    max_inflight = max(2, workers * 2)
+
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        out.write("[")
+        first = True
+
+        def flush_oldest():
+            nonlocal first
+            window, future = inflight.popleft()
+            vectors = iter(future.result())
+            for record in window:
+                if "embedding" not in record:
+                    record["embedding"] = [float(x) for x in next(vectors)]
+                # satu record per baris; tanpa indent json pakai encoder C (jauh lebih cepat)
+                out.write(("\n" if first else ",\n") + json.dumps(record, ensure_ascii=False))
+                first = False
+
+        def submit(window: List[Dict], texts: List[str]):
+            if not texts:
+                inflight.append((window, _DoneFuture([])))
+            elif pool is not None:
+                inflight.append((window, pool.submit(_encode_batch, texts)))
+            else:
+                inflight.append((window, _DoneFuture(_encode_batch(texts))))
+            while len(inflight) > max_inflight or (pool is None and inflight):
+                flush_oldest()
+
+        window: List[Dict] = []
+        texts: List[str] = []
+        try:
+            for record in iter_menu_records(database_path):
+                stats["rows"] += 1
+                text = normalize_text(food_document_text(record))
+                record["content_hash"] = content_hash(text, model_id)
+                cached = previous.get(record["id"])
+                if cached and cached[0] == record["content_hash"]:
+                    record["embedding"] = cached[1]
+                    stats["skipped"] += 1
+                else:
+                    texts.append(text)
+                    stats["encoded"] += 1
+                window.append(record)
+                if len(texts) >= batch_size:
+                    submit(window, texts)
+                    window, texts = [], []
+            submit(window, texts)
+            while inflight:
+                flush_oldest()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        out.write("\n]\n")
+
+    os.replace(tmp_path, out_path)
+    if build_store:
+        build_binary_store(out_path)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    logger.info(
+        f"✅ Ingest selesai: {stats['rows']} baris ({stats['encoded']} di-encode, "
+        f"{stats['skipped']} di-skip) dalam {stats['seconds']:.2f}s = {stats['rows_per_sec']:.0f} baris/detik"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="data/database.json")
+    parser.add_argument("--output", default="data/rag_database.json")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=0, help="process pool untuk encoder fallback")
+    parser.add_argument("--force", action="store_true", help="encode ulang semua baris")
+    parser.add_argument("--build-store", action="store_true", help="sekalian build binary store (.npy)")
+    args = parser.parse_args()
+    ingest(args.database, args.output, args.batch_size, args.workers, args.force, args.build_store)
@@ -0,0 +1,102 @@
+"""
+BM25 inverted index untuk nama menu, tags dan nama kantin.
+
+TF-IDF fallback di embeddings.py cuma kenal ~40 kata, jadi query seperti
+"gado-gado" atau "nasi ramesan" sering jadi vektor nol. Index ini dibangun
+saat load database dan skornya di-fuse dengan skor dense (RRF) di
+RetrievalEngine. Skor BM25 per posting sudah dihitung di awal, jadi query
+cukup lookup posting list + bincount.
+"""
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+# kata umum di chat user yang tidak membantu mencari menu
+STOPWORDS = frozenset({
+    "aja", "aku", "ada", "apa", "atau", "buat", "cari", "dan", "dari", "deh", "di",
+    "dong", "dengan", "enak", "ga", "gak", "gw", "ingin", "ini", "itu", "kak", "ke",
+    "lagi", "mamang", "mang", "mau", "makan", "makanan", "nggak", "nih", "pengen",
+    "pingin", "rekomendasi", "saya", "sih", "tolong", "untuk", "yang", "yg",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, pecah di tanda baca/strip ("gado-gado" -> gado, gado), buang stopword"""
+    return [t for t in _TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def lexical_text(food: Dict) -> str:
+    """Field yang di-index: nama, tags, nama kantin"""
+    parts = [food.get("name"), food.get("canteen_name") or food.get("canteen")]
+    parts += food.get("tags") or []
+    return " ".join(str(p) for p in parts if p)
+
+
+class BM25Index:
+    """Okapi BM25 di atas dokumen pendek; id dokumen = posisi di list input"""
+
+    def __init__(self, documents: Iterable[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        doc_tokens = [tokenize(doc) for doc in documents]
+        self.n_docs = len(doc_tokens)
+        lengths = np.asarray([len(tokens) for tokens in doc_tokens], dtype=np.float64)
+        avgdl = float(lengths.mean()) if self.n_docs and lengths.sum() else 1.0
+
+        tf: Dict[str, Dict[int, int]] = {}
+        for doc_id, tokens in enumerate(doc_tokens):
+            for token in tokens:
+                counts = tf.setdefault(token, {})
+                counts[doc_id] = counts.get(doc_id, 0) + 1
+
+        # term -> (doc ids terurut, bobot BM25 per doc)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, counts in tf.items():
+            docs = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            freqs = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+            idf = math.log(1.0 + (self.n_docs - docs.size + 0.5) / (docs.size + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * lengths[docs] / avgdl)
+            weights = idf * freqs * (self.k1 + 1.0) / (freqs + norm)
+            self.postings[term] = (docs, weights.astype(np.float32))
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def search(self, query: str, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dokumen yang mengandung minimal satu term query.
+        Return (doc ids, skor) terurut skor tertinggi dulu (tie -> doc id kecil dulu).
+        `rows` opsional: batasi ke subset doc id (hasil pre-filter).
+        """
+        hits = [self.postings[t] for t in set(tokenize(query)) if t in self.postings]
+        if not hits:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        docs = np.concatenate([h[0] for h in hits])
+        weights = np.concatenate([h[1] for h in hits])
+        uniq, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights).astype(np.float32)
+        if rows is not None:
+            keep = np.isin(uniq, rows, assume_unique=True)
+            uniq, scores = uniq[keep], scores[keep]
+        order = np.lexsort((uniq, -scores))
+        return uniq[order], scores[order]
+
+    def match_all(self, query: str) -> Optional[np.ndarray]:
+        """
+        Doc ids yang mengandung SEMUA term query (terurut), atau None kalau
+        query kosong / ada term yang tidak dikenal (query ambigu).
+        """
+        terms = set(tokenize(query))
+        if not terms or any(t not in self.postings for t in terms):
+            return None
+        lists = sorted((self.postings[t][0] for t in terms), key=len)
+        docs = lists[0]
+        for other in lists[1:]:
+            docs = np.intersect1d(docs, other, assume_unique=True)
+        return docs
@@ -0,0 +1,116 @@
+"""
+Penyimpanan embedding terkuantisasi (float16 / int8) untuk RetrievalEngine.
+
+Ranking cosine tidak butuh presisi double: float16 memotong memori matrix
+jadi 1/2 dari float32, int8 (skala simetris per vektor) jadi ~1/4. Scoring
+dilakukan per chunk: blok baris di-dequantize ke float32 lalu matmul, jadi
+memori sementara tetap kecil dan tetap lewat BLAS.
+
+Catatan: cast float16 -> float32 di NumPy tidak pakai instruksi F16C, jadi
+scoring float16 beberapa kali lebih lambat dari float32. Kalau latency
+penting, int8 lebih cocok (cast-nya murah, memori paling kecil).
+"""
+from typing import Optional, Union
+
+import numpy as np
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+_CHUNK = 8192
+
+IndexLike = Union[int, slice, np.ndarray]
+
+
+class QuantizedMatrix:
+    """Matrix embedding (n, d) terkuantisasi; baris dibaca kembali sebagai float32"""
+
+    def __init__(self, data: np.ndarray, scale: Optional[np.ndarray] = None):
+        self.data = data
+        self.scale = scale  # (n,) float32, hanya untuk int8
+
+    @classmethod
+    def from_float(cls, matrix: np.ndarray, dtype: str) -> "QuantizedMatrix":
+        if dtype == "float16":
+            return cls(np.asarray(matrix, dtype=np.float16))
+        if dtype != "int8":
+            raise ValueError(f"dtype kuantisasi tidak dikenal: {dtype}")
+
+        data = np.empty(matrix.shape, dtype=np.int8)
+        scale = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], _CHUNK):
+            block = np.asarray(matrix[start:start + _CHUNK], dtype=np.float32)
+            s = np.abs(block).max(axis=1) / 127.0
+            s[s == 0] = 1.0
+            data[start:start + _CHUNK] = np.rint(block / s[:, None]).astype(np.int8)
+            scale[start:start + _CHUNK] = s
+        return cls(data, scale)
+
+    @property
+    def dtype(self) -> str:
+        return str(self.data.dtype)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def __getitem__(self, idx: IndexLike) -> np.ndarray:
+        """Baris yang diminta, di-dequantize ke float32"""
+        block = self.data[idx].astype(np.float32)
+        if self.scale is None:
+            return block
+        scale = self.scale[idx]
+        return block * (scale[..., None] if np.ndim(scale) else scale)
+
+    def dot(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        `queries @ matrix[rows].T` per chunk. Query 1-D -> (n,), 2-D -> (m, n);
+        sama dengan hasil matmul biasa terhadap matrix float32.
+        """
+        query_mat = np.asarray(queries, dtype=np.float32)
+        single = query_mat.ndim == 1
+        query_mat = np.atleast_2d(query_mat)
+        n = self.data.shape[0] if rows is None else rows.size
+
+        out = np.empty((query_mat.shape[0], n), dtype=np.float32)
+        for start in range(0, n, _CHUNK):
+            idx = slice(start, start + _CHUNK) if rows is None else rows[start:start + _CHUNK]
+            part = query_mat @ self.data[idx].astype(np.float32).T
+            if self.scale is not None:
+                part *= self.scale[idx]
+            out[:, start:start + part.shape[1]] = part
+        return out[0] if single else out
+
+    # ===== update copy-on-write (dipakai upsert/remove) =====
+    def with_row(self, row: int, vec: np.ndarray) -> "QuantizedMatrix":
+        one = QuantizedMatrix.from_float(vec[None, :], self.dtype)
+        data = self.data.copy()
+        data[row] = one.data[0]
+        scale = None
+        if self.scale is not None:
+            scale = self.scale.copy()
+            scale[row] = one.scale[0]
+        return QuantizedMatrix(data, scale)
+
+    def append(self, vec: np.ndarray) -> "QuantizedMatrix":
+        one = QuantizedMatrix.from_float(vec[None, :], self.dtype)
+        scale = None if self.scale is None else np.concatenate([self.scale, one.scale])
+        return QuantizedMatrix(np.vstack([self.data, one.data]), scale)
+
+    def take(self, rows: np.ndarray) -> "QuantizedMatrix":
+        scale = None if self.scale is None else self.scale[rows]
+        return QuantizedMatrix(self.data[rows], scale)
+
+
+def quantize(matrix: np.ndarray, dtype: str = "float32"):
+    """float32 -> dikembalikan apa adanya, float16/int8 -> QuantizedMatrix"""
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"dtype harus salah satu dari {SUPPORTED_DTYPES}, bukan {dtype!r}")
+    if dtype == "float32" or isinstance(matrix, QuantizedMatrix):
+        return matrix
+    return QuantizedMatrix.from_float(matrix, dtype)
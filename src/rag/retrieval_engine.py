@@ -1,45 +1,596 @@
 """
 RAG Retrieval Engine Module
-- Load RAG database (JSON)
+- Load RAG database (binary store memmap, fallback JSON)
+- Bangun matrix embedding (float32, sudah dinormalisasi) sekali saat load
 - Generate embedding untuk user query
-- Cari hasil paling mirip berdasarkan cosine similarity
+- Pre-filter kandidat (faculty, waktu, harga) pakai index yang dibangun saat load
+- Cari hasil paling mirip berdasarkan cosine similarity (satu matrix-vector product)
+- Opsional: ANN index (IVF / IVF-PQ) untuk katalog besar, lihat src/rag/ann_index.py
+- Opsional: matrix disimpan & diskor sebagai float16 / int8 (lihat src/rag/quantization.py)
+- Hybrid retrieval: BM25 (nama, tags, kantin) di-fuse dengan skor dense pakai
+  reciprocal-rank fusion; query yang semua term-nya dikenal cukup skor baris di posting list.
+- Update inkremental (upsert/remove) + hot reload saat file database berubah.
+  Semua index ada di satu IndexSnapshot immutable; update membangun snapshot
+  baru lalu di-swap atomik, request yang sedang jalan tetap pakai snapshot lama.
 """
 
 import json
 import logging
+import threading
+from bisect import bisect_right
 import numpy as np
-from typing import List, Dict, Optional
-from src.rag.embeddings import get_embedding
-from src.rag.similarity import cosine_similarity
+from typing import List, Dict, Optional, Tuple, Union
+from src.rag.embeddings import get_embedding, get_embeddings, uses_fallback_embeddings
+from src.rag.ann_index import IVFIndex
+from src.rag.lexical import BM25Index, lexical_text
+from src.rag.quantization import QuantizedMatrix, quantize
+from src.rag.vector_store import (
+    ann_index_path, load_binary_store, normalize_rows, source_signature, stack_embeddings
+)
 
 logger = logging.getLogger(__name__)
 
+# hybrid search: hit BM25 dipakai kalau skornya >= rasio ini x skor BM25 terbaik query
+LEXICAL_MIN_RATIO = 0.5
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Ambil index top-k skor tertinggi pakai argpartition.
+    Urutan: skor menurun, kalau seri pakai index terkecil dulu
+    (sama dengan sort stabil di implementasi lama).
+    """
+    if top_k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if scores.size > top_k:
+        kth = scores.size - top_k
+        cutoff = scores[np.argpartition(scores, kth)[kth]]
+        # ikutkan semua yang seri di batas supaya tie-break tetap deterministik
+        candidates = np.flatnonzero(scores >= cutoff)
+    else:
+        candidates = np.arange(scores.size)
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:top_k]
+
+
+def _tied_ranks(sorted_scores: np.ndarray) -> np.ndarray:
+    """Rank 0-based untuk skor yang sudah terurut turun; skor sama dapat rank sama"""
+    return np.searchsorted(-sorted_scores, -sorted_scores, side="left")
+
+
+def food_id(food: Dict) -> str:
+    """ID unik makanan di RAG database (fallback ke nama kalau tidak ada id)"""
+    return str(food.get("id") or food.get("name"))
+
+
+def food_document_text(food: Dict) -> str:
+    """Teks dokumen yang di-embed untuk satu makanan"""
+    parts = [food.get("name"), food.get("canteen_name") or food.get("canteen"), food.get("category")]
+    parts += food.get("tags") or []
+    parts += food.get("suitability") or []
+    return " ".join(str(p) for p in parts if p)
+
+
+class IndexSnapshot:
+    """
+    Semua state search untuk satu versi database: foods, matrix embedding,
+    index pre-filter dan (opsional) ANN. Tidak pernah diubah setelah dibuat.
+    """
+
+    def __init__(
+        self,
+        foods: List[Dict],
+        matrix: Optional[np.ndarray] = None,
+        row_food: Optional[List[int]] = None,
+        source: Optional[Dict] = None,
+        ann: Optional[IVFIndex] = None,
+        lexical: bool = True,
+    ):
+        """
+        Baris ke-i di matrix = foods[row_food[i]].
+        Kalau `matrix` None, dibangun dari field "embedding" tiap food
+        (food tanpa embedding / dimensi beda di-skip, sama seperti dulu);
+        list embedding lalu dibuang dari dict food supaya tidak disimpan dua kali.
+        Kalau `matrix` sudah ada (binary store), dipakai langsung tanpa copy.
+        `lexical=True` -> bangun BM25 index sejajar baris matrix.
+        """
+        if matrix is None:
+            matrix, row_food = stack_embeddings(foods)
+            foods = [{k: v for k, v in food.items() if k != "embedding"} for food in foods]
+        self.foods = foods
+        self.matrix = matrix
+        self.source = source
+        self.ann = ann
+        self.food_ids = {food_id(f): i for i, f in enumerate(foods)}
+        self._set_metadata(row_food)
+        self.lexical = BM25Index(lexical_text(foods[i]) for i in self.row_food) if lexical else None
+
+    def _set_metadata(self, row_food: List[int]):
+        """
+        Array metadata paralel dengan baris matrix + index struktural
+        untuk pre-filter sebelum vector math:
+        - faculty -> row ids
+        - time period (suitability) -> row ids
+        - harga terurut (dicari pakai bisect) -> row ids
+        """
+        self.row_food = np.asarray(row_food, dtype=np.int64)
+        self.food_row = {int(food_idx): row for row, food_idx in enumerate(self.row_food)}
+        rows = [self.foods[i] for i in row_food]
+
+        faculty_rows: Dict[str, List[int]] = {}
+        period_rows: Dict[str, List[int]] = {}
+        anytime_rows: List[int] = []
+        for row, food in enumerate(rows):
+            for faculty in set(food.get("faculty_proximity") or []):
+                faculty_rows.setdefault(faculty, []).append(row)
+            periods = set(food.get("suitability") or [])
+            if not periods:
+                # tanpa info suitability = dianggap bisa kapan saja
+                anytime_rows.append(row)
+            for period in periods:
+                period_rows.setdefault(period, []).append(row)
+
+        self.anytime_rows = np.asarray(anytime_rows, dtype=np.int64)
+        self.faculty_rows = {k: np.asarray(v, dtype=np.int64) for k, v in faculty_rows.items()}
+        self.period_rows = {
+            k: np.union1d(np.asarray(v, dtype=np.int64), self.anytime_rows) for k, v in period_rows.items()
+        }
+
+        prices = np.asarray([food.get("price") or 0 for food in rows], dtype=np.float64)
+        self.price_order = np.argsort(prices, kind="stable")
+        self.sorted_prices = prices[self.price_order].tolist()
+
+    @property
+    def n_rows(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def candidate_rows(self, context: Optional[Dict]) -> Optional[np.ndarray]:
+        """
+        Row ids (terurut) yang lolos filter budget/faculty/time_period.
+        None = tidak ada filter, semua baris jadi kandidat.
+        """
+        if not context:
+            return None
+
+        candidates = []
+        budget = context.get("budget")
+        if budget:
+            cut = bisect_right(self.sorted_prices, budget)
+            candidates.append(np.sort(self.price_order[:cut]))
+
+        faculty = context.get("faculty")
+        if faculty:
+            candidates.append(self.faculty_rows.get(faculty, np.empty(0, dtype=np.int64)))
+
+        period = context.get("time_period")
+        if period:
+            candidates.append(self.period_rows.get(period, self.anytime_rows))
+
+        if not candidates:
+            return None
+        # intersect dari yang paling kecil dulu
+        candidates.sort(key=len)
+        rows = candidates[0]
+        for other in candidates[1:]:
+            if rows.size == 0:
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def score(self, query_emb, rows: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Cosine similarity query terhadap baris kandidat (`rows`, default semua).
+        1 query -> satu matvec; banyak query -> satu matmul (m, n).
+        """
+        query_mat = np.asarray(query_emb, dtype=np.float32)
+        if query_mat.shape[-1] != self.dim:
+            logger.error(f"❌ Dimensi query ({query_mat.shape[-1]}) != dimensi database ({self.dim}).")
+            return None
+        query_mat = normalize_rows(query_mat)
+        if isinstance(self.matrix, QuantizedMatrix):
+            return self.matrix.dot(query_mat, rows)
+        if rows is None:
+            return query_mat @ self.matrix.T
+        if rows.size * 2 > self.n_rows:
+            # filter longgar: gather subset lebih mahal dari scan penuh
+            return (query_mat @ self.matrix.T)[..., rows]
+        return query_mat @ self.matrix[rows].T
+
+    def query_vector(self, query_emb) -> Optional[np.ndarray]:
+        """Query embedding float32 ternormalisasi, None kalau dimensinya beda"""
+        query_vec = np.asarray(query_emb, dtype=np.float32).reshape(-1)
+        if query_vec.shape[0] != self.dim:
+            return None
+        return normalize_rows(query_vec)
+
+    def dense_candidates(
+        self,
+        query_emb,
+        top_k: int,
+        rows: Optional[np.ndarray] = None,
+        nprobe: Optional[int] = None,
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(row ids, skor cosine) kandidat dense: ANN kalau aktif & filter longgar, selain itu exact"""
+        if self.ann is not None and (rows is None or rows.size * 2 > self.n_rows):
+            query_vec = self.query_vector(query_emb)
+            if query_vec is not None:
+                return self.ann.search(self.matrix, query_vec, top_k, nprobe, rows)
+
+        scores = self.score(query_emb, rows)
+        if scores is None:
+            return None
+        return (np.arange(self.n_rows) if rows is None else rows), scores
+
+    def search_vector(
+        self,
+        query_emb,
+        top_k: int,
+        min_score: float,
+        rows: Optional[np.ndarray] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Dict]:
+        """Scoring dense satu query"""
+        candidates = self.dense_candidates(query_emb, top_k, rows, nprobe)
+        if candidates is None:
+            return []
+        cand, scores = candidates
+        return self.rank(scores, top_k, min_score, cand)
+
+    def hybrid_search(
+        self,
+        query: str,
+        query_emb,
+        top_k: int,
+        min_score: float,
+        rows: Optional[np.ndarray] = None,
+        nprobe: Optional[int] = None,
+        rrf_k: int = 60,
+        dense_scores: Optional[np.ndarray] = None,
+    ) -> List[Dict]:
+        """
+        Dense + BM25 digabung pakai reciprocal-rank fusion. Kandidat dense harus
+        lolos `min_score` (cosine); kandidat BM25 harus punya skor BM25 minimal
+        `LEXICAL_MIN_RATIO` x skor BM25 terbaik query ini.
+        - tidak ada hit leksikal -> sama persis dengan search_vector
+        - semua term query dikenal & cukup dokumen yang mengandung semuanya
+          -> cukup skor dense baris di posting list (tanpa scan matrix)
+        - selain itu (query ambigu) -> scan dense penuh lalu fuse
+        `dense_scores` opsional: skor dense yang sudah dihitung (sejajar `rows`).
+        """
+        lex_rows, lex_scores = (
+            self.lexical.search(query, rows) if self.lexical is not None
+            else (np.empty(0, dtype=np.int64), None)
+        )
+        if lex_rows.size == 0:
+            if dense_scores is not None:
+                return self.rank(dense_scores, top_k, min_score, rows)
+            return self.search_vector(query_emb, top_k, min_score, rows, nprobe)
+
+        query_vec = self.query_vector(query_emb)
+        exact = self.lexical.match_all(query)
+        if exact is not None and rows is not None:
+            exact = np.intersect1d(exact, rows, assume_unique=True)
+
+        if exact is not None and exact.size >= top_k:
+            # query exact-term: kandidat cukup dari posting list
+            dense_rows = exact
+            dense = self.matrix[exact] @ query_vec if query_vec is not None else np.zeros(exact.size)
+            keep = np.isin(lex_rows, exact, assume_unique=True)
+            lex_rows, lex_scores = lex_rows[keep], lex_scores[keep]
+        elif dense_scores is not None:
+            dense_rows = np.arange(self.n_rows) if rows is None else rows
+            dense = dense_scores
+        else:
+            candidates = self.dense_candidates(query_emb, top_k, rows, nprobe)
+            dense_rows, dense = candidates if candidates is not None else (np.empty(0, dtype=np.int64), np.empty(0))
+
+        # ranking per sumber, kedalaman terbatas. min_score (cosine) hanya untuk dense;
+        # hit BM25 disaring dengan skor BM25-nya sendiri (relatif ke hit terbaik),
+        # karena query nama persis justru yang embedding fallback-nya nol
+        depth = max(top_k * 10, 50)
+        keep = np.flatnonzero(dense >= min_score)
+        dense_best = keep[top_k_indices(dense[keep], depth)]
+        dense_ranked = dense_rows[dense_best]
+        keep = lex_scores[:depth] >= LEXICAL_MIN_RATIO * lex_scores[0]
+        lex_ranked, lex_top = lex_rows[:depth][keep], lex_scores[:depth][keep]
+
+        union = np.union1d(dense_ranked, lex_ranked)
+        fused = np.zeros(union.size)
+        fused[np.searchsorted(union, dense_ranked)] += 1.0 / (rrf_k + 1 + _tied_ranks(dense[dense_best]))
+        lex_pos = np.searchsorted(union, lex_ranked)
+        fused[lex_pos] += 1.0 / (rrf_k + 1 + _tied_ranks(lex_top))
+        lexical = np.zeros(union.size)
+        lexical[lex_pos] = lex_top
+        similarity = self.matrix[union] @ query_vec if query_vec is not None else np.zeros(union.size)
+
+        order = np.lexsort((union, -similarity, -fused))[:top_k]
+        return [
+            self.format_result(
+                union[i], similarity[i], lexical_score=float(lexical[i]), fused_score=float(fused[i])
+            )
+            for i in order
+        ]
+
+    def rank(
+        self,
+        scores: np.ndarray,
+        top_k: int,
+        min_score: float,
+        rows: Optional[np.ndarray] = None
+    ) -> List[Dict]:
+        """Buang yang di bawah threshold lalu ambil top-k. `scores` sejajar `rows` (default semua baris)"""
+        keep = np.flatnonzero(scores >= min_score)
+        best = keep[top_k_indices(scores[keep], top_k)]
+        row_ids = best if rows is None else rows[best]
+        return [self.format_result(row, score) for row, score in zip(row_ids, scores[best])]
+
+    def format_result(self, row: int, score: float, **extra) -> Dict:
+        food = self.foods[self.row_food[row]]
+        return {
+            "name": food.get("name"),
+            "canteen": food.get("canteen") or food.get("canteen_name"),
+            "price": food.get("price"),
+            "tags": food.get("tags"),
+            "suitability": food.get("suitability"),
+            "gmaps_link": food.get("gmaps_link"),
+            "similarity_score": float(score),
+            **extra
+        }
+
+
 class RetrievalEngine:
     """Lightweight RAG search engine untuk makanan"""
 
-    def __init__(self, rag_db_path: str = "data/rag_database.json"):
+    def __init__(
+        self,
+        rag_db_path: str = "data/rag_database.json",
+        use_ann: bool = False,
+        nprobe: int = 8,
+        ann_min_rows: int = 20000,
+        ann_pq_m: int = 0,
+        dtype: str = "float32",
+        hybrid: Optional[bool] = None,
+        rrf_k: int = 60,
+    ):
+        """
+        Args:
+            rag_db_path: path RAG database JSON
+            use_ann: pakai ANN index kalau katalog >= `ann_min_rows` baris
+            nprobe: jumlah cluster IVF yang discan per query (recall vs latency)
+            ann_pq_m: jumlah sub-vektor PQ (0 = IVF-Flat tanpa kompresi)
+            dtype: presisi matrix embedding di memori: "float32", "float16" atau "int8"
+            hybrid: fuse skor dense dengan BM25 (nama, tags, kantin); None = otomatis,
+                    aktif kalau embedding memakai TF-IDF fallback (banyak query jadi vektor nol)
+            rrf_k: konstanta reciprocal-rank fusion
+        """
         self.rag_db_path = rag_db_path
-        self.foods = self._load_database()
+        self.nprobe = nprobe
+        self.use_ann = use_ann
+        self.ann_min_rows = ann_min_rows
+        self.ann_pq_m = ann_pq_m
+        self.dtype = dtype
+        self.hybrid = uses_fallback_embeddings() if hybrid is None else hybrid
+        self.rrf_k = rrf_k
+
+        self._write_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watcher = threading.Event()
+        self._snapshot = self._load_snapshot()
+
+    # ========================== LOADING ==========================
+    @property
+    def foods(self) -> List[Dict]:
+        return self._snapshot.foods
+
+    @property
+    def _matrix(self) -> np.ndarray:
+        return self._snapshot.matrix
+
+    @property
+    def _ann(self) -> Optional[IVFIndex]:
+        return self._snapshot.ann
+
+    def _load_snapshot(self) -> IndexSnapshot:
+        """Load database dari disk jadi snapshot baru (belum di-swap)"""
+        source = source_signature(self.rag_db_path)
+        foods, matrix, row_food = self._load_database()
+        snapshot = IndexSnapshot(foods, matrix, row_food, source=source, lexical=self.hybrid)
+        snapshot.matrix = quantize(snapshot.matrix, self.dtype)
+        if self.use_ann and snapshot.n_rows >= self.ann_min_rows:
+            snapshot.ann = self._load_ann_index(snapshot)
+        return snapshot
+
+    def _load_database(self) -> Tuple[List[Dict], Optional[np.ndarray], Optional[List[int]]]:
+        """
+        Load database makanan.
+        Fast path: binary store (.npy memmap + .meta.json), lihat src/rag/vector_store.py.
+        Slow path: parse JSON lengkap dengan embedding list float.
+        Return (foods, matrix, row_food); matrix None berarti dibangun dari JSON.
+        """
+        store = load_binary_store(self.rag_db_path)
+        if store is not None:
+            foods, matrix, row_food = store
+            logger.info(f"✅ Loaded {len(foods)} foods from binary RAG store (memmap)")
+            return foods, matrix, row_food
 
-    def _load_database(self) -> List[Dict]:
-        """Load database makanan dari file JSON"""
         try:
             with open(self.rag_db_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
 
             # Bisa format lama (dict) atau baru (list)
-                if isinstance(data, list):
-                    foods = data
-                else:
-                    foods = data.get("foods", [])
+            if isinstance(data, list):
+                foods = data
+            else:
+                foods = data.get("foods", [])
 
-                logger.info(f"✅ Loaded {len(foods)} foods from RAG database")
-                return foods
+            logger.info(f"✅ Loaded {len(foods)} foods from RAG database")
+            return foods, None, None
         except Exception as e:
             logger.error(f"❌ Failed to load RAG database: {e}")
-            return []
+            return [], None, None
+
+    def _load_ann_index(self, snapshot: IndexSnapshot) -> Optional[IVFIndex]:
+        """Load ANN index dari disk kalau masih cocok, kalau tidak train ulang lalu simpan"""
+        path = ann_index_path(self.rag_db_path)
+        expected = {
+            "rows": str(snapshot.n_rows),
+            "dim": str(snapshot.dim),
+            "pq_m": str(self.ann_pq_m),
+            "source": str(snapshot.source),
+        }
+        index = IVFIndex.load(path)
+        if index is not None and index.meta == expected:
+            logger.info(f"✅ Loaded ANN index ({index.nlist} lists) dari {path}")
+            return index
+
+        try:
+            index = IVFIndex(nprobe=self.nprobe, pq_m=self.ann_pq_m).train(snapshot.matrix)
+        except Exception as e:
+            logger.error(f"❌ Gagal training ANN index, pakai exact search: {e}")
+            return None
+        try:
+            index.save(path, **expected)
+        except OSError as e:
+            logger.warning(f"⚠️ ANN index tidak bisa disimpan: {e}")
+        return index
+
+
+    # ========================== INCREMENTAL UPDATE ==========================
+    def _swap(self, snapshot: IndexSnapshot):
+        """Ganti snapshot aktif (assignment atomik; reader lama tetap pegang snapshot lamanya)"""
+        self._snapshot = snapshot
+
+
+    def upsert(self, food: Dict) -> Dict:
+        """
+        Tambah / update satu makanan tanpa rebuild penuh.
+        Embedding hanya dihitung untuk baris ini, dan hanya kalau teks dokumennya
+        berubah (atau `food["embedding"]` dikirim langsung).
+        """
+        with self._write_lock:
+            snap = self._snapshot
+            fid = food_id(food)
+            idx = snap.food_ids.get(fid)
+            row = snap.food_row.get(idx) if idx is not None else None
+
+            emb = food.get("embedding")
+            if emb is None or len(emb) == 0:
+                old = snap.foods[idx] if idx is not None else None
+                if row is not None and food_document_text(old) == food_document_text(food):
+                    emb = snap.matrix[row]
+                else:
+                    emb = get_embedding(food_document_text(food))
+            vec = normalize_rows(np.asarray(emb, dtype=np.float32).reshape(-1))
+            if snap.n_rows and vec.shape[0] != snap.dim:
+                raise ValueError(f"Dimensi embedding {vec.shape[0]} != dimensi database {snap.dim}")
+
+            meta = {k: v for k, v in food.items() if k != "embedding"}
+            foods = list(snap.foods)
+            row_food = snap.row_food.tolist()
+            if idx is None:
+                foods.append(meta)
+                idx = len(foods) - 1
+            else:
+                foods[idx] = meta
 
+            quantized = isinstance(snap.matrix, QuantizedMatrix)
+            if row is None:
+                if snap.n_rows == 0:
+                    matrix = quantize(vec[None, :], self.dtype)
+                elif quantized:
+                    matrix = snap.matrix.append(vec)
+                else:
+                    matrix = np.vstack([snap.matrix, vec[None, :]])
+                row_food.append(idx)
+            elif quantized:
+                matrix = snap.matrix.with_row(row, vec)
+            else:
+                matrix = np.array(snap.matrix)  # copy-on-write (memmap read-only)
+                matrix[row] = vec
+
+            new = IndexSnapshot(foods, matrix, row_food, source=snap.source, lexical=self.hybrid)
+            if snap.ann is not None:
+                # hanya baris ini yang di-assign ke centroid yang sudah ada (tanpa training ulang)
+                target = snap.n_rows if row is None else row
+                new.ann = snap.ann.with_rows(np.array([target]), matrix[target:target + 1])
+            self._swap(new)
+        logger.info(f"🔄 RAG upsert: {fid}")
+        return meta
+
+    def remove(self, food_id_: str) -> bool:
+        """Hapus satu makanan dari index. Return False kalau id tidak ada"""
+        with self._write_lock:
+            snap = self._snapshot
+            idx = snap.food_ids.get(str(food_id_))
+            if idx is None:
+                return False
+
+            foods = snap.foods[:idx] + snap.foods[idx + 1:]
+            keep = snap.row_food != idx
+            row_food = snap.row_food[keep]
+            row_food = np.where(row_food > idx, row_food - 1, row_food).tolist()
+            if isinstance(snap.matrix, QuantizedMatrix):
+                matrix = snap.matrix.take(keep)
+            else:
+                matrix = np.asarray(snap.matrix[keep], dtype=np.float32)
 
+            new = IndexSnapshot(foods, matrix, row_food, source=snap.source, lexical=self.hybrid)
+            if snap.ann is not None and new.n_rows:
+                new.ann = snap.ann.without_rows(keep)
+            self._swap(new)
+        logger.info(f"🗑️ RAG remove: {food_id_}")
+        return True
+
+    # ========================== HOT RELOAD ==========================
+    def reload_if_changed(self, force: bool = False) -> bool:
+        """
+        Reload database kalau file-nya berubah (size/mtime). Snapshot baru dibangun
+        di luar jalur request lalu di-swap; search yang sedang jalan tidak terganggu.
+        Return True kalau snapshot diganti.
+        """
+        if not force and source_signature(self.rag_db_path) == self._snapshot.source:
+            return False
+        # kalau reload lain sedang jalan, biarkan; request tetap pakai snapshot lama
+        if not self._write_lock.acquire(blocking=False):
+            return False
+        try:
+            if not force and source_signature(self.rag_db_path) == self._snapshot.source:
+                return False
+            self._swap(self._load_snapshot())
+        finally:
+            self._write_lock.release()
+        logger.info(f"🔄 RAG database di-reload ({len(self.foods)} foods)")
+        return True
+
+    def start_watcher(self, interval: float = 5.0):
+        """Thread background yang cek mtime database tiap `interval` detik"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_watcher.clear()
+
+        def _watch():
+            while not self._stop_watcher.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    logger.error(f"❌ Gagal reload RAG database: {e}")
+
+        self._watcher = threading.Thread(target=_watch, name="rag-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop_watcher.set()
+        if self._watcher:
+            self._watcher.join(timeout=1)
+            self._watcher = None
+
+    # ========================== SEARCH ==========================
     def search(
         self,
         query: str,
@@ -54,52 +605,88 @@ class RetrievalEngine:
             query: teks masukan user (misal: "mau makan pedas dan gurih")
             top_k: jumlah hasil teratas
             min_score: ambang batas similarity
-            context: optional dict (bisa berisi 'budget' atau 'faculty')
+            context: optional dict (bisa berisi 'budget', 'faculty', 'time_period');
+                     filter diterapkan SEBELUM scoring, jadi cuma subset yang dihitung
         """
-        if not self.foods:
+        snap = self._snapshot  # satu snapshot konsisten untuk seluruh request
+        if not snap.foods:
             logger.warning("⚠️ RAG database kosong.")
             return []
 
+        if snap.n_rows == 0:
+            return []
+
+        rows = snap.candidate_rows(context)
+        if rows is not None and rows.size == 0:
+            return []
+
         query_emb = get_embedding(query)
         if query_emb is None:
             logger.error("❌ Gagal generate embedding query.")
             return []
 
-        results = []
-        for food in self.foods:
-            # pastikan embedding diubah jadi numpy array
-            emb = np.array(food.get("embedding", []), dtype=float)
-            if emb.size == 0:
-                continue
-
-            # ubah query embedding ke numpy array juga
-            query_vec = np.array(query_emb, dtype=float)
+        if self.hybrid:
+            return snap.hybrid_search(query, query_emb, top_k, min_score, rows, self.nprobe, self.rrf_k)
+        return snap.search_vector(query_emb, top_k, min_score, rows, self.nprobe)
 
-    # hitung cosine similarity
-            score = cosine_similarity(query_vec.reshape(1, -1), emb.reshape(1, -1))[0][0]
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        min_score: float = 0.3,
+        context: Optional[Union[Dict, List[Optional[Dict]]]] = None
+    ) -> List[List[Dict]]:
+        """
+        Retrieval untuk banyak query sekaligus (evaluasi offline, warm-up cache,
+        shortlist kandidat). Semua query di-embed dalam satu batch encode; query
+        tanpa filter diskor bareng dengan satu matrix-matrix product, query
+        dengan filter cuma menghitung subset kandidatnya.
 
-    # Optional context filter
-            if context:
-                budget = context.get("budget")
-                faculty = context.get("faculty")
+        Args:
+            queries: list teks query
+            top_k / min_score: sama seperti `search`
+            context: satu dict untuk semua query, atau list dict sejajar `queries`
+        Returns:
+            list hasil per query (urutan sama dengan `queries`)
+        """
+        if not queries:
+            return []
+        snap = self._snapshot
+        if not snap.foods or snap.n_rows == 0:
+            logger.warning("⚠️ RAG database kosong.")
+            return [[] for _ in queries]
 
-                if budget and food.get("price", 0) > budget:
-                    continue
-                if faculty and faculty not in food.get("faculty_proximity", []):
-                    continue
+        contexts = context if isinstance(context, list) else [context] * len(queries)
+        if len(contexts) != len(queries):
+            raise ValueError("Panjang context harus sama dengan jumlah queries")
 
-            if score >= min_score:
+        query_embs = np.asarray(get_embeddings(queries), dtype=np.float32)
+        if query_embs.ndim != 2 or query_embs.shape[1] != snap.dim:
+            logger.error("❌ Dimensi embedding query tidak cocok dengan database.")
+            return [[] for _ in queries]
 
-            
-                results.append({
-                    "name": food.get("name"),
-                    "canteen": food.get("canteen"),
-                    "price": food.get("price"),
-                    "tags": food.get("tags"),
-                    "similarity_score": float(score)
-                })
+        candidate_rows = [snap.candidate_rows(ctx) for ctx in contexts]
+        results: List[List[Dict]] = [[] for _ in queries]
 
+        # tanpa ANN, query tanpa filter diskor bareng dalam satu matmul
+        unfiltered = [i for i, rows in enumerate(candidate_rows) if rows is None and snap.ann is None]
+        if unfiltered:
+            scores = snap.score(query_embs[unfiltered])
+            for i, row_scores in zip(unfiltered, scores):
+                if self.hybrid:
+                    results[i] = snap.hybrid_search(
+                        queries[i], query_embs[i], top_k, min_score, rrf_k=self.rrf_k, dense_scores=row_scores
+                    )
+                else:
+                    results[i] = snap.rank(row_scores, top_k, min_score)
 
-        # Urutkan berdasar skor tertinggi
-        results.sort(key=lambda x: x["similarity_score"], reverse=True)
-        return results[:top_k]
+        for i, rows in enumerate(candidate_rows):
+            if i in unfiltered or (rows is not None and rows.size == 0):
+                continue
+            if self.hybrid:
+                results[i] = snap.hybrid_search(
+                    queries[i], query_embs[i], top_k, min_score, rows, self.nprobe, self.rrf_k
+                )
+            else:
+                results[i] = snap.search_vector(query_embs[i], top_k, min_score, rows, self.nprobe)
+        return results
@@ -1,15 +1,29 @@
 """
 Similarity calculations for RAG retrieval
 """
+import hashlib
 import numpy as np
-from typing import List, Tuple, Dict
-from sklearn.metrics.pairwise import cosine_similarity
-from src.rag.embeddings import get_embedding  # pakai generator resmi
+from typing import List, NamedTuple, Tuple, Dict, Optional
+from src.rag.embedding_cache import EmbeddingCache, normalize_text
+from src.rag.embeddings import get_embeddings  # pakai generator resmi
+from src.rag.retrieval_engine import top_k_indices
+from src.rag.vector_store import normalize_rows
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def cosine_similarity(X, Y: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Pairwise cosine similarity antar baris X dan Y (default Y = X).
+    Pengganti ringan sklearn.metrics.pairwise.cosine_similarity supaya
+    import modul ini tidak ikut load scikit-learn. Baris nol -> skor 0.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    Y = X if Y is None else np.atleast_2d(np.asarray(Y, dtype=float))
+    return normalize_rows(X) @ normalize_rows(Y).T
+
+
 def cosine_similarity_single(vec1: List[float], vec2: List[float]) -> float:
     """
     Calculate cosine similarity between two embedding vectors (0-1)
@@ -33,40 +47,116 @@ def batch_similarity(
     return similarities.tolist()
 
 
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class FittedFoods(NamedTuple):
+    """Hasil `fit` yang tidak pernah diubah lagi: list makanan + matrix ternormalisasinya"""
+    foods: List[Dict]
+    n: int
+    matrix: np.ndarray
+
+
+class FoodSimilarityScorer:
+    """
+    Skor cosine query vs list makanan yang bisa dipakai berulang.
+    - embedding yang belum ada di-encode sekali dalam satu batch, di-memo per content hash
+    - matrix ternormalisasi di-cache; search berikutnya di list yang sama = satu matvec
+    - dict makanan milik caller tidak pernah diubah
+    - aman dipakai banyak thread: hasil fit = `FittedFoods` immutable yang diganti
+      dengan satu assignment, tiap `score` memakai satu state yang konsisten
+    Kalau isi list diubah di tempat (bukan list baru), panggil `fit` lagi.
+    """
+
+    def __init__(self, memo_size: int = 4096):
+        self._memo = EmbeddingCache(max_size=memo_size)
+        self._state: Optional[FittedFoods] = None
+
+    def fit(self, foods: List[Dict]) -> "FoodSimilarityScorer":
+        self._fit(foods)
+        return self
+
+    def _fit(self, foods: List[Dict]) -> FittedFoods:
+        vectors: List[Optional[List[float]]] = [None] * len(foods)
+        missing: Dict[str, Tuple[str, List[int]]] = {}
+        for i, food in enumerate(foods):
+            emb = food.get("embedding")
+            if emb is not None and len(emb):
+                vectors[i] = emb
+                continue
+            text = str(food.get("name", ""))
+            key = _content_hash(text)
+            cached = self._memo.get(key)
+            if cached is not None:
+                vectors[i] = cached
+            else:
+                missing.setdefault(key, (text, []))[1].append(i)
+
+        if missing:
+            keys = list(missing)
+            for key, emb in zip(keys, get_embeddings([missing[k][0] for k in keys])):
+                self._memo.put(key, emb)
+                for i in missing[key][1]:
+                    vectors[i] = emb
+
+        dim = max((len(v) for v in vectors), default=0)
+        matrix = np.zeros((len(vectors), dim), dtype=np.float32)
+        for i, vec in enumerate(vectors):
+            if len(vec) == dim:
+                matrix[i] = vec
+            else:
+                logger.warning(f"⚠️ Dimensi embedding '{foods[i].get('name')}' beda, skor diset 0.")
+        state = FittedFoods(foods, len(foods), normalize_rows(matrix))
+        self._state = state
+        return state
+
+    def score(
+        self,
+        query_embedding: List[float],
+        foods: Optional[List[Dict]] = None,
+        top_k: int = 5,
+        threshold: float = 0.3
+    ) -> List[Tuple[int, float]]:
+        """
+        (index di `foods`, skor) terurut skor tertinggi, hanya yang >= threshold.
+        `foods` None -> pakai list dari `fit` terakhir.
+        """
+        state = self._state  # satu snapshot untuk seluruh call
+        if foods is not None and (state is None or foods is not state.foods or len(foods) != state.n):
+            state = self._fit(foods)
+        if state is None or state.matrix.shape[0] == 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if query.shape[0] != state.matrix.shape[1]:
+            logger.error("❌ Dimensi query tidak cocok dengan embedding makanan.")
+            return []
+        scores = state.matrix @ normalize_rows(query)
+        keep = np.flatnonzero(scores >= threshold)
+        best = keep[top_k_indices(scores[keep], top_k)]
+        return [(int(i), float(scores[i])) for i in best]
+
+
+_default_scorer = FoodSimilarityScorer()
+
+
 def find_similar_foods_fast(
     query_embedding: List[float],
     foods_data: List[Dict],
     top_k: int = 5,
     threshold: float = 0.3
-) -> List[Dict]:
+) -> List[Tuple[int, float]]:
     """
     Optimized similarity search for food recommendations.
-    Auto-generate embedding if missing.
+    Return pasangan (index di foods_data, similarity_score); embedding yang
+    belum ada di-generate sekali (batch) tanpa mengubah foods_data.
     """
     if not foods_data:
         logger.warning("⚠️ No food data provided to similarity search.")
         return []
 
-    embeddings = []
-    valid_foods = []
-
-    for food in foods_data:
-        if "embedding" not in food or not food["embedding"]:
-            food["embedding"] = get_embedding(food["name"])
-        embeddings.append(food["embedding"])
-        valid_foods.append(food)
-
-    similarities = batch_similarity(query_embedding, embeddings)
-
-    results = []
-    for i, score in enumerate(similarities):
-        if score >= threshold:
-            food_copy = valid_foods[i].copy()
-            food_copy["similarity_score"] = float(score)
-            results.append(food_copy)
-
-    results.sort(key=lambda x: x["similarity_score"], reverse=True)
-
+    results = _default_scorer.score(query_embedding, foods_data, top_k, threshold)
     if not results:
         logger.info("ℹ️ No similar foods found above threshold.")
-    return results[:top_k]
+    return results
@@ -0,0 +1,156 @@
+"""
+Binary embedding store untuk RAG database.
+
+`rag_database.json` nyimpen embedding sebagai list float (teks), jadi tiap boot
+harus parse ratusan KB JSON. Modul ini nulis:
+- `<nama>.npy`       : matrix embedding float32 (sudah L2-normalisasi)
+- `<nama>.meta.json` : metadata makanan tanpa embedding + mapping baris
+
+Loader buka `.npy` pakai memmap, jadi beberapa worker share page yang sama.
+
+Build:
+    python -m src.rag.vector_store data/rag_database.json
+"""
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalisasi tiap baris (baris nol dibiarkan nol, sama seperti sklearn)"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def stack_embeddings(foods: List[Dict]) -> Tuple[np.ndarray, List[int]]:
+    """
+    Tumpuk embedding jadi matrix float32 ternormalisasi.
+    Food tanpa embedding (atau dimensi beda) di-skip.
+    Return (matrix, row_food) dengan baris ke-i = foods[row_food[i]].
+    """
+    vectors, row_food = [], []
+    dim = None
+    for idx, food in enumerate(foods):
+        emb = food.get("embedding")
+        if emb is None or len(emb) == 0:
+            continue
+        if dim is None:
+            dim = len(emb)
+        elif len(emb) != dim:
+            logger.warning(f"⚠️ Embedding dimensi beda untuk {food.get('name')}, di-skip.")
+            continue
+        vectors.append(emb)
+        row_food.append(idx)
+
+    if not vectors:
+        return np.empty((0, 0), dtype=np.float32), row_food
+    return normalize_rows(np.asarray(vectors, dtype=np.float32)), row_food
+
+
+def store_paths(json_path) -> Tuple[Path, Path]:
+    """Path file `.npy` dan sidecar metadata untuk RAG database JSON"""
+    base = Path(json_path).with_suffix("")
+    return base.with_suffix(".npy"), base.with_suffix(".meta.json")
+
+
+def ann_index_path(json_path) -> Path:
+    """Path file ANN index (.ann.npz) di sebelah RAG database"""
+    return Path(json_path).with_suffix(".ann.npz")
+
+
+def source_signature(json_path) -> Optional[Dict]:
+    """Ukuran + mtime file sumber, dipakai untuk deteksi artefak yang basi"""
+    try:
+        st = os.stat(json_path)
+    except OSError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def build_binary_store(json_path, foods: Optional[List[Dict]] = None) -> Tuple[Path, Path]:
+    """
+    Tulis embedding dari RAG database JSON ke `.npy` + sidecar metadata.
+    Kalau `foods` sudah di-load, kirim langsung supaya tidak parse ulang.
+    """
+    if foods is None:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        foods = data if isinstance(data, list) else data.get("foods", [])
+
+    matrix, row_food = stack_embeddings(foods)
+    meta_foods = [{k: v for k, v in food.items() if k != "embedding"} for food in foods]
+    npy_path, meta_path = store_paths(json_path)
+
+    # tulis ke file sementara lalu rename, supaya reader tidak lihat file setengah jadi
+    tmp_npy = npy_path.with_suffix(".npy.tmp")
+    with open(tmp_npy, "wb") as f:
+        np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+    os.replace(tmp_npy, npy_path)
+
+    meta = {
+        "version": STORE_VERSION,
+        "dtype": "float32",
+        "normalized": True,
+        "dim": int(matrix.shape[1]) if matrix.size else 0,
+        "count": len(row_food),
+        "source": source_signature(json_path),
+        "rows": row_food,
+        "foods": meta_foods,
+    }
+    tmp_meta = meta_path.with_suffix(".json.tmp")
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_meta, meta_path)
+
+    logger.info(f"✅ Binary store ditulis: {npy_path} ({matrix.nbytes} bytes, {len(row_food)} baris)")
+    return npy_path, meta_path
+
+
+def load_binary_store(json_path) -> Optional[Tuple[List[Dict], np.ndarray, List[int]]]:
+    """
+    Buka binary store kalau ada dan masih sinkron dengan JSON sumbernya.
+    Return (foods, matrix memmap, row_food) atau None (pakai slow path JSON).
+    """
+    npy_path, meta_path = store_paths(json_path)
+    if not npy_path.exists() or not meta_path.exists():
+        return None
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("version") != STORE_VERSION:
+            logger.warning("⚠️ Versi binary store beda, pakai JSON.")
+            return None
+
+        # JSON sumber berubah setelah build -> store basi
+        current = source_signature(json_path)
+        if current is not None and meta.get("source") != current:
+            logger.warning(f"⚠️ Binary store basi ({npy_path}), pakai JSON. Jalankan build ulang.")
+            return None
+
+        matrix = np.load(npy_path, mmap_mode="r")
+        if matrix.shape[0] != meta.get("count"):
+            logger.warning("⚠️ Jumlah baris binary store tidak cocok, pakai JSON.")
+            return None
+
+        return meta["foods"], matrix, meta["rows"]
+    except Exception as e:
+        logger.warning(f"⚠️ Gagal buka binary store: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    src = sys.argv[1] if len(sys.argv) > 1 else "data/rag_database.json"
+    build_binary_store(src)
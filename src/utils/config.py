@@ -47,18 +47,72 @@ class Config:
     GROQ_MODEL_NAME = os.getenv("GROQ_MODEL_NAME", "llama-3.1-8b-instant")
     GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash")
     OPENAI_MODEL_NAME = os.getenv("OPENAI_MODEL_NAME", "gpt-3.5-turbo")
+    GEMINI_OPENAI_BASE_URL = os.getenv("GEMINI_OPENAI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/")
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    # provider yang dipakai router (hanya yang API key-nya ada); urutan pertama = provider utama
+    LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", "gemini,groq,openai")
+    LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "50"))
+    LLM_ROUTER_MAX_ERROR_RATE = float(os.getenv("LLM_ROUTER_MAX_ERROR_RATE", "0.5"))
+    # reasoning: panggil provider kedua kalau provider pertama belum jawab sampai p90-nya
+    LLM_HEDGE_REASONING = os.getenv("LLM_HEDGE_REASONING", "false").lower() == "true"
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "10"))
+    # thread pool hedging jalur sync (primary + backup, maks 2 slot per call yang di-hedge)
+    LLM_HEDGE_MAX_WORKERS = int(os.getenv("LLM_HEDGE_MAX_WORKERS", "8"))
+    # deadline per call (termasuk retry): "decision" = call JSON (memory update & decision)
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "8"))
+    LLM_REASONING_TIMEOUT_SECONDS = float(os.getenv("LLM_REASONING_TIMEOUT_SECONDS", "15"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.25"))
+    # circuit breaker: terbuka setelah N gagal beruntun, dicoba lagi setelah reset
+    LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+    # "sequential": 3 call LLM (memory update, decision, reasoning)
+    # "merged": memory update + decision digabung jadi 1 call terstruktur, lalu reasoning
+    # "concurrent": memory update & decision paralel + prefetch nutrisi
+    AGENT_PIPELINE_MODE = os.getenv("AGENT_PIPELINE_MODE", "sequential")
+    AGENT_MAX_WORKERS = int(os.getenv("AGENT_MAX_WORKERS", "8"))
+    NUTRITION_PREFETCH_LIMIT = int(os.getenv("NUTRITION_PREFETCH_LIMIT", "2"))
+    # jumlah kandidat menu di decision prompt (0 = semua menu di katalog)
+    DECISION_SHORTLIST_SIZE = int(os.getenv("DECISION_SHORTLIST_SIZE", "20"))
+    DECISION_SHORTLIST_MIN_SCORE = float(os.getenv("DECISION_SHORTLIST_MIN_SCORE", "0.05"))
+    # semantic cache decision LLM (query mirip + slot & eksklusi LTM sama)
+    DECISION_CACHE_ENABLED = os.getenv("DECISION_CACHE_ENABLED", "true").lower() == "true"
+    DECISION_CACHE_SIZE = int(os.getenv("DECISION_CACHE_SIZE", "512"))
+    DECISION_CACHE_TTL_SECONDS = float(os.getenv("DECISION_CACHE_TTL_SECONDS", "600"))
+    DECISION_CACHE_MIN_SIMILARITY = float(os.getenv("DECISION_CACHE_MIN_SIMILARITY", "0.92"))
     
     # Embedding settings
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+    EMBEDDING_CACHE_PATH = DATA_DIR / "embedding_cache.npz"
     
     # Memory settings
     SESSION_TIMEOUT_MINUTES = int(os.getenv("SESSION_TIMEOUT_MINUTES", "30"))
     MAX_CONVERSATION_HISTORY = int(os.getenv("MAX_CONVERSATION_HISTORY", "10"))
+    SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))  # 0 = tanpa batas
+    SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "60"))  # 0 = nonaktif
+    # baca sesi tidak menulis; expiry baru diperpanjang kalau terakhir diperpanjang > N detik lalu
+    SESSION_TOUCH_INTERVAL_SECONDS = float(os.getenv("SESSION_TOUCH_INTERVAL_SECONDS", "60"))
+    # "memory" (per proses) atau "sqlite" (file bersama, untuk beberapa worker di satu mesin)
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+    SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", str(DATA_DIR / "sessions.db"))
     
     # RAG settings
     TOP_K_RETRIEVAL = int(os.getenv("TOP_K_RETRIEVAL", "5"))
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.3"))
+    RAG_USE_ANN = os.getenv("RAG_USE_ANN", "false").lower() == "true"
+    RAG_ANN_NPROBE = int(os.getenv("RAG_ANN_NPROBE", "8"))
+    RAG_ANN_MIN_ROWS = int(os.getenv("RAG_ANN_MIN_ROWS", "20000"))
+    RAG_ANN_PQ_M = int(os.getenv("RAG_ANN_PQ_M", "0"))
+    # presisi embedding di memori: float32 | float16 | int8
+    RAG_EMBEDDING_DTYPE = os.getenv("RAG_EMBEDDING_DTYPE", "float32")
+    # true | false | auto (aktif kalau embedding memakai TF-IDF fallback) -> True / False / None
+    RAG_HYBRID_SEARCH = {"true": True, "false": False}.get(os.getenv("RAG_HYBRID_SEARCH", "auto").lower())
+    # cek perubahan rag_database.json tiap N detik lalu hot reload (0 = mati)
+    RAG_RELOAD_INTERVAL_SECONDS = float(os.getenv("RAG_RELOAD_INTERVAL_SECONDS", "30"))
     
     # Bot settings
     BOT_NAME = os.getenv("BOT_NAME", "Mamang Kencot")
@@ -1,3 +1,5 @@
+import asyncio
+import httpx
 import requests
 from deep_translator import GoogleTranslator
 from typing import Dict
@@ -13,6 +15,8 @@ class NutritionTool:
         self.headers = {"X-Api-Key": self.API_KEY}
         # ganti googletrans dengan deep-translator
         self.translator = GoogleTranslator(source='id', target='en')
+        # satu AsyncClient (connection pool) dipakai ulang, dibuat saat call async pertama
+        self._aclient = None
 
     def translate_to_english(self, food_name: str) -> str:
         """Translate food name ke bahasa Inggris"""
@@ -37,3 +41,28 @@ class NutritionTool:
                 return {"error": f"API error: {response.status_code}"}
         except requests.RequestException as e:
             return {"error": str(e)}
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """AsyncClient bersama; dibuat ulang kalau event loop-nya sudah beda (pool terikat ke loop)"""
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient[0] is not loop:
+            # header None (API key belum diset) dibuang, sama seperti requests
+            headers = {k: v for k, v in self.headers.items() if v is not None}
+            self._aclient = (loop, httpx.AsyncClient(timeout=5, headers=headers))
+        return self._aclient[1]
+
+    async def get_nutrition_async(self, food_name: str) -> Dict:
+        """Versi async `get_nutrition` lewat httpx.AsyncClient bersama"""
+        # deep-translator blocking, jadi dijalankan di thread
+        english_name = await asyncio.to_thread(self.translate_to_english, food_name)
+        try:
+            response = await self._async_client().get(self.BASE_URL, params={"query": english_name})
+            if response.status_code == 200:
+                data = response.json()
+                if isinstance(data, list) and len(data) > 0:
+                    return data[0]
+                return {"error": "No data found"}
+            return {"error": f"API error: {response.status_code}"}
+        except (httpx.HTTPError, ValueError) as e:
+            # ValueError: body bukan JSON valid
+            return {"error": str(e)}
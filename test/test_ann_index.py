@@ -0,0 +1,100 @@
+# test/test_ann_index.py
+import json
+import numpy as np
+from unittest.mock import patch
+from src.rag.ann_index import IVFIndex
+from src.rag.retrieval_engine import RetrievalEngine
+from src.rag.vector_store import ann_index_path, normalize_rows
+
+def clustered(n=2000, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    data = centers[rng.integers(0, 20, n)] + 0.3 * rng.normal(size=(n, dim))
+    return normalize_rows(data.astype(np.float32))
+
+def test_full_probe_equals_exact():
+    matrix = clustered()
+    index = IVFIndex(nlist=16).train(matrix)
+    query = matrix[7]
+    rows, scores = index.search(matrix, query, top_k=10, nprobe=16)
+    # semua list discan -> semua baris jadi kandidat dengan skor exact
+    assert rows.size == matrix.shape[0]
+    np.testing.assert_allclose(scores, matrix @ query, rtol=1e-5)
+
+def test_pq_recall_and_persistence(tmp_path):
+    matrix = clustered()
+    index = IVFIndex(nlist=16, nprobe=4, pq_m=4).train(matrix)
+    path = tmp_path / "idx.npz"
+    index.save(path, rows="2000")
+    restored = IVFIndex.load(path)
+    assert restored.meta == {"rows": "2000"}
+    assert [p.name for p in tmp_path.iterdir()] == ["idx.npz"]  # file sementara tidak tertinggal
+
+    hits = 0
+    for q in range(0, 200, 10):
+        exact = set(np.argsort(-(matrix @ matrix[q]))[:10].tolist())
+        rows, scores = restored.search(matrix, matrix[q], top_k=10)
+        got = set(rows[np.argsort(-scores)[:10]].tolist())
+        hits += len(exact & got)
+    assert hits / 200 > 0.8
+
+def test_engine_ann_search_and_persist(tmp_path):
+    matrix = clustered(n=500)
+    foods = [{"name": f"Menu {i}", "price": 1000 * (i % 30), "embedding": matrix[i].tolist()} for i in range(500)]
+    db_file = tmp_path / "rag_big.json"
+    db_file.write_text(json.dumps(foods), encoding="utf-8")
+
+    engine = RetrievalEngine(str(db_file), use_ann=True, ann_min_rows=100, nprobe=64)
+    assert engine._ann is not None
+    assert ann_index_path(db_file).exists()
+
+    exact = RetrievalEngine(str(db_file))
+    assert exact._ann is None
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=matrix[3].tolist()):
+        assert engine.search("q", top_k=5) == exact.search("q", top_k=5)
+        # filter longgar tetap lewat ANN, hasilnya tetap menghormati budget
+        budget = engine.search("q", top_k=5, min_score=-1, context={"budget": 25000})
+        assert all(r["price"] <= 25000 for r in budget)
+
+    # load kedua pakai index dari disk (tidak training ulang)
+    with patch.object(IVFIndex, "train", side_effect=AssertionError("tidak boleh train ulang")):
+        reloaded = RetrievalEngine(str(db_file), use_ann=True, ann_min_rows=100)
+    assert reloaded._ann is not None
+
+def test_incremental_rows_match_full_add():
+    matrix = clustered(n=600)
+    index = IVFIndex(nlist=8, pq_m=4).train(matrix[:500])
+    snapshot = (index.list_rows.copy(), index.codes.copy())
+
+    updated = matrix[:501].copy()
+    updated[10] = matrix[550]
+    changed = index.with_rows(np.array([10, 500]), updated[[10, 500]])
+    full = IVFIndex(nlist=8, pq_m=4).train(matrix[:500])
+    full.add(updated)
+    np.testing.assert_array_equal(changed.list_rows, full.list_rows)
+    np.testing.assert_array_equal(changed.list_offsets, full.list_offsets)
+    np.testing.assert_array_equal(changed.codes, full.codes)
+
+    keep = np.ones(501, dtype=bool)
+    keep[3] = False
+    removed = changed.without_rows(keep)
+    full.add(updated[keep])
+    np.testing.assert_array_equal(removed.list_rows, full.list_rows)
+    np.testing.assert_array_equal(removed.codes, full.codes)
+    # index asal tidak ikut berubah (snapshot lama masih dipakai reader)
+    np.testing.assert_array_equal(index.list_rows, snapshot[0])
+    np.testing.assert_array_equal(index.codes, snapshot[1])
+
+def test_engine_upsert_assigns_only_changed_row(tmp_path):
+    matrix = clustered(n=300)
+    foods = [{"name": f"Menu {i}", "embedding": matrix[i].tolist()} for i in range(300)]
+    db_file = tmp_path / "rag_big.json"
+    db_file.write_text(json.dumps(foods), encoding="utf-8")
+    engine = RetrievalEngine(str(db_file), use_ann=True, ann_min_rows=100, nprobe=64)
+
+    with patch.object(IVFIndex, "add", side_effect=AssertionError("tidak boleh assign ulang semua baris")):
+        engine.upsert({"name": "Menu Baru", "embedding": matrix[42].tolist()})
+        engine.remove("Menu 0")
+    assert engine._ann.ntotal == 300
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=matrix[42].tolist()):
+        assert {r["name"] for r in engine.search("q", top_k=2)} == {"Menu 42", "Menu Baru"}
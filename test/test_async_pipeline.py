@@ -0,0 +1,113 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+from benchmarks.llm_standin import StandInLLM, agent_reply
+from src.bot.kencot_bot import KencotBot
+from src.bot.llm_client import ResilientLLMClient
+from src.bot.llm_router import LLMRouter, Provider
+
+MESSAGES = [{"role": "user", "content": "hai"}]
+
+
+def local_provider(server: StandInLLM) -> Provider:
+    llm = ResilientLLMClient(
+        OpenAI(api_key="x", base_url=server.base_url, max_retries=0), "model",
+        timeouts={"decision": 5.0, "reasoning": 5.0}, max_retries=0,
+        aclient=AsyncOpenAI(api_key="x", base_url=server.base_url, max_retries=0),
+    )
+    return Provider(server.name, llm)
+
+
+def make_bot(server: StandInLLM) -> KencotBot:
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        memory = MagicMock()
+        memory.get_context_async = AsyncMock(return_value={"ltm": {}})
+        memory.add_liked_food_async = AsyncMock()
+        memory.stm.get_messages.return_value = []
+        MockMemory.return_value = memory
+        bot = KencotBot()
+    bot.agent.router = LLMRouter([local_provider(server)])
+    bot.agent.decision_cache = None
+    return bot
+
+
+@patch("src.bot.llm_client.asyncio.sleep", new_callable=AsyncMock)
+def test_acomplete_retries_transient_errors(mock_sleep):
+    aclient = MagicMock()
+    aclient.chat.completions.create = AsyncMock(side_effect=[openai.APITimeoutError(request=MagicMock()), "ok"])
+    client = ResilientLLMClient(MagicMock(), "model-x", timeouts={"decision": 5.0}, max_retries=1, aclient=aclient)
+
+    assert asyncio.run(client.acomplete("decision", MESSAGES)) == "ok"
+    assert aclient.chat.completions.create.await_count == 2
+    assert mock_sleep.await_count == 1
+
+
+def test_async_router_fails_over():
+    with StandInLLM("broken", latency=0.0, error_rate=1.0) as broken, StandInLLM("ok", latency=0.0) as ok:
+        router = LLMRouter([local_provider(broken), local_provider(ok)])
+        response = asyncio.run(router.acomplete("reasoning", MESSAGES))
+    assert response.choices[0].message.content.startswith("[ok]")
+    assert router.stats()["broken"]["error_rate"] == 1.0
+
+
+def test_handle_user_input_async_matches_sync_flow():
+    with StandInLLM("gemini", latency=0.0, content=agent_reply) as server:
+        bot = make_bot(server)
+        greeting = asyncio.run(bot.handle_user_input_async("u1", "s1", "halo"))
+        result = asyncio.run(bot.handle_user_input_async("u1", "s1", "mau makan siang murah"))
+
+    assert greeting["phase"] == "greetings"
+    assert result["phase"] == "recommendation"
+    assert result["metadata"]["recommendation"]["menu_name"]
+    assert result["response"].startswith("Mamang saranin")
+    assert bot.session.get_stm("s1")["interaction_count"] == 1
+    bot.agent.memory.add_liked_food_async.assert_awaited_once()
+
+
+def test_concurrent_conversations_share_one_event_loop():
+    latency, n = 0.2, 20
+    with StandInLLM("gemini", latency=latency, content=agent_reply) as server:
+        bot = make_bot(server)
+
+        async def conversation(i):
+            await bot.handle_user_input_async(f"u{i}", f"s{i}", "halo")
+            return await bot.handle_user_input_async(f"u{i}", f"s{i}", "mau makan siang murah")
+
+        async def main():
+            return await asyncio.gather(*(conversation(i) for i in range(n)))
+
+        start = time.perf_counter()
+        results = asyncio.run(main())
+        elapsed = time.perf_counter() - start
+
+    assert all(r["phase"] == "recommendation" for r in results)
+    assert server.calls == 3 * n  # memory update + decision + reasoning per percakapan
+    # serial: n * 3 call * latency = 12 detik; async: ~3 call berurutan
+    assert elapsed < n * 3 * latency / 4
+
+
+def test_nutrition_async_reuses_client_and_handles_bad_json():
+    from src.utils.nutrition_api import NutritionTool
+
+    bodies = iter([b'[{"name": "soto", "protein_g": 10}]', b"<html>bad gateway</html>"])
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=next(bodies)))
+    real_client = httpx.AsyncClient
+    tool = NutritionTool()
+    tool.translate_to_english = lambda name: name
+
+    async def scenario():
+        with patch("src.utils.nutrition_api.httpx.AsyncClient",
+                   side_effect=lambda **kw: real_client(transport=transport, **kw)) as MockClient:
+            first = await tool.get_nutrition_async("soto")
+            second = await tool.get_nutrition_async("soto")
+        return first, second, MockClient.call_count
+
+    first, second, created = asyncio.run(scenario())
+    assert first == {"name": "soto", "protein_g": 10}
+    assert "error" in second  # body bukan JSON tidak bikin crash
+    assert created == 1
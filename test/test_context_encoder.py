@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+
+from src.bot import context_encoder
+from src.bot.context_encoder import encode_context
+
+
+def test_encodes_only_filled_slots_without_history():
+    context = {
+        "stm": [{"role": "user", "content": "aku alergi kacang"}],
+        "ltm": {"allergies": ["kacang"], "liked_foods": []},
+        "parsed": {"faculty": None, "budget": 15000, "hunger": None, "time_period": "siang"},
+        "raw_input": "mau makan",
+        "created_at": datetime.now(timezone.utc),
+    }
+    assert encode_context(context) == "alergi: kacang\nbudget: 15000 | waktu: siang"
+    assert encode_context({}) == ""
+
+
+def test_ltm_lists_deduplicated_capped_and_sorted():
+    liked = [f"Menu {i:02d}" for i in range(15)] + ["menu 03"]
+    context = {"ltm": {"liked_foods": liked, "disliked_foods": ["Pare", "pare", "Bayam"]}}
+
+    lines = encode_context(context).splitlines()
+    assert lines[0] == "tidak suka: Bayam, pare"
+    liked_line = lines[1][len("suka: "):].split(", ")
+    # 10 terbaru (menu 03 baru saja disebut lagi), urut alfabet
+    assert liked_line == ["menu 03"] + [f"Menu {i:02d}" for i in range(6, 15)]
+
+
+def test_encoding_memoized_per_turn():
+    context_encoder._encode.cache_clear()
+    context = {"ltm": {"allergies": ["udang"]}, "parsed": {"budget": 20000}}
+    for _ in range(3):  # memory update, decision, reasoning
+        encode_context(context)
+    info = context_encoder._encode.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock, patch
+
+from src.bot.agent import FoodAgent
+from src.memory.session_manager import SessionManager
+
+QUERIES = ["mau soto murah 15rb", "yang pedes dong", "lapar banget di teknik", "yang lain deh", "ayam geprek ada?"]
+
+
+def test_history_window_and_summary():
+    stm = SessionManager(max_history=4)
+    for i in range(10):
+        stm.add_message("s1", "user", f"pesan {i}")
+    stm.remember("s1", recommended="Soto Ayam", constraints={"budget": 15000, "faculty": None})
+    stm.remember("s1", recommended="Nasi Goreng", constraints={"faculty": "teknik"})
+    stm.remember("s1", recommended="soto ayam")
+
+    messages = stm.get_messages("s1")
+    assert [m["content"] for m in messages[1:]] == [f"pesan {i}" for i in range(6, 10)]
+    assert messages[0]["role"] == "summary"
+    summary = messages[0]["content"]
+    assert "sudah direkomendasikan: Nasi Goreng, soto ayam" in summary
+    assert "budget=15000" in summary and "faculty=teknik" in summary
+    assert "6 pesan lama diringkas" in summary
+
+
+def test_prompt_size_stays_flat_over_long_session():
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        memory = MagicMock()
+        memory.get_context.return_value = {"ltm": {}}
+        memory.stm = SessionManager(max_history=6)
+        MockMemory.return_value = memory
+        agent = FoodAgent(pipeline_mode="sequential")
+    agent.decision_cache = None
+    agent.nutrition_tool = MagicMock()
+    agent.nutrition_tool.get_nutrition.return_value = {}
+
+    prompts = []
+
+    def call_llm(prompt):
+        if "deteksi preferensi" in prompt:
+            return {"allergies": [], "disliked_foods": []}
+        prompts.append(prompt)
+        menu = prompt.split("Daftar menu dari database:\n- ")[1].splitlines()[0]
+        return {"search_method": "database", "recommendation": menu, "call_nutrition": False}
+
+    agent.call_llm = call_llm
+    agent.call_llm_reasoning = lambda prompt: f"Mamang saranin menu ini ya {len(prompts)}! " + "enak banget " * 100
+
+    for i in range(30):
+        agent.process("u1", "s1", QUERIES[i % len(QUERIES)])
+
+    sizes = [len(p) for p in prompts]
+    assert max(sizes[10:]) <= sizes[5] * 1.1
+    # riwayat hanya ditulis sekali (tidak ikut di JSON context)
+    last = prompts[-1]
+    assert last.count("Mamang saranin menu ini ya 29!") == 1
+    assert "sudah direkomendasikan:" in last
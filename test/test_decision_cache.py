@@ -0,0 +1,91 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.bot.agent import FoodAgent
+from src.bot.decision_cache import DecisionCache
+
+VECTORS = {
+    "makan murah deket teknik siang ini": [1.0, 0.0, 0.0],
+    "makan murah dekat teknik siang ini dong": [0.98, 0.2, 0.0],
+    "pengen yang berkuah": [0.0, 1.0, 0.0],
+}
+PARSED = {"faculty": "Teknik", "budget": None, "hunger": None, "time_period": "siang"}
+DECISION = {"search_method": "database", "recommendation": "Soto Ayam", "call_nutrition": True}
+
+
+def make_cache(**kwargs):
+    return DecisionCache(embed=lambda text: VECTORS[text], **kwargs)
+
+
+def test_similar_query_same_slots_hits():
+    cache = make_cache()
+    cache.put("makan murah deket teknik siang ini", PARSED, {}, DECISION)
+
+    assert cache.get("makan murah dekat teknik siang ini dong", PARSED, {}) == DECISION
+    assert cache.get("pengen yang berkuah", PARSED, {}) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_different_slots_or_exclusions_miss():
+    cache = make_cache()
+    cache.put("makan murah deket teknik siang ini", PARSED, {"allergies": ["Kacang"]}, DECISION)
+
+    assert cache.get("makan murah deket teknik siang ini", {**PARSED, "time_period": "malam"}, {}) is None
+    assert cache.get("makan murah deket teknik siang ini", PARSED, {"allergies": ["udang"]}) is None
+    # urutan & huruf besar eksklusi tidak berpengaruh
+    assert cache.get("makan murah deket teknik siang ini", PARSED, {"allergies": ["kacang"], "disliked_foods": []}) == DECISION
+
+
+def test_ttl_and_lru_eviction():
+    cache = make_cache(max_entries=2, ttl_seconds=60)
+    with patch("src.bot.decision_cache.time.time", return_value=1000.0):
+        cache.put("makan murah deket teknik siang ini", PARSED, {}, DECISION)
+        cache.put("pengen yang berkuah", PARSED, {}, {**DECISION, "recommendation": "Soto"})
+        assert cache.get("makan murah deket teknik siang ini", PARSED, {}) is not None
+        cache.put("pengen yang berkuah", {**PARSED, "faculty": None}, {}, DECISION)
+    # "pengen yang berkuah" (bucket Teknik) paling lama tidak dipakai -> dibuang
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("pengen yang berkuah", PARSED, {}) is None
+
+    with patch("src.bot.decision_cache.time.time", return_value=1100.0):
+        assert cache.get("makan murah deket teknik siang ini", PARSED, {}) is None
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.fixture
+def agent():
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        MockMemory.return_value = MagicMock()
+        agent = FoodAgent()
+    agent.decision_cache = make_cache()
+    agent.call_llm = MagicMock(return_value=DECISION)
+    return agent
+
+
+def test_agent_skips_llm_on_repeated_first_turn(agent):
+    context = {"stm": [], "ltm": {}, "parsed": PARSED, "raw_input": ""}
+    agent.decide("makan murah deket teknik siang ini", [], context)
+    again = agent.decide("makan murah dekat teknik siang ini dong", [], context)
+
+    assert again == DECISION
+    assert agent.call_llm.call_count == 1
+
+
+def test_agent_does_not_cache_follow_up_turns(agent):
+    context = {"stm": [{"role": "user", "content": "mau soto"}], "ltm": {}, "parsed": PARSED, "raw_input": ""}
+    agent.decide("makan murah deket teknik siang ini", [], context)
+    agent.decide("makan murah deket teknik siang ini", [], context)
+
+    assert agent.call_llm.call_count == 2
+    assert len(agent.decision_cache) == 0
+
+
+def test_greeting_and_summary_do_not_disable_cache(agent):
+    stm = [{"role": "summary", "content": "sudah direkomendasikan: Soto Ayam"}, {"role": "bot", "content": "Halo bestie!"}]
+    context = {"stm": stm, "ltm": {}, "parsed": PARSED, "raw_input": ""}
+    agent.decide("makan murah deket teknik siang ini", [], context)
+    agent.decide("makan murah deket teknik siang ini", [], context)
+
+    assert agent.call_llm.call_count == 1
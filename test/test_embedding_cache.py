@@ -0,0 +1,59 @@
+# test/test_embedding_cache.py
+from unittest.mock import patch
+import numpy as np
+from src.rag import embeddings
+from src.rag.embedding_cache import EmbeddingCache
+
+def test_lru_eviction_and_counters():
+    cache = EmbeddingCache(max_size=2)
+    cache.put("ayam geprek", [1.0, 0.0])
+    cache.put("yang pedes", [0.0, 1.0])
+    assert cache.get("  Ayam   GEPREK ") == [1.0, 0.0]  # key dinormalisasi
+    cache.put("murah aja", [0.5, 0.5])  # "yang pedes" paling lama -> dibuang
+
+    assert cache.get("yang pedes") is None
+    assert cache.get("murah aja") == [0.5, 0.5]
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+def test_ttl_expiry():
+    cache = EmbeddingCache(ttl_seconds=60)
+    with patch("src.rag.embedding_cache.time.time", return_value=1000.0):
+        cache.put("soto", [1.0])
+    with patch("src.rag.embedding_cache.time.time", return_value=1030.0):
+        assert cache.get("soto") == [1.0]
+    with patch("src.rag.embedding_cache.time.time", return_value=1100.0):
+        assert cache.get("soto") is None
+    assert len(cache) == 0
+
+def test_save_and_reload(tmp_path):
+    path = tmp_path / "cache.npz"
+    cache = EmbeddingCache()
+    cache.put("ayam geprek", [1.0, 0.0])
+    cache.put("yang pedes", [0.0, 1.0])
+    cache.save(path, namespace="model-a")
+
+    restored = EmbeddingCache()
+    assert restored.load(path, namespace="model-a") == 2
+    assert restored.get("yang pedes") == [0.0, 1.0]
+    # model beda -> cache lama tidak dipakai
+    assert EmbeddingCache().load(path, namespace="model-b") == 0
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.npz"]  # file sementara sudah di-rename
+
+def test_get_embedding_skips_model_on_hit():
+    embeddings.embedding_cache.clear()
+    with patch.object(embeddings.embedding_generator, "encode", return_value=[0.1, 0.2]) as mock_encode:
+        first = embeddings.get_embedding("Ayam Geprek")
+        second = embeddings.get_embedding("ayam geprek")
+    assert first == second == [0.1, 0.2]
+    mock_encode.assert_called_once_with("ayam geprek")
+    embeddings.embedding_cache.clear()
+
+def test_get_embeddings_single_missing_with_2d_encoder():
+    # SentenceTransformer.encode(["x"]) balikin array 2-D, bukan satu vektor
+    embeddings.embedding_cache.clear()
+    encode = lambda texts: np.asarray([[0.5, 0.5]] * len(texts))
+    with patch.object(embeddings.embedding_generator, "encode", side_effect=encode):
+        assert embeddings.get_embeddings(["soto"]) == [[0.5, 0.5]]
+        assert embeddings.get_embeddings(["soto", "nasi goreng"]) == [[0.5, 0.5], [0.5, 0.5]]
+    embeddings.embedding_cache.clear()
@@ -0,0 +1,33 @@
+# test/test_import_time.py
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def run_python(code: str) -> str:
+    # tanpa API key LLM: src.rag dipakai juga oleh script ingest / vector_store
+    env = {k: v for k, v in os.environ.items() if not k.endswith("_API_KEY")}
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+def test_import_rag_does_not_load_model():
+    out = run_python(
+        "import sys, src.rag, src.rag.similarity\n"
+        "from src.rag.embeddings import embedding_generator\n"
+        "print(embedding_generator.is_loaded, "
+        "'sentence_transformers' in sys.modules, 'sklearn' in sys.modules, 'torch' in sys.modules)"
+    )
+    assert out == "False False False False"
+
+def test_model_loaded_on_first_encode():
+    out = run_python(
+        "from src.rag.embeddings import embedding_generator, get_embedding\n"
+        "emb = get_embedding('ayam geprek')\n"
+        "print(embedding_generator.is_loaded, len(emb) > 0)"
+    )
+    assert out.endswith("True True")
@@ -0,0 +1,104 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from src.rag.ingest import ingest, make_food_id
+from src.rag.retrieval_engine import RetrievalEngine
+
+database = {
+    "ugm_canteens": [
+        {
+            "canteen_name": "Kantin Teknik Mesin",
+            "faculty_proximity": ["Teknik"],
+            "gmaps_link": "https://maps.example/km",
+            "menus": [
+                {"name": "Ayam Geprek", "price": 15000, "category": "makanan_berat", "suitability": ["siang"]},
+                {"name": "Es Teh", "price": 3000, "category": "minuman", "suitability": ["siang", "sore"]},
+            ],
+        },
+        {
+            "canteen_name": "Kantin Sipil",
+            "faculty_proximity": ["Teknik"],
+            "menus": [{"name": "Soto", "price": 12000, "category": "makanan_berat", "suitability": ["pagi"]}],
+        },
+    ]
+}
+
+
+def fake_encode(texts):
+    vectors = [[float(len(t)), 1.0, float("soto" in t)] for t in texts]
+    return vectors[0] if len(texts) == 1 else vectors
+
+
+@pytest.fixture
+def generator():
+    gen = MagicMock()
+    gen.model_id = "fake-model"
+    gen.encode.side_effect = fake_encode
+    with patch("src.rag.ingest.embedding_generator", gen):
+        yield gen
+
+
+def write_db(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_ingest_builds_records(tmp_path, generator):
+    db, out = tmp_path / "database.json", tmp_path / "rag.json"
+    write_db(db, database)
+
+    stats = ingest(db, out, batch_size=2)
+    assert stats["rows"] == 3 and stats["encoded"] == 3 and stats["skipped"] == 0
+    assert stats["rows_per_sec"] > 0
+    # 3 teks dengan batch 2 -> 2 panggilan encode
+    assert generator.encode.call_count == 2
+
+    foods = json.loads(out.read_text(encoding="utf-8"))
+    assert [f["id"] for f in foods] == [
+        make_food_id("Kantin Teknik Mesin", "Ayam Geprek"), "Kantin_Teknik_Mesin_Es_Teh", "Kantin_Sipil_Soto"
+    ]
+    assert {"ayam", "pedas", "sambal", "Teknik", "siang"} <= set(foods[0]["tags"])
+    assert all(len(f["embedding"]) == 3 and f["content_hash"] for f in foods)
+
+    engine = RetrievalEngine(str(out))
+    assert len(engine.foods) == 3
+
+
+def test_ingest_skips_unchanged_rows(tmp_path, generator):
+    db, out = tmp_path / "database.json", tmp_path / "rag.json"
+    write_db(db, database)
+    ingest(db, out)
+    generator.encode.reset_mock()
+
+    changed = json.loads(json.dumps(database))
+    changed["ugm_canteens"][0]["menus"][1]["price"] = 4000        # tidak mengubah teks dokumen
+    changed["ugm_canteens"][1]["menus"][0]["name"] = "Soto Ayam"  # teks berubah -> encode ulang
+    write_db(db, changed)
+
+    stats = ingest(db, out)
+    assert stats["encoded"] == 1 and stats["skipped"] == 2
+    generator.encode.assert_called_once()
+    foods = json.loads(out.read_text(encoding="utf-8"))
+    assert foods[1]["price"] == 4000
+    assert foods[2]["id"] == "Kantin_Sipil_Soto_Ayam"
+
+    assert ingest(db, out, force=True)["encoded"] == 3
+
+
+def test_incremental_rebuild_one_changed_row_with_2d_encoder(tmp_path, generator):
+    db, out = tmp_path / "database.json", tmp_path / "rag.json"
+    write_db(db, database)
+    ingest(db, out)
+
+    # model transformer: encode([teks]) -> array 2-D berisi satu baris
+    generator.encode.side_effect = lambda texts: np.asarray([[float(len(t)), 1.0, 0.0] for t in texts])
+    changed = json.loads(json.dumps(database))
+    changed["ugm_canteens"][1]["menus"][0]["name"] = "Soto Ayam"
+    write_db(db, changed)
+
+    stats = ingest(db, out)
+    assert stats["encoded"] == 1
+    foods = json.loads(out.read_text(encoding="utf-8"))
+    assert len(foods[2]["embedding"]) == 3 and foods[2]["embedding"][1:] == [1.0, 0.0]
@@ -0,0 +1,94 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.rag.lexical import BM25Index, tokenize
+from src.rag.retrieval_engine import RetrievalEngine
+
+
+def test_tokenize_splits_hyphen_and_drops_stopwords():
+    assert tokenize("Aku mau Gado-gado yang pedas") == ["gado", "gado", "pedas"]
+
+
+def test_bm25_rare_term_ranks_first():
+    index = BM25Index(["Nasi Rames", "Nasi Ramesan", "Nasi Goreng", "Soto Ayam"])
+    docs, scores = index.search("nasi ramesan")
+    assert docs[0] == 1
+    assert set(docs.tolist()) == {0, 1, 2}
+    assert scores[0] > scores[1]
+
+
+def test_bm25_match_all():
+    index = BM25Index(["Ayam Geprek", "Ayam Bakar", "Geprek Keju"])
+    assert index.match_all("ayam geprek").tolist() == [0]
+    assert index.match_all("ayam rendang") is None
+
+
+# embedding nol = kasus TF-IDF fallback yang tidak kenal kata di query
+foods = [
+    {"name": "Nasi Goreng", "tags": ["nasi"], "embedding": [1.0, 0.0]},
+    {"name": "Gado-gado", "tags": ["sayur"], "canteen_name": "Kantin Bonbin", "embedding": [0.0, 1.0]},
+    {"name": "Soto Ayam", "tags": ["kuah"], "embedding": [0.7, 0.7]},
+]
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = tmp_path / "rag_db.json"
+    path.write_text(json.dumps(foods), encoding="utf-8")
+    return path
+
+
+def test_hybrid_finds_lexical_match_when_dense_is_empty(db_file):
+    engine = RetrievalEngine(str(db_file), hybrid=True)
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=[0.0, 0.0]):
+        results = engine.search("gado-gado", top_k=2, min_score=0.0)
+    assert results[0]["name"] == "Gado-gado"
+    assert results[0]["lexical_score"] > 0
+
+
+def test_hybrid_keeps_exact_name_match_with_zero_embedding(db_file):
+    # min_score (cosine) tidak boleh membuang hit BM25: nama persis tetap ketemu
+    engine = RetrievalEngine(str(db_file), hybrid=True)
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=[0.0, 0.0]):
+        assert [r["name"] for r in engine.search("gado-gado", top_k=2)] == ["Gado-gado"]
+
+
+def test_hybrid_gates_lexical_hits_on_bm25_score(db_file):
+    engine = RetrievalEngine(str(db_file), hybrid=True)
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=[0.0, 0.0]):
+        # Nasi Goreng cuma cocok "goreng" -> skor BM25 jauh di bawah Soto Ayam
+        assert [r["name"] for r in engine.search("kuah soto ayam goreng")] == ["Soto Ayam"]
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=[1.0, 0.0]):
+        results = engine.search("soto", min_score=0.5)
+    assert [r["name"] for r in results] == ["Soto Ayam", "Nasi Goreng"]  # Soto Ayam juga hit leksikal
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=[0.0, 1.0]):
+        names = [r["name"] for r in engine.search("soto", min_score=0.8)]
+    assert names == ["Gado-gado", "Soto Ayam"]
+
+
+def test_hybrid_defaults_on_for_fallback_embeddings(db_file):
+    with patch("src.rag.retrieval_engine.uses_fallback_embeddings", return_value=True):
+        assert RetrievalEngine(str(db_file)).hybrid is True
+    with patch("src.rag.retrieval_engine.uses_fallback_embeddings", return_value=False):
+        assert RetrievalEngine(str(db_file)).hybrid is False
+
+
+def test_hybrid_without_lexical_hits_matches_dense(db_file):
+    hybrid = RetrievalEngine(str(db_file), hybrid=True)
+    dense_only = RetrievalEngine(str(db_file), hybrid=False)
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=[1.0, 0.1]):
+        assert hybrid.search("yang gurih", top_k=3) == dense_only.search("yang gurih", top_k=3)
+
+
+def test_search_many_hybrid_matches_search(db_file):
+    engine = RetrievalEngine(str(db_file), hybrid=True)
+    queries = ["kantin bonbin", "soto"]
+    vecs = [[0.0, 1.0], [1.0, 0.0]]
+    with patch("src.rag.retrieval_engine.get_embeddings", return_value=vecs), \
+         patch("src.rag.retrieval_engine.get_embedding", side_effect=vecs):
+        batched = engine.search_many(queries, top_k=2)
+        single = [engine.search(q, top_k=2) for q in queries]
+    assert batched == single
+    assert batched[0][0]["name"] == "Gado-gado"
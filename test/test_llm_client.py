@@ -0,0 +1,105 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import openai
+import pytest
+
+from src.bot.agent import FoodAgent
+from src.bot.llm_client import CircuitBreaker, CircuitOpenError, ResilientLLMClient
+
+
+def timeout_error():
+    return openai.APITimeoutError(request=MagicMock())
+
+
+def make_client(side_effect, **kwargs):
+    raw = MagicMock()
+    raw.chat.completions.create.side_effect = side_effect
+    return raw, ResilientLLMClient(raw, "model-x", timeouts={"decision": 5.0}, **kwargs)
+
+
+@patch("src.bot.llm_client.time.sleep")
+def test_retries_transient_errors_then_succeeds(mock_sleep):
+    raw, client = make_client([timeout_error(), timeout_error(), "ok"], max_retries=2)
+    assert client.complete("decision", [{"role": "user", "content": "hi"}]) == "ok"
+    assert raw.chat.completions.create.call_count == 3
+    assert mock_sleep.call_count == 2
+    # sisa deadline diteruskan sebagai timeout per attempt
+    assert all(0 < call.kwargs["timeout"] <= 5.0 for call in raw.chat.completions.create.call_args_list)
+
+
+@patch("src.bot.llm_client.time.sleep")
+def test_non_retryable_error_is_not_retried(mock_sleep):
+    raw, client = make_client(ValueError("bad request"), max_retries=3)
+    with pytest.raises(ValueError):
+        client.complete("decision", [])
+    assert raw.chat.completions.create.call_count == 1
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+@patch("src.bot.llm_client.time.sleep")
+def test_breaker_opens_then_half_opens(mock_sleep):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    raw, client = make_client(timeout_error(), max_retries=0, breaker=breaker)
+    with patch("src.bot.llm_client.time.monotonic", return_value=100.0):
+        for _ in range(2):
+            with pytest.raises(openai.APITimeoutError):
+                client.complete("decision", [])
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            client.complete("decision", [])
+    assert raw.chat.completions.create.call_count == 2
+
+    raw.chat.completions.create.side_effect = None
+    raw.chat.completions.create.return_value = "ok"
+    with patch("src.bot.llm_client.time.monotonic", return_value=131.0):
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert client.complete("decision", []) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_half_open_probe_releases_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker._opened_at = 0.0
+    hang = asyncio.Event()
+
+    async def create(**kwargs):
+        await hang.wait()
+
+    aclient = MagicMock()
+    aclient.chat.completions.create = create
+    client = ResilientLLMClient(MagicMock(), "model-x", timeouts={"decision": 5.0}, breaker=breaker, aclient=aclient)
+
+    async def scenario():
+        probe = asyncio.create_task(client.acomplete("decision", []))
+        await asyncio.sleep(0)
+        assert breaker._probing  # probe half-open sedang jalan
+        probe.cancel()  # mis. kalah hedge
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    with patch("src.bot.llm_client.time.monotonic", return_value=100.0):
+        asyncio.run(scenario())
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()  # slot percobaan tidak bocor
+
+
+def test_agent_degrades_to_rule_based_when_breaker_open():
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        memory = MagicMock()
+        memory.get_context.return_value = {"ltm": {"allergies": ["soto"]}}
+        memory.stm.get_messages.return_value = []
+        MockMemory.return_value = memory
+        agent = FoodAgent()
+    agent.client_gemini = MagicMock()
+    agent.llm.breaker._opened_at = float("inf")  # breaker terbuka, tidak pernah half-open
+    agent.nutrition_tool = MagicMock()
+
+    result = agent.process("u1", "s1", "mau soto ayam 15rb")
+
+    agent.client_gemini.chat.completions.create.assert_not_called()
+    agent.nutrition_tool.get_nutrition.assert_not_called()
+    food = result["recommendation"]
+    assert food["menu_name"] and "soto" not in food["menu_name"].lower()
+    assert food["price"] <= 15000
+    assert food["menu_name"] in result["reasoning"]
@@ -0,0 +1,117 @@
+import time
+from unittest.mock import patch
+
+import openai
+import pytest
+from openai import OpenAI
+
+from benchmarks.llm_standin import StandInLLM
+from src.bot.agent import FoodAgent, build_llm_providers
+from src.bot.llm_client import CircuitBreaker, ResilientLLMClient
+from src.bot.llm_router import LLMRouter, Provider
+from src.utils.config import Config
+
+MESSAGES = [{"role": "user", "content": "hai"}]
+
+
+def local_provider(server: StandInLLM, retries: int = 0) -> Provider:
+    client = OpenAI(api_key="x", base_url=server.base_url, max_retries=0)
+    llm = ResilientLLMClient(client, "model", timeouts={"reasoning": 5.0}, max_retries=retries,
+                             breaker=CircuitBreaker(name=server.name))
+    return Provider(server.name, llm)
+
+
+def content(response) -> str:
+    return response.choices[0].message.content
+
+
+def test_router_prefers_fastest_provider():
+    with StandInLLM("slow", latency=0.08) as slow, StandInLLM("fast", latency=0.01) as fast:
+        router = LLMRouter([local_provider(slow), local_provider(fast)])
+        answers = [content(router.complete("reasoning", MESSAGES)) for _ in range(12)]
+
+    # eksplorasi awal dulu, setelah terukur semua call ke provider tercepat
+    assert answers[-1].startswith("[fast]")
+    assert slow.calls == Provider.MIN_SAMPLES_FOR_LATENCY
+    assert router.ranked()[0].name == "fast"
+
+
+def test_router_fails_over_on_errors():
+    with StandInLLM("broken", latency=0.0, error_rate=1.0) as broken, StandInLLM("ok", latency=0.0) as ok:
+        router = LLMRouter([local_provider(broken), local_provider(ok)])
+        assert content(router.complete("reasoning", MESSAGES)).startswith("[ok]")
+        for _ in range(Provider.MIN_SAMPLES_FOR_ERROR_RATE):
+            router.complete("reasoning", MESSAGES)
+    assert router.stats()["broken"]["error_rate"] == 1.0
+    assert not router.get("broken").healthy(router.max_error_rate)
+
+
+def test_router_raises_when_all_fail():
+    with StandInLLM("down", latency=0.0, error_rate=1.0) as down:
+        router = LLMRouter([local_provider(down)])
+        with pytest.raises(openai.InternalServerError):
+            router.complete("reasoning", MESSAGES)
+
+
+def hedged_router(primary: StandInLLM, backup: StandInLLM) -> LLMRouter:
+    router = LLMRouter([local_provider(primary), local_provider(backup)], hedge=True, hedge_min_samples=3)
+    first, second = router.providers
+    for _ in range(3):
+        first.stats.record(0.02, True)
+        second.stats.record(0.03, True)
+    return router
+
+
+def test_hedge_fires_backup_after_p90():
+    with StandInLLM("primary", latency=0.02) as primary, StandInLLM("backup", latency=0.2) as backup:
+        router = hedged_router(primary, backup)
+        primary.latency, primary.error_rate = 0.3, 1.0  # primary tiba-tiba lambat lalu gagal
+
+        start = time.perf_counter()
+        answer = content(router.complete("reasoning", MESSAGES, hedge=True))
+        elapsed = time.perf_counter() - start
+
+    # backup sudah jalan sejak p90, jadi tidak perlu menunggu primary gagal + backup
+    assert answer.startswith("[backup]")
+    assert elapsed < 0.45
+    assert primary.calls == backup.calls == 1
+
+
+def test_hedge_returns_backup_when_slow_primary_succeeds():
+    with StandInLLM("primary", latency=0.02) as primary, StandInLLM("backup", latency=0.05) as backup:
+        router = hedged_router(primary, backup)
+        primary.latency = 0.6  # primary lambat tapi tetap berhasil
+
+        start = time.perf_counter()
+        answer = content(router.complete("reasoning", MESSAGES, hedge=True))
+        elapsed = time.perf_counter() - start
+
+    # jawaban pertama yang selesai dipakai, tidak menunggu primary
+    assert answer.startswith("[backup]")
+    assert elapsed < 0.4
+
+
+def test_hedge_skips_backup_when_primary_is_fast():
+    with StandInLLM("primary", latency=0.0) as primary, StandInLLM("backup", latency=0.0) as backup:
+        router = hedged_router(primary, backup)
+        with patch.object(Provider, "complete", autospec=True, side_effect=lambda provider, *args: provider.name):
+            name = router.complete("reasoning", MESSAGES, hedge=True)
+
+    assert name == "primary"
+    assert backup.calls == 0
+    assert router._executor._max_workers == router.hedge_max_workers
+
+
+def test_agent_builds_one_provider_per_configured_key():
+    with patch("src.bot.agent.MemoryManager"), patch("src.bot.agent.OpenAI") as MockOpenAI, \
+         patch.object(Config, "GROQ_API_KEY", "groq-key"), patch.object(Config, "GEMINI_API_KEY", "gemini-key"), \
+         patch.object(Config, "OPENAI_API_KEY", None), \
+         patch.object(Config, "LLM_PROVIDERS", "groq,gemini,openai"):
+        providers = build_llm_providers()
+        agent = FoodAgent()
+
+    assert [p.name for p in providers] == ["groq", "gemini"]
+    assert MockOpenAI.call_args_list[0].kwargs["base_url"] == Config.GROQ_BASE_URL
+    assert all(call.kwargs["max_retries"] == 0 for call in MockOpenAI.call_args_list)
+    assert agent.router.primary.name == "groq"
+    assert agent.model == Config.GROQ_MODEL_NAME
@@ -0,0 +1,109 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from src.bot.agent import FoodAgent
+
+
+def make_agent(mode):
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        mock_memory = MagicMock()
+        mock_memory.get_context.return_value = {"ltm": {}}
+        MockMemory.return_value = mock_memory
+        agent = FoodAgent(pipeline_mode=mode)
+
+    agent.nutrition_tool = MagicMock()
+    agent.nutrition_tool.get_nutrition.return_value = {"protein_g": 10}
+    agent.food_db = MagicMock()
+    agent.food_db.get_all_menus.return_value = [{"menu_name": "Nasi Goreng"}, {"menu_name": "Soto Ayam"}]
+    agent.call_llm_reasoning = MagicMock(return_value="Mamang saranin Soto Ayam.")
+    return agent
+
+
+def test_merged_mode_uses_one_structured_call():
+    agent = make_agent("merged")
+    agent.call_llm = MagicMock(return_value={
+        "allergies": ["udang"],
+        "disliked_foods": ["Nasi Goreng"],
+        "search_method": "database",
+        "recommendation": "Soto Ayam",
+        "call_nutrition": True,
+    })
+
+    result = agent.process("u1", "s1", "aku alergi udang, ga suka nasi goreng")
+
+    agent.call_llm.assert_called_once()
+    agent.call_llm_reasoning.assert_called_once()
+    agent.memory.add_allergy.assert_called_once_with("u1", "udang")
+    agent.memory.add_disliked_food.assert_called_once_with("u1", "Nasi Goreng")
+    assert result["recommendation"]["menu_name"] == "Soto Ayam"
+    assert result["decision_type"] == "database"
+    assert set(result) == {
+        "recommendation", "nutrition", "reasoning", "decision_type", "tool_used", "ltm_used", "timings"
+    }
+
+
+def test_sequential_mode_still_makes_two_json_calls():
+    agent = make_agent("sequential")
+    agent.call_llm = MagicMock(side_effect=[
+        {"allergies": [], "disliked_foods": []},
+        {"search_method": "database", "recommendation": "Nasi Goreng", "call_nutrition": True},
+    ])
+    result = agent.process("u1", "s1", "nasi goreng dong")
+    assert agent.call_llm.call_count == 2
+    assert result["recommendation"]["menu_name"] == "Nasi Goreng"
+
+
+def test_split_turn_handles_garbage():
+    assert FoodAgent.split_turn({}) == ({"disliked_foods": [], "allergies": []}, {})
+    assert FoodAgent.split_turn(None) == ({}, {})
+
+
+def test_concurrent_mode_runs_memory_and_decision_in_parallel():
+    agent = make_agent("concurrent")
+    started = []
+    threads = {}
+    both_started = threading.Event()
+
+    def slow_llm(prompt):
+        started.append(prompt)
+        threads["memory" if "deteksi preferensi" in prompt else "decision"] = threading.current_thread()
+        if len(started) == 2:
+            both_started.set()
+        # kalau dijalankan berurutan, call pertama timeout di sini
+        assert both_started.wait(timeout=2)
+        if "deteksi preferensi" in prompt:
+            return {"allergies": [], "disliked_foods": []}
+        return {"search_method": "database", "recommendation": "Soto Ayam", "call_nutrition": True}
+
+    agent.call_llm = slow_llm
+    result = agent.process("u1", "s1", "mau soto ayam")
+
+    assert result["recommendation"]["menu_name"] == "Soto Ayam"
+    # decision di thread turn, hanya memory update yang memakai executor
+    assert threads["decision"] is threading.current_thread()
+    assert threads["memory"] is not threading.current_thread()
+    # nutrisi Soto Ayam sudah di-prefetch karena disebut di input
+    agent.nutrition_tool.get_nutrition.assert_called_once_with("Soto Ayam")
+    assert {"memory_update", "decision", "nutrition", "reasoning", "total"} <= set(result["timings"])
+
+
+def test_concurrent_mode_reconciles_with_new_allergy():
+    agent = make_agent("concurrent")
+    decisions = iter([
+        {"search_method": "database", "recommendation": "Nasi Goreng", "call_nutrition": True},
+        {"search_method": "database", "recommendation": "Soto Ayam", "call_nutrition": True},
+    ])
+
+    def llm(prompt):
+        if "deteksi preferensi" in prompt:
+            time.sleep(0.05)
+            return {"allergies": [], "disliked_foods": ["nasi goreng"]}
+        return next(decisions)
+
+    agent.call_llm = llm
+    result = agent.process("u1", "s1", "aku ga suka nasi goreng")
+
+    assert result["recommendation"]["menu_name"] == "Soto Ayam"
+    assert "decision_retry" in result["timings"]
+    agent.memory.add_disliked_food.assert_called_once_with("u1", "nasi goreng")
@@ -0,0 +1,50 @@
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.rag.quantization import QuantizedMatrix, quantize
+from src.rag.retrieval_engine import RetrievalEngine
+from src.rag.vector_store import normalize_rows
+
+
+@pytest.mark.parametrize("dtype, atol", [("float16", 1e-3), ("int8", 2e-2)])
+def test_quantized_dot_close_to_float32(dtype, atol):
+    rng = np.random.default_rng(0)
+    matrix = normalize_rows(rng.normal(size=(500, 64)).astype(np.float32))
+    queries = normalize_rows(rng.normal(size=(3, 64)).astype(np.float32))
+    qm = QuantizedMatrix.from_float(matrix, dtype)
+
+    np.testing.assert_allclose(qm.dot(queries), queries @ matrix.T, atol=atol)
+    rows = np.array([3, 10, 499])
+    np.testing.assert_allclose(qm.dot(queries[0], rows), matrix[rows] @ queries[0], atol=atol)
+    np.testing.assert_allclose(qm[rows], matrix[rows], atol=atol)
+    assert qm.nbytes < matrix.nbytes
+
+
+def test_quantize_rejects_unknown_dtype():
+    with pytest.raises(ValueError):
+        quantize(np.zeros((2, 2), dtype=np.float32), "int4")
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_engine_quantized_search_and_upsert(tmp_path, dtype):
+    foods = [
+        {"id": "a", "name": "Ayam Geprek", "embedding": [1.0, 0.0, 0.0]},
+        {"id": "b", "name": "Pisang Goreng", "embedding": [0.0, 1.0, 0.0]},
+        {"id": "c", "name": "Es Teh", "embedding": [0.0, 0.0, 1.0]},
+    ]
+    db_file = tmp_path / "rag_db.json"
+    db_file.write_text(json.dumps(foods), encoding="utf-8")
+    engine = RetrievalEngine(str(db_file), dtype=dtype)
+    assert isinstance(engine._matrix, QuantizedMatrix)
+
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=[0.1, 1.0, 0.0]):
+        assert engine.search("manis", top_k=1)[0]["name"] == "Pisang Goreng"
+
+    engine.upsert({"id": "d", "name": "Kopi Susu", "embedding": [0.0, 0.2, 1.0]})
+    assert engine.remove("c") is True
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=[0.0, 0.0, 1.0]):
+        assert engine.search("kopi", top_k=1)[0]["name"] == "Kopi Susu"
+    assert engine._matrix.shape == (3, 3)
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.rag.retrieval_engine import RetrievalEngine
+
+dummy_rag_data = [
+    {"id": "k_geprek", "name": "Ayam Geprek", "price": 15000, "embedding": [1.0, 0.0, 0.0]},
+    {"id": "k_pisang", "name": "Pisang Goreng", "price": 5000, "embedding": [0.0, 1.0, 0.0]},
+    {"id": "k_nasgor", "name": "Nasi Goreng", "price": 12000, "embedding": [0.0, 0.0, 1.0]},
+]
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = tmp_path / "rag_db.json"
+    path.write_text(json.dumps(dummy_rag_data), encoding="utf-8")
+    return path
+
+
+def _search(engine, vec, **kwargs):
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=vec):
+        return engine.search("q", **kwargs)
+
+
+def test_upsert_new_food_only_embeds_that_row(db_file):
+    engine = RetrievalEngine(str(db_file))
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=[0.0, 0.7, 0.7]) as emb:
+        engine.upsert({"id": "k_es", "name": "Es Teh Manis", "price": 3000})
+        assert emb.call_count == 1
+
+    assert len(engine.foods) == 4
+    assert _search(engine, [0.0, 0.7, 0.7], top_k=1)[0]["name"] == "Es Teh Manis"
+
+
+def test_upsert_price_change_reuses_embedding_and_updates_filter(db_file):
+    engine = RetrievalEngine(str(db_file))
+    with patch("src.rag.retrieval_engine.get_embedding") as emb:
+        engine.upsert({"id": "k_geprek", "name": "Ayam Geprek", "price": 9000})
+        emb.assert_not_called()
+
+    results = _search(engine, [1.0, 0.0, 0.0], top_k=1, context={"budget": 10000})
+    assert results[0]["name"] == "Ayam Geprek"
+    assert results[0]["price"] == 9000
+
+
+def test_upsert_rejects_wrong_dimension(db_file):
+    engine = RetrievalEngine(str(db_file))
+    with pytest.raises(ValueError):
+        engine.upsert({"id": "x", "name": "X", "embedding": [1.0, 0.0]})
+    assert len(engine.foods) == 3
+
+
+def test_remove(db_file):
+    engine = RetrievalEngine(str(db_file))
+    assert engine.remove("k_pisang") is True
+    assert engine.remove("tidak_ada") is False
+
+    names = [r["name"] for r in _search(engine, [0.5, 0.5, 0.5], top_k=5, min_score=0.0)]
+    assert "Pisang Goreng" not in names
+    assert _search(engine, [0.0, 0.0, 1.0], top_k=1)[0]["name"] == "Nasi Goreng"
+
+
+def test_reload_if_changed_swaps_snapshot(db_file):
+    engine = RetrievalEngine(str(db_file))
+    assert engine.reload_if_changed() is False
+
+    data = dummy_rag_data + [{"id": "k_soto", "name": "Soto Ayam", "embedding": [0.6, 0.0, 0.8]}]
+    db_file.write_text(json.dumps(data), encoding="utf-8")
+    stat = os.stat(db_file)
+    os.utime(db_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    old_snapshot = engine._snapshot
+    assert engine.reload_if_changed() is True
+    assert len(engine.foods) == 4
+    # snapshot lama tidak diubah (reader yang masih pegang tetap konsisten)
+    assert len(old_snapshot.foods) == 3
+
+
+def test_concurrent_search_during_upsert(db_file):
+    engine = RetrievalEngine(str(db_file))
+    errors = []
+
+    def reader():
+        try:
+            for _ in range(200):
+                engine.search_many(["a", "b"], top_k=3, min_score=0.0)
+        except Exception as e:  # pragma: no cover - hanya kalau ada race
+            errors.append(e)
+
+    with patch("src.rag.retrieval_engine.get_embeddings", return_value=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]):
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for i in range(50):
+            engine.upsert({"id": f"new_{i}", "name": f"Menu {i}", "embedding": np.random.rand(3).tolist()})
+        thread.join()
+
+    assert not errors
+    assert len(engine.foods) == 53
@@ -65,3 +65,61 @@ def test_rag_empty_database(tmp_path):
         results = engine.search("pedas", top_k=2)
         # harus handle DB kosong
         assert results == []
+
+def test_rag_search_context_filter(tmp_path):
+    foods = [
+        {"name": "Ayam Geprek", "price": 15000, "faculty_proximity": ["Teknik"], "embedding": [1.0, 0.0, 0.0]},
+        {"name": "Ayam Bakar", "price": 25000, "faculty_proximity": ["Teknik"], "embedding": [0.9, 0.1, 0.0]},
+        {"name": "Ayam Penyet", "price": 12000, "faculty_proximity": ["MIPA"], "embedding": [0.8, 0.2, 0.0]},
+    ]
+    db_file = tmp_path / "rag_ctx.json"
+    db_file.write_text(json.dumps(foods), encoding="utf-8")
+    engine = RetrievalEngine(str(db_file))
+
+    with patch("src.rag.retrieval_engine.get_embedding", side_effect=fake_get_embedding):
+        # budget buang Ayam Bakar, faculty buang Ayam Penyet
+        results = engine.search("pedas", top_k=5, context={"budget": 20000, "faculty": "Teknik"})
+        assert [r["name"] for r in results] == ["Ayam Geprek"]
+
+def test_rag_search_tie_keeps_database_order(tmp_path):
+    foods = [{"name": f"Menu {i}", "embedding": [1.0, 0.0, 0.0]} for i in range(6)]
+    db_file = tmp_path / "rag_tie.json"
+    db_file.write_text(json.dumps(foods), encoding="utf-8")
+    engine = RetrievalEngine(str(db_file))
+
+    with patch("src.rag.retrieval_engine.get_embedding", side_effect=fake_get_embedding):
+        results = engine.search("pedas", top_k=3)
+        assert [r["name"] for r in results] == ["Menu 0", "Menu 1", "Menu 2"]
+
+def test_rag_search_many_matches_single_search(rag_engine):
+    queries = ["aku mau makanan pedas", "yang manis dong", "aku mau makanan asin"]
+    with patch("src.rag.retrieval_engine.get_embedding", side_effect=fake_get_embedding), \
+         patch("src.rag.retrieval_engine.get_embeddings",
+               side_effect=lambda texts: [fake_get_embedding(t) for t in texts]) as mock_batch:
+        batched = rag_engine.search_many(queries, top_k=2)
+        single = [rag_engine.search(q, top_k=2) for q in queries]
+
+    # semua query di-embed dalam satu panggilan batch
+    mock_batch.assert_called_once_with(queries)
+    assert batched == single
+    assert [r[0]["name"] for r in batched] == ["Ayam Geprek", "Pisang Goreng", "Nasi Goreng"]
+
+def test_rag_search_prefilter_time_period(tmp_path):
+    foods = [
+        {"name": "Bubur Ayam", "price": 10000, "suitability": ["pagi"], "embedding": [1.0, 0.0, 0.0]},
+        {"name": "Ayam Bakar", "price": 22000, "suitability": ["siang", "malam"], "embedding": [0.9, 0.1, 0.0]},
+        {"name": "Ayam Goreng", "price": 18000, "embedding": [0.8, 0.2, 0.0]},  # tanpa suitability
+    ]
+    db_file = tmp_path / "rag_period.json"
+    db_file.write_text(json.dumps(foods), encoding="utf-8")
+    engine = RetrievalEngine(str(db_file))
+
+    with patch("src.rag.retrieval_engine.get_embedding", side_effect=fake_get_embedding):
+        malam = engine.search("pedas", context={"time_period": "malam"})
+        assert [r["name"] for r in malam] == ["Ayam Bakar", "Ayam Goreng"]
+
+        malam_murah = engine.search("pedas", context={"time_period": "malam", "budget": 20000})
+        assert [r["name"] for r in malam_murah] == ["Ayam Goreng"]
+
+        # filter tidak menyisakan kandidat -> tidak perlu embed query sama sekali
+        assert engine.search("pedas", context={"faculty": "Hukum"}) == []
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from src.memory.session_manager import SessionManager
+
+T0 = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def clock():
+    now = {"t": T0}
+    with patch("src.memory.session_manager._utcnow", side_effect=lambda: now["t"]):
+        yield lambda minutes: now.update(t=now["t"] + timedelta(minutes=minutes))
+
+
+def test_expiry_enforced_on_access_and_sliding(clock):
+    stm = SessionManager(ttl_minutes=30, max_bytes=0)
+    stm.create_session("a", "u1")
+    stm.create_session("b", "u2")
+    clock(20)
+    stm.add_message("a", "user", "halo")  # aktivitas memperpanjang expiry sesi a
+    clock(15)
+
+    assert stm.get_stm("b") is None
+    assert stm.get_messages("a") == [{"role": "user", "content": "halo"}]
+    assert stm.stats()["sessions"] == 1
+    assert stm.stats()["evicted_expired"] == 1
+
+
+def test_sweep_uses_expiry_heap_and_respects_cooldown(clock):
+    stm = SessionManager(ttl_minutes=10, max_bytes=0)
+    for sid in ("a", "b", "c"):
+        stm.create_session(sid, sid)
+    stm.get_stm("c")["cooldown_until"] = T0 + timedelta(minutes=60)
+    clock(5)
+    stm.get_stm("b")
+    clock(6)
+
+    assert stm.sweep() == 1  # a kedaluwarsa; b baru diakses; c masih cooldown
+    assert set(stm.short_term_memory) == {"b", "c"}
+    clock(10)
+    assert stm.sweep() == 1
+    assert set(stm.short_term_memory) == {"c"}
+    clock(60)
+    assert stm.sweep() == 1
+    assert stm.stats()["sessions"] == 0
+
+
+def test_memory_budget_evicts_least_recently_used():
+    stm = SessionManager(max_bytes=6000)  # muat 3 sesi berisi 1 pesan 1KB
+    for sid in ("a", "b", "c"):
+        stm.add_message(sid, "user", "x" * 1000)
+    stm.get_stm("a")  # a jadi yang terbaru dipakai
+    stm.add_message("d", "user", "x" * 1000)
+
+    assert set(stm.short_term_memory) == {"c", "a", "d"}
+    stats = stm.stats()
+    assert stats["evicted_lru"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+    stm.clear_stm("a")
+    assert stm.stats()["bytes"] < stats["bytes"]
+
+
+def test_history_capped_per_session():
+    stm = SessionManager(max_history=4, max_bytes=0)
+    for i in range(50):
+        stm.add_message("a", "user", f"pesan {i}")
+    assert len(stm.get_stm("a")["conversation_history"]) == 4
+
+
+def test_background_sweeper_evicts_expired_sessions(clock):
+    stm = SessionManager(ttl_minutes=1, max_bytes=0)
+    stm.create_session("a", "u1")
+    clock(2)
+    stm.start_sweeper(interval=0.01)
+    try:
+        deadline = time.monotonic() + 2
+        while stm.stats()["sessions"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stm.stop_sweeper()
+    assert stm.stats()["sessions"] == 0
@@ -0,0 +1,111 @@
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from src.memory.session_manager import SessionManager
+from src.memory.session_store import InMemorySessionStore, SQLiteSessionStore
+
+T0 = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_manager(request, tmp_path):
+    def make(**kwargs):
+        max_bytes = kwargs.pop("max_bytes", 0)
+        if request.param == "sqlite":
+            store = SQLiteSessionStore(tmp_path / "sessions.db", max_bytes=max_bytes)
+        else:
+            store = InMemorySessionStore(max_bytes=max_bytes)
+        return SessionManager(store=store, **kwargs)
+    return make
+
+
+def test_dict_semantics_are_kept(make_manager):
+    stm = make_manager()
+    stm.create_session("s1", "u1")
+    session = stm.get_stm("s1")
+    session.update({"phase": "recommendation", "interaction_count": 2})
+    session["cooldown_until"] = T0
+    stm.add_message("s1", "user", "halo")
+
+    fresh = stm.get_stm("s1")
+    assert fresh["phase"] == "recommendation"
+    assert fresh["interaction_count"] == 2
+    assert fresh["cooldown_until"] == T0
+    assert stm.get_messages("s1") == [{"role": "user", "content": "halo"}]
+
+
+def test_expiry_sweep_and_budget(make_manager):
+    now = {"t": T0}
+    with patch("src.memory.session_manager._utcnow", side_effect=lambda: now["t"]):
+        # touch tiap baca supaya urutan LRU pasti; muat 3 sesi berisi 1 pesan 1KB
+        stm = make_manager(ttl_minutes=10, max_bytes=6000, touch_interval_seconds=0)
+        for sid in ("a", "b", "c"):
+            stm.add_message(sid, "user", "x" * 1000)
+        stm.get_stm("a")
+        stm.add_message("d", "user", "x" * 1000)
+        assert sorted(stm.short_term_memory) == ["a", "c", "d"]  # b paling lama tidak diakses
+
+        now["t"] = T0 + timedelta(minutes=5)
+        stm.get_stm("c")
+        now["t"] = T0 + timedelta(minutes=12)
+        assert stm.sweep() == 2
+        assert list(stm.short_term_memory) == ["c"]
+        assert stm.stats()["evicted_lru"] == 1
+
+
+def test_reads_touch_expiry_at_most_once_per_interval(make_manager):
+    now = {"t": T0}
+    with patch("src.memory.session_manager._utcnow", side_effect=lambda: now["t"]):
+        stm = make_manager(ttl_minutes=10, touch_interval_seconds=60)
+        stm.add_message("s1", "user", "halo")
+        with patch.object(stm.store, "mutate", wraps=stm.store.mutate) as mutate:
+            now["t"] = T0 + timedelta(seconds=30)
+            stm.get_stm("s1"), stm.get_messages("s1"), stm.get_summary("s1")
+            assert mutate.call_count == 0
+
+            now["t"] = T0 + timedelta(seconds=90)
+            stm.get_stm("s1"), stm.get_messages("s1")
+            assert mutate.call_count == 1
+        assert stm.get_stm("s1")["expires_at"] == now["t"] + timedelta(minutes=10)
+
+
+def test_sqlite_store_shared_between_managers(tmp_path):
+    path = tmp_path / "sessions.db"
+    worker_a = SessionManager(store=SQLiteSessionStore(path))
+    worker_b = SessionManager(store=SQLiteSessionStore(path))
+
+    worker_a.create_session("s1", "u1")
+    worker_a.get_stm("s1")["phase"] = "recommendation"
+    worker_b.add_message("s1", "user", "mau soto")
+    worker_b.get_stm("s1")["interaction_count"] = 1
+
+    session = worker_a.get_stm("s1")
+    assert session["phase"] == "recommendation"
+    assert session["interaction_count"] == 1
+    assert [m["content"] for m in worker_a.get_messages("s1")] == ["mau soto"]
+    assert worker_b.stats()["sessions"] == 1
+
+
+def _append_messages(path, worker, count):
+    stm = SessionManager(max_history=1000, store=SQLiteSessionStore(path))
+    for i in range(count):
+        stm.add_message("s1", "user", f"{worker}-{i}")
+        stm.increment("s1", "interaction_count")
+
+
+def test_sqlite_appends_are_atomic_across_processes(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SQLiteSessionStore(path)
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_append_messages, args=(path, w, 25)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join(timeout=60)
+
+    stm = SessionManager(max_history=1000, store=SQLiteSessionStore(path))
+    assert len(stm.get_messages("s1")) == 100
+    assert stm.get_stm("s1")["interaction_count"] == 100
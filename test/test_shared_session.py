@@ -0,0 +1,77 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.bot.kencot_bot import KencotBot
+
+
+@pytest.fixture
+def bot():
+    with patch("src.memory.memory_manager.UserMemoryModel") as MockLTM, \
+         patch("src.memory.memory_manager.db_instance"):
+        MockLTM.return_value.get_memory.return_value = {}
+        bot = KencotBot()
+    agent = bot.agent
+    agent.nutrition_tool = MagicMock()
+    agent.call_llm = MagicMock(side_effect=lambda prompt: (
+        {"allergies": [], "disliked_foods": []} if "deteksi preferensi" in prompt
+        else {"search_method": "database", "recommendation": "Soto Ayam", "call_nutrition": False}
+    ))
+    agent.call_llm_reasoning = lambda prompt: "Mamang saranin Soto Ayam."
+    agent.call_llm_async = AsyncMock(side_effect=agent.call_llm)
+    agent.call_llm_reasoning_async = AsyncMock(side_effect=agent.call_llm_reasoning)
+    agent.call_llm_reasoning_stream = lambda prompt, fallback=None: iter(["Mamang saranin Soto Ayam."])
+    return bot
+
+
+def run_turn(bot, mode, text):
+    if mode == "async":
+        return asyncio.run(bot.handle_user_input_async("u1", "s1", text))
+    if mode == "stream":
+        stream = bot.handle_user_input_stream("u1", "s1", text)
+        try:
+            while True:
+                next(stream)
+        except StopIteration as done:
+            return done.value
+    return bot.handle_user_input("u1", "s1", text)
+
+
+def test_bot_and_agent_share_one_store(bot):
+    assert bot.agent.memory.stm is bot.session
+
+
+@pytest.mark.parametrize("mode", ["sync", "stream", "async"])
+def test_turn_appends_exactly_one_user_and_one_bot_message(bot, mode):
+    bot.handle_user_input("u1", "s1", "halo")  # greeting
+    before = bot.session.get_stm("s1")["conversation_history"][:]
+
+    result = run_turn(bot, mode, "mau soto ayam")
+
+    history = bot.session.get_stm("s1")["conversation_history"]
+    added = [(m["role"], m["message"]) for m in history[len(before):]]
+    assert added == [("user", "mau soto ayam"), ("bot", result["response"])]
+    assert result["phase"] == "recommendation"
+
+
+def test_repeated_first_query_hits_decision_cache(bot):
+    decision_prompts = lambda: [c for c in bot.agent.call_llm.call_args_list if "deteksi preferensi" not in c.args[0]]
+    for sid in ("s1", "s2", "s3"):
+        bot.handle_user_input("u1", sid, "halo")  # greeting masuk riwayat sesi
+        result = bot.handle_user_input("u1", sid, "mau soto ayam")
+        assert result["metadata"]["recommendation"]["menu_name"] == "Soto Ayam"
+
+    assert len(decision_prompts()) == 1
+    assert bot.agent.decision_cache.stats()["hits"] == 2
+
+
+def test_disconnected_stream_still_records_turn(bot):
+    bot.handle_user_input("u1", "s1", "halo")
+    stream = bot.handle_user_input_stream("u1", "s1", "mau soto ayam")
+    next(stream)
+    stream.close()
+
+    session = bot.session.get_stm("s1")
+    assert [m["role"] for m in session["conversation_history"]] == ["bot", "user", "bot"]
+    assert session["interaction_count"] == 1
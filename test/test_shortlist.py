@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.bot.agent import FoodAgent
+from src.utils.config import Config
+
+
+@pytest.fixture
+def agent():
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        MockMemory.return_value = MagicMock()
+        yield FoodAgent()
+
+
+def make_context(parsed=None, ltm=None, stm=None):
+    return {"stm": stm or [], "ltm": ltm or {}, "parsed": parsed or {}, "raw_input": ""}
+
+
+def test_shortlist_disabled_returns_full_catalog(agent):
+    menus = agent.food_db.get_all_menus()
+    with patch.object(Config, "DECISION_SHORTLIST_SIZE", 0):
+        assert agent.build_shortlist("mau soto", menus, make_context()) == menus
+
+
+def test_shortlist_contains_mentioned_and_similar_menus(agent):
+    menus = agent.food_db.get_all_menus()
+    with patch.object(Config, "DECISION_SHORTLIST_SIZE", 5):
+        shortlist = agent.build_shortlist("mau soto ayam", menus, make_context())
+    names = [m["menu_name"] for m in shortlist]
+    assert len(shortlist) == 5
+    assert names[0] == "Soto Ayam"
+    assert "Soto Ayam Campur" in names
+
+
+def test_shortlist_respects_ltm_and_budget(agent):
+    menus = agent.food_db.get_all_menus()
+    context = make_context(parsed={"budget": 13000}, ltm={"disliked_foods": ["soto"]})
+    with patch.object(Config, "DECISION_SHORTLIST_SIZE", 8):
+        shortlist = agent.build_shortlist("yang berkuah 13rb", menus, context)
+    assert len(shortlist) == 8
+    assert not any("soto" in m["menu_name"].lower() for m in shortlist)
+    assert all((m["price"] or 0) <= 13000 for m in shortlist)
+
+
+def test_relaxed_filters_order():
+    steps = FoodAgent.relaxed_filters({"budget": 10000, "faculty": "Teknik", "time_period": "pagi"})
+    assert steps == [
+        {"budget": 10000, "faculty": "Teknik", "time_period": "pagi"},
+        {"budget": 10000, "faculty": "Teknik"},
+        {"budget": 10000},
+        {},
+    ]
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+
+from src.rag.similarity import FoodSimilarityScorer, find_similar_foods_fast
+
+
+def fake_embeddings(texts):
+    table = {"Ayam Geprek": [1.0, 0.0], "Es Teh": [0.0, 1.0], "Soto": [0.7, 0.7]}
+    return [table.get(t, [0.0, 0.0]) for t in texts]
+
+
+def make_foods():
+    return [
+        {"name": "Ayam Geprek"},
+        {"name": "Es Teh"},
+        {"name": "Soto", "embedding": [0.6, 0.8]},
+        {"name": "Ayam Geprek"},
+    ]
+
+
+def test_scorer_batches_missing_embeddings_and_does_not_mutate():
+    foods = make_foods()
+    scorer = FoodSimilarityScorer()
+    with patch("src.rag.similarity.get_embeddings", side_effect=fake_embeddings) as emb:
+        results = scorer.score([1.0, 0.0], foods, top_k=3)
+        # satu batch, teks duplikat hanya di-encode sekali
+        emb.assert_called_once_with(["Ayam Geprek", "Es Teh"])
+
+    assert results[0][0] == 0 and results[1][0] == 3
+    assert results[2][0] == 2
+    assert foods == make_foods()
+
+
+def test_scorer_reuses_matrix_and_memo():
+    foods = make_foods()
+    scorer = FoodSimilarityScorer()
+    with patch("src.rag.similarity.get_embeddings", side_effect=fake_embeddings) as emb:
+        scorer.score([1.0, 0.0], foods)
+        matrix = scorer._state.matrix
+        scorer.score([0.0, 1.0], foods)
+        assert scorer._state.matrix is matrix
+
+        # list baru dengan isi sama -> matrix dibangun ulang tapi tanpa encode lagi
+        scorer.score([0.0, 1.0], make_foods())
+        assert emb.call_count == 1
+
+
+def test_find_similar_foods_fast_threshold_and_pairs():
+    with patch("src.rag.similarity.get_embeddings", side_effect=fake_embeddings):
+        results = find_similar_foods_fast([0.0, 1.0], make_foods(), top_k=5, threshold=0.5)
+    assert [i for i, _ in results] == [1, 2]
+    assert np.isclose(results[0][1], 1.0)
+
+
+def test_shared_scorer_is_consistent_across_threads():
+    lists = [[{"name": f"menu {i}", "embedding": [1.0, float(i)]}] * (i + 1) for i in range(8)]
+    scorer = FoodSimilarityScorer()
+
+    def run(i):
+        return scorer.score([1.0, float(i)], lists[i], top_k=10, threshold=-1.0)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(run, [i % 8 for i in range(400)]))
+    # tiap hasil sesuai list miliknya sendiri, bukan list yang di-fit thread lain
+    assert all(len(r) == (i % 8) + 1 for i, r in enumerate(results))
@@ -0,0 +1,131 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import wa_server
+from src.bot.agent import FoodAgent, iter_sentences
+from src.bot.kencot_bot import KencotBot
+
+REPLY = "Halo bestie! Mamang saranin *Soto Ayam* harganya Rp12.000 aja.\n\n1. Anget\n2. Murah 🔥"
+
+
+def stream_of(text, size=4):
+    return [
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + size]))])
+        for i in range(0, len(text), size)
+    ]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 100])
+def test_iter_sentences_keeps_text(size):
+    chunks = list(iter_sentences(REPLY[i:i + size] for i in range(0, len(REPLY), size)))
+    assert "".join(chunks) == REPLY
+    assert chunks[0] == "Halo bestie! "
+    assert "Rp12.000 aja." in chunks[1]
+
+
+def test_iter_sentences_splits_long_runs():
+    chunks = list(iter_sentences(["kata " * 100], max_chars=50))
+    assert len(chunks) > 1
+    assert all(len(c) <= 50 for c in chunks)
+
+
+@pytest.fixture
+def agent():
+    with patch("src.bot.agent.MemoryManager") as MockMemory:
+        memory = MagicMock()
+        memory.get_context.return_value = {"ltm": {}}
+        memory.stm.get_messages.return_value = []
+        MockMemory.return_value = memory
+        agent = FoodAgent()
+    agent.call_llm = MagicMock(return_value={"search_method": "database", "recommendation": "Soto Ayam"})
+    agent.client_gemini = MagicMock()
+    agent.client_gemini.chat.completions.create.return_value = iter(stream_of(REPLY))
+    return agent
+
+
+def test_process_stream_yields_sentences_and_returns_result(agent):
+    stream = agent.process_stream("u1", "s1", "mau soto ayam")
+    chunks = []
+    with pytest.raises(StopIteration) as done:
+        while True:
+            chunks.append(next(stream))
+    result = done.value.value
+
+    assert len(chunks) > 1
+    assert result["reasoning"] == REPLY
+    assert result["recommendation"]["menu_name"] == "Soto Ayam"
+    assert "first_chunk" in result["timings"]
+    assert agent.client_gemini.chat.completions.create.call_args.kwargs["stream"] is True
+    agent.memory.stm.add_message.assert_any_call("s1", "bot", REPLY)
+
+
+def test_closed_stream_still_finishes_turn(agent):
+    stream = agent.process_stream("u1", "s1", "mau soto ayam")
+    first = next(stream)
+    stream.close()  # client putus setelah kalimat pertama
+
+    agent.memory.stm.add_message.assert_any_call("s1", "user", "mau soto ayam")
+    agent.memory.stm.add_message.assert_any_call("s1", "bot", first.strip())
+    agent.memory.stm.remember.assert_called_once()
+
+
+def test_stream_error_yields_fallback(agent):
+    agent.client_gemini.chat.completions.create.side_effect = Exception("boom")
+    assert list(agent.call_llm_reasoning_stream("prompt")) == ["Maaf, reasoning gagal dihasilkan."]
+
+
+def test_sse_endpoint_streams_chunks_then_done():
+    bot = MagicMock()
+
+    def fake_stream(user_id, session_id, text):
+        yield "Halo bestie! "
+        yield "Soto Ayam aja."
+        return {"response": "Halo bestie! Soto Ayam aja.", "phase": "recommendation", "metadata": {}}
+
+    bot.handle_user_input_stream.side_effect = fake_stream
+    with patch.object(wa_server, "bot", bot):
+        response = wa_server.app.test_client().post("/handle/stream", json={"user_id": "u1", "text": "mau soto"})
+        body = response.get_data(as_text=True)
+
+    assert response.mimetype == "text/event-stream"
+    events = [block.split("\n") for block in body.strip().split("\n\n")]
+    names = [lines[0].removeprefix("event: ") for lines in events]
+    assert names == ["chunk", "chunk", "done"]
+    done = json.loads(events[-1][1].removeprefix("data: "))
+    assert done["bot_response"] == "Halo bestie! Soto Ayam aja."
+    assert done["session_id"] == "sess_u1"
+
+
+def test_sse_disconnect_closes_bot_stream():
+    bot = MagicMock()
+    closed = []
+
+    def fake_stream(user_id, session_id, text):
+        try:
+            yield "Halo bestie! "
+            yield "Soto Ayam aja."
+        finally:
+            closed.append(True)
+        return {}
+
+    streams = []  # referensi tetap dipegang, jadi tidak ditutup oleh garbage collector
+    bot.handle_user_input_stream.side_effect = lambda *args: streams.append(fake_stream(*args)) or streams[-1]
+    with patch.object(wa_server, "bot", bot):
+        response = wa_server.app.test_client().post("/handle/stream", json={"user_id": "u1", "text": "mau soto"},
+                                                    buffered=False)
+        next(response.response)
+        response.close()
+    assert closed == [True]
+
+
+def test_bot_stream_greeting_phase():
+    with patch("src.bot.kencot_bot.FoodAgent"):
+        bot = KencotBot()
+    stream = bot.handle_user_input_stream("u1", "s1", "halo")
+    greeting = next(stream)
+    with pytest.raises(StopIteration) as done:
+        next(stream)
+    assert done.value.value == {"response": greeting, "phase": "greetings"}
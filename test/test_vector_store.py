@@ -0,0 +1,52 @@
+# test/test_vector_store.py
+import json
+import numpy as np
+from unittest.mock import patch
+from src.rag.retrieval_engine import RetrievalEngine
+from src.rag.vector_store import build_binary_store, load_binary_store, store_paths
+
+dummy_rag_data = [
+    {"name": "Ayam Geprek", "price": 15000, "embedding": [1.0, 0.0, 0.0]},
+    {"name": "Es Teh", "price": 3000, "embedding": []},
+    {"name": "Pisang Goreng", "price": 5000, "embedding": [0.0, 2.0, 0.0]},
+]
+
+def write_db(tmp_path):
+    db_file = tmp_path / "rag_db.json"
+    db_file.write_text(json.dumps(dummy_rag_data), encoding="utf-8")
+    return db_file
+
+def test_build_and_load_memmap(tmp_path):
+    db_file = write_db(tmp_path)
+    npy_path, meta_path = build_binary_store(db_file)
+    assert (npy_path, meta_path) == store_paths(db_file)
+
+    foods, matrix, rows = load_binary_store(db_file)
+    assert isinstance(matrix, np.memmap)
+    assert matrix.dtype == np.float32
+    assert rows == [0, 2]
+    assert "embedding" not in foods[0]
+    # sudah dinormalisasi saat build
+    np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), [1.0, 1.0], rtol=1e-6)
+
+def test_engine_uses_binary_store(tmp_path):
+    db_file = write_db(tmp_path)
+    build_binary_store(db_file)
+    engine = RetrievalEngine(str(db_file))
+    assert isinstance(engine._matrix, np.memmap)
+
+    with patch("src.rag.retrieval_engine.get_embedding", return_value=[0.0, 1.0, 0.0]):
+        results = engine.search("manis", top_k=1)
+    assert results[0]["name"] == "Pisang Goreng"
+    assert results[0]["similarity_score"] > 0.99
+
+def test_stale_store_falls_back_to_json(tmp_path):
+    db_file = write_db(tmp_path)
+    build_binary_store(db_file)
+    # JSON diubah setelah build -> store basi, harus pakai slow path
+    db_file.write_text(json.dumps(dummy_rag_data[:1]), encoding="utf-8")
+    assert load_binary_store(db_file) is None
+
+    engine = RetrievalEngine(str(db_file))
+    assert len(engine.foods) == 1
+    assert not isinstance(engine._matrix, np.memmap)
@@ -1,9 +1,10 @@
+import json
 import logging
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from src.database.connection import db_instance
 from src.utils.config import Config
 from src.bot.kencot_bot import KencotBot
-from src.memory.session_manager import SessionManager
+from src.rag.embeddings import embedding_cache, initialize_embedding_cache
 
 # --- Logging setup ---
 logger = logging.getLogger(__name__)
@@ -30,10 +31,25 @@ def initialize_bot():
     global bot, session_mgr
     Config.validate()
     initialize_database()
-    session_mgr = SessionManager()
+    initialize_embedding_cache()
     bot = KencotBot()
+    session_mgr = bot.session  # satu store STM untuk bot & agent
+    if Config.RAG_RELOAD_INTERVAL_SECONDS > 0:
+        bot.agent.rag_engine.start_watcher(Config.RAG_RELOAD_INTERVAL_SECONDS)
+    if Config.SESSION_SWEEP_INTERVAL_SECONDS > 0:
+        bot.session.start_sweeper(Config.SESSION_SWEEP_INTERVAL_SECONDS)
     print("🤖 KENCOT BOT - WhatsApp API Mode aktif!")
 
+def create_app() -> Flask:
+    """
+    Entry point multi-worker (satu bot per worker), mis.
+    `SESSION_BACKEND=sqlite gunicorn -w 4 -b 0.0.0.0:5000 "wa_server:create_app()"`.
+    Dengan backend sqlite, phase/cooldown/riwayat sesi dibagi semua worker.
+    """
+    if bot is None:
+        initialize_bot()
+    return app
+
 # === ROUTES ===
 
 @app.route("/handle", methods=["POST"])
@@ -66,6 +82,70 @@ def handle_message():
         return jsonify({"error": str(e)}), 500
 
 
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@app.route("/handle/stream", methods=["POST"])
+def handle_message_stream():
+    """
+    Sama dengan /handle, tapi balasan dikirim sebagai Server-Sent Events:
+    `event: chunk` per kalimat begitu siap, lalu `event: done` berisi metadata.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Missing JSON body"}), 400
+
+    user_id = data.get("user_id", "unknown_user")
+    session_id = data.get("session_id", f"sess_{user_id}")
+    text = data.get("text", "").strip()
+    if not text:
+        return jsonify({"response": "⚠️ Pesan kosong nih, coba ketik lagi ya!"}), 400
+
+    def generate():
+        stream = bot.handle_user_input_stream(user_id, session_id, text)
+        try:
+            while True:
+                try:
+                    chunk = next(stream)
+                except StopIteration as done:
+                    response = done.value or {}
+                    break
+                yield sse_event("chunk", {"text": chunk})
+        except Exception as e:
+            logger.error(f"Error streaming message: {e}", exc_info=True)
+            yield sse_event("error", {"error": str(e)})
+            return
+        finally:
+            stream.close()  # client putus di tengah stream -> turn tetap diselesaikan bot
+        yield sse_event("done", {
+            "status": "success",
+            "user_id": user_id,
+            "session_id": session_id,
+            "bot_response": response.get("response", ""),
+            "metadata": response.get("metadata", {}),
+            "phase": response.get("phase", "")
+        })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    """Hit rate cache (decision LLM & embedding query), latency/error per provider LLM, jumlah & ukuran sesi"""
+    decision_cache = bot.agent.decision_cache if bot else None
+    return jsonify({
+        "decision_cache": decision_cache.stats() if decision_cache else None,
+        "embedding_cache": embedding_cache.stats(),
+        "llm_providers": bot.agent.router.stats() if bot else None,
+        "sessions": bot.session.stats() if bot else None,
+    })
+
+
 @app.route("/ping", methods=["GET"])
 def ping():
     """Simple health check"""